@@ -0,0 +1,203 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+# Sin pantalla: Qt dibuja en memoria, igual que en una máquina de integración
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import QTimer, QEventLoop
+
+from regex_gui import RegexMainWindow, STARTUP_TRACE, startup_mark
+
+WORDS = ("error", "aviso", "usuario", "pedido", "servidor", "respuesta", "tiempo", "archivo", "sesión")
+
+def synthetic_text(size, seed=0):
+    """Texto de log sintético de unos `size` caracteres (palabras, números, correos y fechas)"""
+    rng = random.Random(seed)
+    lines = []
+    length = 0
+    while length < size:
+        line = (f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} "
+                f"{rng.choice(WORDS)} id={rng.randint(1, 99999)} "
+                f"{rng.choice(WORDS)}{rng.randint(0, 9)}@ejemplo.com "
+                + " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 10))))
+        lines.append(line)
+        length += len(line) + 1
+    return "\n".join(lines)[:size]
+
+class StallMonitor:
+    """Mide los huecos entre ticks de un temporizador del bucle de eventos
+
+    Si el hilo de la interfaz queda bloqueado, el siguiente tick llega tarde:
+    el hueco más largo es la congelación más larga que vería el usuario.
+    """
+
+    def __init__(self, interval_ms=1):
+        self.timer = QTimer()
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.tick)
+        self.gaps = []
+        self.last = None
+
+    def start(self):
+        self.gaps = []
+        self.last = time.perf_counter()
+        self.timer.start()
+
+    def tick(self):
+        now = time.perf_counter()
+        self.gaps.append((now - self.last) * 1000)
+        self.last = now
+
+    def stop(self):
+        self.tick()
+        self.timer.stop()
+        return self.gaps
+
+class UIBenchmark:
+    """Maneja `RegexMainWindow` sin pantalla y mide cuánto bloquea cada análisis"""
+
+    def __init__(self, pattern, load_all=False, process_pool=False, warm=False, timeout=300.0):
+        self.pattern = pattern
+        self.load_all = load_all
+        self.warm = warm
+        self.timeout = timeout
+        self.window = RegexMainWindow()
+        self.window.show_message = lambda title, message, msg_type: None
+        self.window.process_pool_check.setChecked(process_pool)
+        self.window.regex_input.setPlainText(pattern)
+        self.window.show()
+        self.monitor = StallMonitor()
+        self.timings = {}
+        self.done = False
+        self._instrument()
+
+    def _timed(self, name, function):
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.timings[name] = self.timings.get(name, 0.0) + (time.perf_counter() - started) * 1000
+        return wrapper
+
+    def _instrument(self):
+        # Los atributos de instancia tapan a los métodos: las señales se conectan a los envoltorios
+        window = self.window
+        finished = self._timed('on_processing_finished', window.on_processing_finished)
+
+        def on_finished(result):
+            finished(result)
+            self.done = True
+        window.on_processing_finished = on_finished
+
+        def on_error(message):
+            self.done = True
+            self.timings['error'] = message
+        window.on_processing_error = on_error
+        window.highlighted_text.highlight_matches = self._timed('highlight_matches',
+                                                                window.highlighted_text.highlight_matches)
+        window.matches_model.set_matches = self._timed('matches_fill', window.matches_model.set_matches)
+
+    def wait(self, ms):
+        loop = QEventLoop()
+        QTimer.singleShot(ms, loop.quit)
+        loop.exec()
+
+    def run(self, size, seed=0):
+        """Analiza un texto sintético de `size` caracteres y devuelve las mediciones"""
+        window = self.window
+        text = synthetic_text(size, seed)
+        if not self.warm:
+            window.result_cache.clear()
+        self.timings = {}
+        self.done = False
+
+        started = time.perf_counter()
+        window.text_input.setPlainText(text)
+        self.timings['set_text'] = (time.perf_counter() - started) * 1000
+
+        self.monitor.start()
+        started = time.perf_counter()
+        window.process_text(load_all=self.load_all)
+        deadline = started + self.timeout
+        while not self.done and time.perf_counter() < deadline:
+            self.wait(1)
+        # Pintar el resultado también es parte de lo que el usuario espera
+        paint_started = time.perf_counter()
+        window.highlighted_text.viewport().repaint()
+        window.matches_list.viewport().repaint()
+        self.timings['paint'] = (time.perf_counter() - paint_started) * 1000
+        total = (time.perf_counter() - started) * 1000
+        gaps = sorted(self.monitor.stop())
+
+        return {
+            'size_chars': len(text),
+            'lines': text.count('\n') + 1,
+            'completed': self.done and 'error' not in self.timings,
+            'match_count': window.matches_model.rowCount(),
+            'stats': window.stats_label.text(),
+            'total_ms': round(total, 2),
+            'max_stall_ms': round(gaps[-1], 2) if gaps else 0.0,
+            'p95_gap_ms': round(gaps[int(0.95 * (len(gaps) - 1))], 2) if gaps else 0.0,
+            'ticks': len(gaps),
+            'timings_ms': {name: round(value, 2) if isinstance(value, float) else value
+                           for name, value in self.timings.items()},
+        }
+
+def main():
+    """Punto de entrada del benchmark de respuesta de la interfaz"""
+    parser = argparse.ArgumentParser(description="Benchmark de congelaciones de la interfaz (Qt sin pantalla)")
+    parser.add_argument('--pattern', default=r'\b\w+@\w+\.com\b', help="regex a analizar")
+    parser.add_argument('--sizes', default="10000,100000,1000000,5000000",
+                        help="tamaños de texto en caracteres, separados por comas")
+    parser.add_argument('--repeat', type=int, default=1, help="repeticiones por tamaño")
+    parser.add_argument('--load-all', action='store_true', help="analizar sin el límite de textos enormes")
+    parser.add_argument('--processes', action='store_true', help="usar el pool de procesos")
+    parser.add_argument('--warm', action='store_true', help="no vaciar la caché de resultados entre corridas")
+    parser.add_argument('--max-stall', type=float,
+                        help="falla (código 1) si alguna congelación supera estos ms")
+    parser.add_argument('--json', help="ruta donde guardar el reporte JSON (por defecto stdout)")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv[:1])
+    bench = UIBenchmark(args.pattern, args.load_all, args.processes, args.warm)
+    startup_mark('window')
+    bench.wait(50)
+
+    runs = []
+    for size in (int(value) for value in args.sizes.split(',') if value.strip()):
+        for repeat in range(args.repeat):
+            run = bench.run(size, seed=repeat)
+            run['repeat'] = repeat
+            runs.append(run)
+            print(f"{run['size_chars']:>10} chars  total {run['total_ms']:>9.1f} ms  "
+                  f"máx. congelación {run['max_stall_ms']:>8.1f} ms", file=sys.stderr)
+
+    report = {
+        'pattern': args.pattern,
+        'platform': os.environ.get('QT_QPA_PLATFORM'),
+        'load_all': args.load_all,
+        'processes': args.processes,
+        'startup_ms': dict(STARTUP_TRACE),
+        'runs': runs,
+        'max_stall_ms': max((run['max_stall_ms'] for run in runs), default=0.0),
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+    bench.window.close()
+    app.quit()
+
+    failed = args.max_stall is not None and report['max_stall_ms'] > args.max_stall
+    sys.exit(1 if failed or not all(run['completed'] for run in runs) else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,3041 @@
+import sys
+import os
+import re
+import time
+import hashlib
+import heapq
+import json
+import csv
+import string
+import struct
+import codecs
+import gzip
+import bz2
+import lzma
+import mmap
+import queue
+import multiprocessing
+import threading
+import signal
+import tempfile
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict, deque
+from functools import lru_cache
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory, resource_tracker
+from typing import List, Tuple, Optional, Dict
+
+try:
+    from re import _parser as sre_parse
+    from re import _constants as sre_constants
+except ImportError:  # Python < 3.11
+    import sre_parse
+    import sre_constants
+
+
+# Tamaño de bloque y contexto previo para la lectura por flujo de archivos
+STREAM_CHUNK_SIZE = 1 << 20
+STREAM_CONTEXT_CHARS = 64
+
+# Por debajo de este largo la vía vectorizada no compensa la conversión del texto
+FAST_PATH_MIN_CHARS = 1 << 12
+# Caracteres por tramo de la vía vectorizada: acota los arreglos intermedios de NumPy
+FAST_PATH_PAGE_CHARS = 1 << 22
+
+@lru_cache(maxsize=1)
+def _load_numpy():
+    """Importa NumPy en el primer uso (es opcional y su carga retrasaría el arranque)"""
+    try:
+        import numpy
+    except ImportError:  # Sin NumPy toda búsqueda pasa por `re`
+        return None
+    return numpy
+
+# Cabe una biblioteca de unos cientos de patrones precompilados más los de la sesión;
+# las cachés por patrón que se precalientan con ella usan el mismo tamaño
+PATTERN_CACHE_SIZE = 1024
+
+@lru_cache(maxsize=PATTERN_CACHE_SIZE)
+def _compile_cached(pattern, flags):
+    return re.compile(pattern, flags)
+
+@lru_cache(maxsize=PATTERN_CACHE_SIZE)
+def _build_dfa_cached(pattern, flags):
+    return RegexDFA.from_pattern(pattern, flags)
+
+def _text_hasher(*texts):
+    """blake2b de los textos seguidos en UTF-8, codificados por bloques para no copiarlos enteros"""
+    hasher = hashlib.blake2b(digest_size=16)
+    for text in texts:
+        for pos in range(0, len(text), STREAM_CHUNK_SIZE):
+            hasher.update(text[pos:pos + STREAM_CHUNK_SIZE].encode('utf-8', 'surrogatepass'))
+    return hasher
+
+def parse_flags(value) -> int:
+    """Convierte banderas (entero o lista de nombres) a flags de `re`"""
+    if not value:
+        return 0
+    if isinstance(value, int):
+        return value
+    flags = 0
+    for name in value:
+        flag = getattr(re, str(name).upper(), None)
+        if not isinstance(flag, re.RegexFlag):
+            raise ValueError(f"Bandera desconocida: {name}")
+        flags |= flag
+    return flags
+
+def _findall_value(match):
+    """Valor que `findall` devolvería para una coincidencia"""
+    groups = match.re.groups
+    if groups == 0:
+        return match.group()
+    if groups == 1:
+        return match.group(1) or ''
+    return match.groups('')
+
+@lru_cache(maxsize=PATTERN_CACHE_SIZE)
+def _class_run_shape(pattern, flags):
+    """Forma `C`, `C{m,n}` o `C{m,n}?` de un patrón, con C una sola clase de caracteres
+
+    Devuelve (tabla de 256 bytes, mínimo, paso, conservar resto) o None si el
+    patrón tiene cualquier otra forma. El paso es el largo que toma cada
+    coincidencia dentro de una racha (None si la toma completa) y el resto es
+    la cola de la racha más corta que el paso.
+    """
+    try:
+        items = list(sre_parse.parse(pattern, flags))
+    except (re.error, RecursionError):
+        return None
+    if len(items) != 1:
+        return None
+    op, av = items[0]
+    class_ops = (sre_constants.LITERAL, sre_constants.NOT_LITERAL, sre_constants.ANY, sre_constants.IN)
+    if op in class_ops:
+        minimum, step, keep_rest = 1, 1, False
+    elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT, getattr(sre_constants, 'POSSESSIVE_REPEAT', None)):
+        minimum, maximum, sub = av
+        if minimum < 1 or len(sub) != 1 or sub[0][0] not in class_ops:
+            return None
+        if op is sre_constants.MIN_REPEAT:
+            step, keep_rest = minimum, False
+        else:
+            step = None if maximum == sre_constants.MAXREPEAT else maximum
+            keep_rest = True
+    else:
+        return None
+    # La propia regex decide qué bytes pertenecen a la clase (banderas incluidas)
+    compiled = _compile_cached(pattern, flags)
+    table = bytes(compiled.fullmatch(chr(code) * minimum) is not None for code in range(256))
+    return table, minimum, step, keep_rest
+
+def _class_run_pages(compiled, text, page_chars=None):
+    """Spans de un patrón de rachas de una clase, calculados con NumPy por tramos del texto
+
+    Devuelve un iterador de pares (inicios, finales) en arreglos int64 cuya
+    concatenación es idéntica a `finditer`, o None si NumPy no está
+    disponible o el patrón no tiene esa forma. Los tramos se cortan en un
+    carácter fuera de la clase, así que ninguna racha queda partida; desde el
+    primer tramo con caracteres fuera de latin-1 se sigue con `finditer`.
+    """
+    if len(text) < FAST_PATH_MIN_CHARS:
+        return None
+    shape = _class_run_shape(compiled.pattern, compiled.flags)
+    if shape is None:
+        return None
+    np = _load_numpy()
+    if np is None:
+        return None
+    return _iter_class_runs(np, compiled, text, shape, page_chars or FAST_PATH_PAGE_CHARS)
+
+def _iter_class_runs(np, compiled, text, shape, page_chars):
+    table, minimum, step, keep_rest = shape
+    members = np.frombuffer(table, dtype=np.bool_)
+    pos = 0
+    size = page_chars
+    while pos < len(text):
+        try:
+            data = text[pos:pos + size].encode('latin-1')
+        except UnicodeEncodeError:
+            # `pos` sigue a un carácter fuera de la clase: `finditer` desde ahí da lo mismo que el global
+            for starts, ends in _match_pages(compiled.finditer(text, pos), SpanList.PAGE_SIZE):
+                yield np.frombuffer(starts, dtype=np.int64), np.frombuffer(ends, dtype=np.int64)
+            return
+        inside = members[np.frombuffer(data, dtype=np.uint8)]
+        if pos + len(data) < len(text):
+            outside = np.flatnonzero(~inside)
+            if not len(outside):
+                # Una sola racha ocupa todo el tramo: se agranda hasta encontrar su final
+                size *= 2
+                continue
+            inside = inside[:outside[-1]]
+        found = _class_runs(np, inside, minimum, step, keep_rest)
+        if len(found[0]):
+            yield found[0] + pos, found[1] + pos
+        pos += len(inside) + 1
+        size = page_chars
+
+def _class_runs(np, inside, minimum, step, keep_rest):
+    """Coincidencias dentro de un tramo a partir de la máscara de pertenencia a la clase"""
+    edges = np.diff(inside.view(np.int8), prepend=np.int8(0), append=np.int8(0))
+    run_starts = np.flatnonzero(edges == 1).astype(np.int64)
+    run_ends = np.flatnonzero(edges == -1).astype(np.int64)
+    lengths = run_ends - run_starts
+    
+    if step is None:
+        keep = lengths >= minimum
+        return run_starts[keep], run_ends[keep]
+    
+    # Cada racha se parte en coincidencias de `step` caracteres más, si alcanza el mínimo, su resto
+    pieces = lengths // step
+    runs = np.repeat(np.arange(len(pieces)), pieces)
+    offsets = np.arange(len(runs)) - np.repeat(np.cumsum(pieces) - pieces, pieces)
+    starts = run_starts[runs] + offsets * step
+    ends = starts + step
+    if keep_rest:
+        rest = lengths - pieces * step
+        tails = rest >= minimum
+        starts = np.concatenate((starts, run_ends[tails] - rest[tails]))
+        ends = np.concatenate((ends, run_ends[tails]))
+        order = np.argsort(starts, kind='stable')
+        starts, ends = starts[order], ends[order]
+    return starts, ends
+
+def _match_pages(matches, size):
+    """Agrupa las coincidencias en páginas (inicios, finales) de arreglos int64"""
+    starts, ends = array('q'), array('q')
+    for match in matches:
+        starts.append(match.start())
+        ends.append(match.end())
+        if len(starts) >= size:
+            yield starts, ends
+            starts, ends = array('q'), array('q')
+    if starts:
+        yield starts, ends
+
+class RegexValidator:
+    """Clase para validar y procesar expresiones regulares"""
+    
+    SCAN_MODES = ('full', 'limit', 'count', 'exists')
+    
+    def __init__(self):
+        self.supported_metacharacters = {
+            '\\d': 'cualquier dígito [0-9]',
+            '\\D': 'cualquier no dígito [^0-9]',
+            '\\s': 'cualquier espacio en blanco',
+            '\\S': 'cualquier no espacio en blanco',
+            '\\w': 'cualquier alfanumérico [a-zA-Z0-9_]',
+            '\\W': 'cualquier no alfanumérico [^a-zA-Z0-9_]',
+            '.': 'cualquier carácter excepto nueva línea',
+            '^': 'inicio de línea',
+            '$': 'final de línea',
+            '*': 'cero o más repeticiones',
+            '+': 'una o más repeticiones',
+            '?': 'cero o una repetición',
+            '|': 'alternancia (OR)',
+            '()': 'agrupación',
+            '[]': 'clases de caracteres',
+            '\\': 'escape'
+        }
+    
+    def compile(self, pattern: str, flags: int = 0):
+        """Compila la regex usando la caché compartida por todo el proceso"""
+        return _compile_cached(pattern, flags)
+    
+    def verify_regex(self, pattern: str, flags: int = 0) -> Tuple[bool, Optional[str]]:
+        """Verifica si una expresión regular está bien formada"""
+        if not pattern.strip():
+            return False, "La expresión regular no puede estar vacía"
+            
+        try:
+            self.compile(pattern, flags)
+            return True, None
+        except re.error as e:
+            return False, str(e)
+    
+    def find_matches(self, pattern: str, text: str, flags: int = 0) -> Tuple[Optional[List[str]], Optional[str]]:
+        """Encuentra todas las coincidencias de la regex en el texto"""
+        try:
+            compiled_pattern = self.compile(pattern, flags)
+            matches = compiled_pattern.findall(text)
+            return matches, None
+        except re.error as e:
+            return None, str(e)
+    
+    def _iter_matches(self, compiled, text, index=None):
+        """Itera las coincidencias, recorriendo sólo los bloques candidatos si hay índice"""
+        ranges = index.candidate_ranges(compiled) if index is not None else None
+        if ranges is None:
+            yield from compiled.finditer(text)
+            return
+        for start, end in ranges:
+            yield from compiled.finditer(text, start, end)
+    
+    def scan(self, pattern: str, text: str, mode: str = 'full', limit: Optional[int] = None,
+             flags: int = 0, index=None, memory_budget: Optional[int] = None) -> Tuple[Optional[Dict], Optional[str]]:
+        """Busca en una sola pasada según el modo: 'full', 'limit' (primeras N), 'count' o 'exists'
+
+        'exists' y 'limit' dejan de recorrer el texto en cuanto tienen la respuesta
+        ('limit' sin `limit` recorre todo, como 'full'); 'count' no conserva ninguna
+        coincidencia. Con un `TrigramIndex` del mismo texto sólo se recorren los
+        bloques que pueden contener coincidencias. `memory_budget` reemplaza el
+        presupuesto de `SpanList` para los spans de esta búsqueda.
+        """
+        if mode not in self.SCAN_MODES:
+            return None, f"Modo de búsqueda desconocido: {mode}"
+        try:
+            compiled = self.compile(pattern, flags)
+        except re.error as e:
+            return None, str(e)
+        
+        # La vía vectorizada recorre todo el texto: sólo sirve a los modos que lo recorren igual
+        pages = _class_run_pages(compiled, text) if mode in ('full', 'count') and index is None else None
+        if pages is not None:
+            return self._scan_result(mode, text, pages, memory_budget), None
+        
+        spans = SpanList(memory_budget=memory_budget)
+        matches = []
+        complete = True
+        matches_iter = self._iter_matches(compiled, text, index)
+        if mode == 'exists':
+            match = next(matches_iter, None)
+            if match is not None:
+                spans.append(match.start(), match.end())
+                matches.append(_findall_value(match))
+                complete = False
+            count = len(spans)
+        elif mode == 'count':
+            count = 0
+            for _ in matches_iter:
+                count += 1
+            spans = matches = None
+        else:
+            iterator = matches_iter
+            if mode == 'limit' and limit is not None:
+                iterator = islice(iterator, limit + 1)
+            for match in iterator:
+                spans.append(match.start(), match.end())
+                if matches is not None:
+                    matches.append(_findall_value(match))
+                    if spans.spilled:
+                        # Volcados los spans a disco, los valores se leen del texto al mostrarlos
+                        matches = None
+            if mode == 'limit' and limit is not None and len(spans) > limit:
+                # La coincidencia extra sólo indica que hay más
+                spans.pop()
+                if matches is not None:
+                    matches.pop()
+                complete = False
+            count = len(spans)
+        
+        return {
+            'mode': mode,
+            'spans': spans,
+            'matches': matches,
+            'match_count': count,
+            'complete': complete,
+        }, None
+    
+    def _scan_result(self, mode, text, pages, memory_budget=None):
+        """Resultado de `scan` a partir de las páginas de spans vectorizados (patrones sin grupos)"""
+        if mode == 'count':
+            count = sum(len(starts) for starts, _ends in pages)
+            return {'mode': mode, 'spans': None, 'matches': None, 'match_count': count, 'complete': True}
+        
+        spans = SpanList(memory_budget=memory_budget)
+        matches = []
+        for starts, ends in pages:
+            spans.extend(array('q', starts.tobytes()), array('q', ends.tobytes()))
+            if matches is not None:
+                if spans.spilled:
+                    matches = None
+                else:
+                    matches.extend(text[start:end] for start, end in zip(starts.tolist(), ends.tolist()))
+        return {
+            'mode': mode,
+            'spans': spans,
+            'matches': matches,
+            'match_count': len(spans),
+            'complete': True,
+        }
+    
+    def aggregate(self, pattern: str, text: str, group=0, top_k: int = 100,
+                  memory_budget: int = 32 * 1024 * 1024, flags: int = 0) -> Tuple[Optional[Dict], Optional[str]]:
+        """Cuenta la frecuencia del texto coincidente (o de un grupo) en una sola pasada"""
+        try:
+            compiled = self.compile(pattern, flags)
+        except re.error as e:
+            return None, str(e)
+        if isinstance(group, int) and group > compiled.groups:
+            return None, f"La expresión sólo tiene {compiled.groups} grupo(s)"
+        if isinstance(group, str) and group not in compiled.groupindex:
+            return None, f"La expresión no tiene un grupo llamado '{group}'"
+        
+        aggregator = MatchFrequencyAggregator(memory_budget)
+        for match in compiled.finditer(text):
+            value = match.group(group)
+            if value is not None:
+                aggregator.add(value)
+        
+        return {
+            'top': aggregator.top(top_k),
+            'total': aggregator.total,
+            'tracked': len(aggregator.counts),
+            'exact': aggregator.exact,
+        }, None
+    
+    def verify_template(self, pattern: str, template: str, flags: int = 0) -> Tuple[bool, Optional[str]]:
+        """Verifica que la plantilla de reemplazo sea válida para la regex (grupos, escapes)"""
+        try:
+            sre_parse.parse_template(template, self.compile(pattern, flags))
+            return True, None
+        except re.error as e:
+            return False, str(e)
+    
+    def substitute(self, pattern: str, template: str, text: str, start: int = 0,
+                   end: Optional[int] = None, flags: int = 0) -> Tuple[Optional[str], int, Optional[str]]:
+        """Reemplaza las coincidencias contenidas en [start, end) y devuelve ese tramo reescrito"""
+        is_valid, error = self.verify_template(pattern, template, flags)
+        if not is_valid:
+            return None, 0, error
+        compiled = self.compile(pattern, flags)
+        end = len(text) if end is None else end
+        
+        pieces = []
+        last = start
+        count = 0
+        for match in compiled.finditer(text, start):
+            if match.end() > end:
+                break
+            pieces.append(text[last:match.start()])
+            pieces.append(match.expand(template))
+            last = match.end()
+            count += 1
+        pieces.append(text[last:end])
+        return ''.join(pieces), count, None
+    
+    def substitute_file(self, pattern: str, template: str, source_path: str, target_path: str,
+                        flags: int = 0, chunk_size: int = STREAM_CHUNK_SIZE) -> Tuple[Optional[int], Optional[str]]:
+        """Reescribe un archivo bloque a bloque con memoria constante; devuelve el número de reemplazos"""
+        is_valid, error = self.verify_template(pattern, template, flags)
+        if not is_valid:
+            return None, error
+        compiled = self.compile(pattern, flags)
+        try:
+            with open(target_path, 'w', encoding='utf-8', errors='surrogateescape', newline='') as out:
+                count = substitute_stream(compiled, template, iter_file_chunks(source_path, chunk_size), out.write)
+            return count, None
+        except OSError as e:
+            return None, str(e)
+    
+    def scan_file(self, pattern: str, path: str, mode: str = 'full', limit: Optional[int] = None,
+                  flags: int = 0) -> Tuple[Optional[Dict], Optional[str]]:
+        """Como `scan`, pero sobre un archivo (texto plano, .gz, .bz2 o .xz) leído por bloques
+
+        Los offsets se expresan en caracteres del texto descomprimido; además se
+        devuelven la línea y la columna (base 0) de cada coincidencia.
+        """
+        if mode not in self.SCAN_MODES:
+            return None, f"Modo de búsqueda desconocido: {mode}"
+        try:
+            compiled = self.compile(pattern, flags)
+        except re.error as e:
+            return None, str(e)
+        
+        keep = mode != 'count'
+        spans = SpanList()
+        matches = []
+        positions = SpanList()  # pares (línea, columna), con el mismo presupuesto de memoria
+        count = 0
+        complete = True
+        line = 0
+        line_start = 0
+        try:
+            for base, segment, found in iter_stream_matches(compiled, iter_file_chunks(path)):
+                last = 0
+                for start, end, match in found:
+                    if mode == 'limit' and limit is not None and count >= limit or mode == 'exists' and count:
+                        complete = False
+                        break
+                    count += 1
+                    if not keep:
+                        continue
+                    newlines = segment.count('\n', last, start)
+                    if newlines:
+                        line += newlines
+                        line_start = base + segment.rfind('\n', last, start) + 1
+                    last = start
+                    spans.append(base + start, base + end)
+                    positions.append(line, base + start - line_start)
+                    if matches is not None:
+                        matches.append(_findall_value(match))
+                        if spans.spilled:
+                            matches = None
+                if not complete:
+                    break
+                newlines = segment.count('\n', last)
+                if newlines:
+                    line += newlines
+                    line_start = base + segment.rfind('\n', last) + 1
+        except (OSError, EOFError, lzma.LZMAError, UnicodeError) as e:
+            return None, str(e)
+        
+        return {
+            'mode': mode,
+            'spans': spans if keep else None,
+            'matches': matches if keep else None,
+            'line_numbers': positions.starts if keep else None,
+            'columns': positions.ends if keep else None,
+            'match_count': count,
+            'complete': complete,
+        }, None
+    
+    def get_match_positions(self, pattern: str, text: str, flags: int = 0) -> Tuple[Optional[List[Tuple[int, int, str]]], Optional[str]]:
+        """Obtiene las posiciones de las coincidencias en el texto"""
+        try:
+            compiled_pattern = self.compile(pattern, flags)
+            matches = []
+            for match in compiled_pattern.finditer(text):
+                matches.append((match.start(), match.end(), match.group()))
+            return matches, None
+        except re.error as e:
+            return None, str(e)
+    
+    def build_dfa(self, pattern: str, flags: int = 0) -> Tuple[Optional['RegexDFA'], Optional[str]]:
+        """Construye el DFA mínimo de la regex (sólo para el subconjunto regular)"""
+        try:
+            return _build_dfa_cached(pattern, flags), None
+        except re.error as e:
+            return None, str(e)
+        except _UnsupportedConstruct as e:
+            return None, f"Fuera del subconjunto regular: {e}"
+    
+    def check_redos(self, pattern: str, flags: int = 0) -> Tuple[Optional[List[str]], Optional[str]]:
+        """Advertencias estáticas de retroceso catastrófico (lista vacía si no hay riesgo aparente)"""
+        try:
+            return redos_warnings(pattern, flags), None
+        except re.error as e:
+            return None, str(e)
+    
+    def compare_patterns(self, pattern_a: str, pattern_b: str, flags: int = 0) -> Tuple[Optional[Dict], Optional[str]]:
+        """Comprueba si dos regex aceptan el mismo lenguaje (fullmatch)
+
+        Si difieren devuelve la cadena más corta que sólo una de ellas acepta.
+        """
+        dfa_a, error = self.build_dfa(pattern_a, flags)
+        if error:
+            return None, f"Patrón actual: {error}"
+        dfa_b, error = self.build_dfa(pattern_b, flags)
+        if error:
+            return None, f"Patrón alternativo: {error}"
+        counterexample = dfa_a.counterexample(dfa_b)
+        return {
+            'equivalent': counterexample is None,
+            'counterexample': counterexample,
+            'accepted_by': None if counterexample is None else ('a' if dfa_a.fullmatch(counterexample) else 'b'),
+            'states': (dfa_a.state_count, dfa_b.state_count),
+        }, None
+
+class SpillArray:
+    """Arreglo int64 de sólo agregado respaldado por un archivo temporal
+
+    Los valores se acumulan en memoria por lotes y se escriben al final del
+    archivo; las lecturas usan un mapeo en memoria que se renueva cuando el
+    archivo crece, así que acceder a cualquier posición no carga el resto.
+    """
+    BATCH_SIZE = 1 << 16
+
+    def __init__(self, values=()):
+        self.file = tempfile.TemporaryFile(prefix='regex-spans-')
+        self.count = 0
+        self.pending = array('q')
+        self._view = None
+        self._mapped = 0
+        self.extend(values)
+
+    def append(self, value):
+        self.pending.append(value)
+        if len(self.pending) >= self.BATCH_SIZE:
+            self.flush()
+
+    def extend(self, values):
+        self.pending.extend(values)
+        if len(self.pending) >= self.BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        """Escribe al archivo los valores pendientes"""
+        if not self.pending:
+            return
+        self.file.seek(8 * self.count)
+        self.pending.tofile(self.file)
+        self.file.flush()
+        self.count += len(self.pending)
+        self.pending = array('q')
+
+    def _values(self):
+        if self._mapped != self.count:
+            self._view = memoryview(mmap.mmap(self.file.fileno(), 8 * self.count,
+                                              access=mmap.ACCESS_READ)).cast('q')
+            self._mapped = self.count
+        return self._view
+
+    def __len__(self):
+        return self.count + len(self.pending)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return array('q', (self[i] for i in range(start, stop, step)))
+            result = array('q')
+            if start < min(stop, self.count):
+                result.frombytes(self._values()[start:min(stop, self.count)].cast('B'))
+            if stop > self.count:
+                result.extend(self.pending[max(start - self.count, 0):stop - self.count])
+            return result
+        if index < 0:
+            index += len(self)
+        if index < 0:
+            raise IndexError("índice fuera de rango")
+        if index >= self.count:
+            return self.pending[index - self.count]
+        return self._values()[index]
+
+    def pop(self):
+        if not self.pending:
+            # Sólo se acorta la longitud lógica: truncar el archivo con un mapeo vivo puede dar SIGBUS
+            self.pending.append(self[len(self) - 1])
+            self.count -= 1
+        return self.pending.pop()
+
+    def __iter__(self):
+        for pos in range(0, len(self), self.BATCH_SIZE):
+            yield from self[pos:pos + self.BATCH_SIZE]
+
+class MappedArray:
+    """Arreglo int64 sobre una sección de sólo lectura de un archivo mapeado
+
+    Se lee igual que un `SpillArray`: las posiciones sueltas vienen directo
+    del mapeo y las rebanadas se copian a `array('q')`. El mapeo no se toca:
+    lo que se agregue después (p. ej. el modo seguimiento) va a un
+    `SpillArray` propio que se crea en el primer agregado.
+    """
+
+    def __init__(self, view):
+        self.view = view
+        self.tail = None
+
+    def _grow(self):
+        if self.tail is None:
+            self.tail = SpillArray()
+        return self.tail
+
+    def append(self, value):
+        self._grow().append(value)
+
+    def extend(self, values):
+        self._grow().extend(values)
+
+    def pop(self):
+        if self.tail is not None and len(self.tail):
+            return self.tail.pop()
+        value = self.view[-1]
+        self.view = self.view[:-1]
+        return value
+
+    def __len__(self):
+        return len(self.view) + (len(self.tail) if self.tail is not None else 0)
+
+    def __getitem__(self, index):
+        mapped = len(self.view)
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return array('q', (self[i] for i in range(start, stop, step)))
+            result = array('q')
+            if start < min(stop, mapped):
+                result.frombytes(self.view[start:min(stop, mapped)].cast('B'))
+            if stop > mapped:
+                result.extend(self.tail[max(start - mapped, 0):stop - mapped])
+            return result
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("índice fuera de rango")
+        if index >= mapped:
+            return self.tail[index - mapped]
+        return self.view[index]
+
+    def __iter__(self):
+        for pos in range(0, len(self), SpillArray.BATCH_SIZE):
+            yield from self[pos:pos + SpillArray.BATCH_SIZE]
+
+class SpanList:
+    """Lista compacta de spans (inicio, fin) respaldada por arreglos int64
+
+    Pasado el presupuesto de memoria (`memory_budget`, en bytes) los arreglos
+    se vuelcan a archivos temporales (`SpillArray`) y la lista sigue creciendo
+    en disco con la misma interfaz. Los spans de una sesión abierta se leen
+    de su archivo mapeado (`MappedArray`, sólo lectura).
+    """
+    memory_budget = 256 * 1024 * 1024
+    PAGE_SIZE = 1 << 16
+
+    def __init__(self, starts=None, ends=None, memory_budget=None):
+        self.starts = starts if starts is not None else array('q')
+        self.ends = ends if ends is not None else array('q')
+        budget = self.memory_budget if memory_budget is None else memory_budget
+        self._spill_at = max(1, budget // 16)
+        if len(self.starts) > self._spill_at:
+            self.spill()
+
+    @property
+    def spilled(self):
+        return not isinstance(self.starts, array)
+
+    def spill(self):
+        """Pasa los spans a disco; a partir de aquí los agregados van al archivo"""
+        if not self.spilled:
+            self.starts = SpillArray(self.starts)
+            self.ends = SpillArray(self.ends)
+        self._spill_at = sys.maxsize
+
+    def memory_bytes(self):
+        """Bytes que los spans ocupan en memoria (sin contar lo volcado a disco)"""
+        if self.spilled:
+            return 8 * (len(getattr(self.starts, 'pending', ())) + len(getattr(self.ends, 'pending', ())))
+        return 16 * len(self.starts)
+
+    def append(self, start, end):
+        self.starts.append(start)
+        self.ends.append(end)
+        if len(self.starts) > self._spill_at:
+            self.spill()
+
+    def extend(self, starts, ends):
+        """Agrega una página de inicios y finales (arreglos del mismo largo)"""
+        self.starts.extend(starts)
+        self.ends.extend(ends)
+        if len(self.starts) > self._spill_at:
+            self.spill()
+
+    def pop(self):
+        return self.starts.pop(), self.ends.pop()
+
+    def pages(self, size=PAGE_SIZE):
+        """Recorre los spans por páginas: (posición, inicios, finales)"""
+        for pos in range(0, len(self.starts), size):
+            yield pos, self.starts[pos:pos + size], self.ends[pos:pos + size]
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, index):
+        return self.starts[index], self.ends[index]
+
+    def __iter__(self):
+        if not self.spilled:
+            return zip(self.starts, self.ends)
+        return (span for _pos, starts, ends in self.pages() for span in zip(starts, ends))
+
+def diff_spans(old, new):
+    """Compara dos listas de spans ordenadas en una sola pasada lineal
+
+    Devuelve SpanList con las coincidencias sin cambios, eliminadas (sólo en
+    `old`), agregadas (sólo en `new`) y desplazadas (las de `new` que se
+    solapan con alguna de `old` sin ser idénticas), más `changes`: los spans
+    eliminados, agregados y desplazados en orden, con su tipo en `kinds`
+    (0 eliminada, 1 agregada, 2 desplazada).
+    """
+    unchanged, removed, added, shifted, changes = SpanList(), SpanList(), SpanList(), SpanList(), SpanList()
+    kinds = array('b')
+    old_starts, old_ends = old.starts, old.ends
+    new_starts, new_ends = new.starts, new.ends
+    n, m = len(old_starts), len(new_starts)
+    i = j = 0
+    old_hit = new_hit = False
+    block = 16
+    while i < n and j < m:
+        a_start, a_end = old_starts[i], old_ends[i]
+        b_start, b_end = new_starts[j], new_ends[j]
+        if a_start == b_start and a_end == b_end and not old_hit and not new_hit:
+            # Los tramos idénticos se comparan por bloques que crecen mientras coinciden
+            starts, ends = old_starts[i:i + block], old_ends[i:i + block]
+            if starts == new_starts[j:j + block] and ends == new_ends[j:j + block]:
+                unchanged.extend(starts, ends)
+                i += len(starts)
+                j += len(starts)
+                block = min(block * 2, SpanList.PAGE_SIZE)
+            else:
+                unchanged.append(a_start, a_end)
+                i += 1
+                j += 1
+                block = 16
+        elif a_start == b_start or a_start < b_end and b_start < a_end:
+            # Se solapan: avanza la que termina primero, recordando que la otra ya se tocó
+            old_hit = new_hit = True
+            if a_end <= b_end:
+                i += 1
+                old_hit = False
+            if b_end <= a_end:
+                shifted.append(b_start, b_end)
+                changes.append(b_start, b_end)
+                kinds.append(2)
+                j += 1
+                new_hit = False
+        elif a_end <= b_start:
+            if not old_hit:
+                removed.append(a_start, a_end)
+                changes.append(a_start, a_end)
+                kinds.append(0)
+            i += 1
+            old_hit = False
+        else:
+            if new_hit:
+                shifted.append(b_start, b_end)
+                changes.append(b_start, b_end)
+                kinds.append(2)
+            else:
+                added.append(b_start, b_end)
+                changes.append(b_start, b_end)
+                kinds.append(1)
+            j += 1
+            new_hit = False
+    for i in range(i + old_hit, n):
+        removed.append(old_starts[i], old_ends[i])
+        changes.append(old_starts[i], old_ends[i])
+        kinds.append(0)
+    if j < m and new_hit:
+        shifted.append(new_starts[j], new_ends[j])
+        changes.append(new_starts[j], new_ends[j])
+        kinds.append(2)
+        j += 1
+    for j in range(j, m):
+        added.append(new_starts[j], new_ends[j])
+        changes.append(new_starts[j], new_ends[j])
+        kinds.append(1)
+    return {
+        'unchanged': unchanged,
+        'removed': removed,
+        'added': added,
+        'shifted': shifted,
+        'changes': changes,
+        'kinds': kinds,
+    }
+
+class LineIndex:
+    """Índice compacto de inicios de línea: offset → (línea, columna) en O(log n)"""
+
+    def __init__(self, text):
+        starts = array('q', [0])
+        find = text.find
+        pos = find('\n')
+        while pos != -1:
+            starts.append(pos + 1)
+            pos = find('\n', pos + 1)
+        self.line_starts = starts
+        self.length = len(text)
+
+    def line_count(self):
+        return len(self.line_starts)
+
+    def extend(self, text):
+        """Agrega texto al final del indexado (modo seguimiento)"""
+        base = self.length
+        find = text.find
+        pos = find('\n')
+        while pos != -1:
+            self.line_starts.append(base + pos + 1)
+            pos = find('\n', pos + 1)
+        self.length += len(text)
+
+    def line_of(self, offset):
+        """Número de línea (base 0) que contiene el offset"""
+        return bisect_right(self.line_starts, offset) - 1
+
+    def position(self, offset):
+        """Devuelve (línea, columna), ambas en base 0"""
+        line = self.line_of(offset)
+        return line, offset - self.line_starts[line]
+
+    def line_span(self, line):
+        """Offsets (inicio, fin) de una línea, sin el salto de línea"""
+        start = self.line_starts[line]
+        if line + 1 < len(self.line_starts):
+            return start, self.line_starts[line + 1] - 1
+        return start, self.length
+
+    @classmethod
+    def from_starts(cls, line_starts, length):
+        """Crea el índice a partir de inicios de línea ya calculados"""
+        index = cls.__new__(cls)
+        index.line_starts = line_starts
+        index.length = length
+        return index
+
+class StringTextSource:
+    """Fuente de líneas para el visor sobre texto en memoria (admite agregar al final)"""
+
+    def __init__(self, text='', line_index=None):
+        self.chunks = [text]
+        self.chunk_starts = array('q', [0])
+        self.line_index = line_index if line_index is not None else LineIndex(text)
+
+    @property
+    def length(self):
+        return self.line_index.length
+
+    def line_count(self):
+        return self.line_index.line_count()
+
+    def line_start(self, line):
+        return self.line_index.line_starts[line]
+
+    def line_of(self, offset):
+        return self.line_index.line_of(offset)
+
+    def position(self, offset):
+        return self.line_index.position(offset)
+
+    def line_text(self, line):
+        start, end = self.line_index.line_span(line)
+        return self.slice(start, end)
+
+    def slice(self, start, end):
+        """Texto entre dos offsets, aunque cruce varios bloques agregados"""
+        i = bisect_right(self.chunk_starts, start) - 1
+        base = self.chunk_starts[i]
+        chunk = self.chunks[i]
+        if end <= base + len(chunk):
+            return chunk[start - base:end - base]
+        pieces = []
+        while start < end and i < len(self.chunks):
+            base = self.chunk_starts[i]
+            chunk = self.chunks[i]
+            pieces.append(chunk[max(start - base, 0):end - base])
+            start = base + len(chunk)
+            i += 1
+        return ''.join(pieces)
+
+    def digest(self):
+        """Hash del contenido (el mismo que `TrigramIndex.text_digest` del texto completo)"""
+        return _text_hasher(*self.chunks).hexdigest()
+
+    def append(self, text):
+        """Agrega texto al final (modo seguimiento) sin copiar lo anterior"""
+        if not text:
+            return
+        self.chunks.append(text)
+        self.chunk_starts.append(self.line_index.length)
+        self.line_index.extend(text)
+
+    def close(self):
+        pass
+
+class MmapTextSource:
+    """Fuente de líneas para el visor sobre un archivo mapeado en memoria
+
+    Sólo se guardan los inicios de línea (en bytes y, si el archivo no es
+    ASCII, también en caracteres); cada línea se decodifica al pintarla. Los
+    offsets públicos son de caracteres, igual que en `scan_file`.
+    """
+
+    def __init__(self, path, block_size=4 * STREAM_CHUNK_SIZE, index=None):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self.size = os.fstat(self._file.fileno()).st_size
+            self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b''
+        except (OSError, ValueError):
+            self._file.close()
+            raise
+        # Una sesión guardada trae el índice (bytes, caracteres o None, largo) ya calculado
+        byte_starts, char_starts, length = index if index is not None else self._index_lines(block_size)
+        self.byte_starts = byte_starts
+        self.line_index = LineIndex.from_starts(char_starts if char_starts is not None else byte_starts, length)
+
+    def _index_lines(self, block_size):
+        # Bloques cortados en un salto de línea: '\n' nunca forma parte de un
+        # carácter UTF-8 multibyte, así que cada bloque se decodifica por separado
+        data = self.data
+        size = self.size
+        byte_starts = array('q', [0])
+        char_starts = None
+        char_base = 0
+        pos = 0
+        while pos < size:
+            end = data.rfind(b'\n', pos, min(pos + block_size, size)) + 1
+            if end <= pos:
+                end = data.find(b'\n', pos + block_size) + 1 or size
+            block = data[pos:end]
+            first = len(byte_starts)
+            find = block.find
+            found = find(b'\n')
+            while found != -1:
+                byte_starts.append(pos + found + 1)
+                found = find(b'\n', found + 1)
+            if char_starts is None and block.isascii():
+                char_base += len(block)
+            else:
+                if char_starts is None:
+                    char_starts = array('q', byte_starts[:first])
+                if block.isascii():
+                    shift = char_base - pos
+                    char_starts.extend(start + shift for start in byte_starts[first:])
+                    char_base += len(block)
+                else:
+                    decoded = block.decode('utf-8', 'surrogateescape')
+                    find = decoded.find
+                    found = find('\n')
+                    while found != -1:
+                        char_starts.append(char_base + found + 1)
+                        found = find('\n', found + 1)
+                    char_base += len(decoded)
+            pos = end
+        return byte_starts, char_starts, char_base
+
+    @property
+    def length(self):
+        return self.line_index.length
+
+    def line_count(self):
+        return self.line_index.line_count()
+
+    def line_start(self, line):
+        return self.line_index.line_starts[line]
+
+    def line_of(self, offset):
+        return self.line_index.line_of(offset)
+
+    def position(self, offset):
+        return self.line_index.position(offset)
+
+    def line_text(self, line):
+        start = self.byte_starts[line]
+        end = self.byte_starts[line + 1] - 1 if line + 1 < len(self.byte_starts) else self.size
+        return self.data[start:end].decode('utf-8', 'surrogateescape')
+
+    def slice(self, start, end):
+        """Texto entre dos offsets de caracteres, decodificando sólo las líneas implicadas"""
+        count = self.line_count()
+        line = self.line_of(start)
+        pieces = []
+        while start < end and line < count:
+            line_start = self.line_start(line)
+            text = self.line_text(line)
+            if line + 1 < count:
+                text += '\n'
+            pieces.append(text[start - line_start:end - line_start])
+            line += 1
+            start = line_start + len(text)
+        return ''.join(pieces)
+
+    def digest(self):
+        """Hash de los bytes del archivo (coincide con el del texto si es UTF-8 válido)"""
+        hasher = hashlib.blake2b(digest_size=16)
+        for pos in range(0, self.size, STREAM_CHUNK_SIZE):
+            hasher.update(self.data[pos:pos + STREAM_CHUNK_SIZE])
+        return hasher.hexdigest()
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self._file.close()
+
+class MatchResultCache:
+    """Caché LRU de resultados indexada por (patrón, flags, hash del texto) y acotada en bytes"""
+
+    def __init__(self, max_bytes=128 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(pattern, flags, text, options=()):
+        return pattern, flags, len(text), _text_hasher(text).digest(), tuple(options)
+
+    @staticmethod
+    def estimate_bytes(result):
+        """Aproxima la memoria ocupada por un resultado"""
+        size = result['spans'].memory_bytes() if result.get('spans') is not None else 0
+        for match in result.get('matches') or ():
+            if isinstance(match, tuple):
+                size += 56 + sum(49 + len(group) for group in match)
+            else:
+                size += 49 + len(match)
+        size += 72 * len(result.get('positions') or ())
+        if result.get('line_index') is not None:
+            size += 8 * result['line_index'].line_count()
+        return size
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, result):
+        size = self.estimate_bytes(result)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= previous[1]
+            self._entries[key] = (result, size)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': self.total_bytes,
+            }
+
+class MatchFrequencyAggregator:
+    """Histograma de valores en una pasada: exacto hasta el presupuesto de memoria,
+    luego aproximado con Space-Saving (los conteos pueden sobrestimarse en `error`)"""
+
+    ENTRY_OVERHEAD = 160  # bytes aproximados por entrada (dict + str + int)
+
+    def __init__(self, memory_budget=32 * 1024 * 1024):
+        self.memory_budget = memory_budget
+        self.counts = {}
+        self.errors = {}
+        self.exact = True
+        self.total = 0
+        self.capacity = 0
+        self._bytes = 0
+        self._heap = []
+
+    def add(self, key):
+        self.total += 1
+        counts = self.counts
+        if key in counts:
+            counts[key] += 1
+            if not self.exact:
+                heapq.heappush(self._heap, (counts[key], key))
+                self._compact_heap()
+            return
+        if self.exact:
+            counts[key] = 1
+            self._bytes += self.ENTRY_OVERHEAD + len(key)
+            if self._bytes > self.memory_budget:
+                self._switch_to_sketch()
+            return
+
+        # Space-Saving: el nuevo valor reemplaza al contador mínimo y hereda su conteo
+        minimum, evicted = self._pop_min()
+        del counts[evicted]
+        self.errors.pop(evicted, None)
+        counts[key] = minimum + 1
+        self.errors[key] = minimum
+        heapq.heappush(self._heap, (minimum + 1, key))
+
+    def _switch_to_sketch(self):
+        self.exact = False
+        self.capacity = max(1, len(self.counts) * 3 // 4)
+        kept = heapq.nlargest(self.capacity, self.counts.items(), key=lambda item: item[1])
+        self.counts = dict(kept)
+        self._heap = [(count, key) for key, count in kept]
+        heapq.heapify(self._heap)
+
+    def _pop_min(self):
+        # Las entradas obsoletas del heap se descartan de forma perezosa
+        while True:
+            count, key = heapq.heappop(self._heap)
+            if self.counts.get(key) == count:
+                return count, key
+
+    def _compact_heap(self):
+        if len(self._heap) > 4 * self.capacity + 1024:
+            self._heap = [(count, key) for key, count in self.counts.items()]
+            heapq.heapify(self._heap)
+
+    def top(self, k):
+        """Devuelve los k valores más frecuentes como (valor, conteo, error)"""
+        best = heapq.nlargest(k, self.counts.items(), key=lambda item: item[1])
+        return [(key, count, self.errors.get(key, 0)) for key, count in best]
+
+class LogFollower:
+    """Sigue un archivo que crece y busca sólo en los bytes agregados desde la última lectura
+
+    Se confirman líneas completas. Si el patrón puede cruzar saltos de línea se
+    retienen además las últimas líneas que una coincidencia podría abarcar (ver
+    `_stream_overlap`) y se vuelven a buscar con la próxima lectura; con ancho no
+    acotado sólo se encuentran las coincidencias dentro de lo ya leído.
+    """
+
+    def __init__(self, path, compiled, tail_bytes=64 * 1024, max_read=4 * 1024 * 1024):
+        self.path = path
+        self.compiled = compiled
+        hold = _stream_overlap(compiled)
+        self.hold = hold if hold is not None and hold < sre_constants.MAXREPEAT else 0
+        self.max_read = max_read
+        self.rotations = 0
+        st = os.stat(path)
+        self._reset(st.st_ino)
+        # Como `tail -f`: se empieza por las últimas líneas, no por todo el archivo
+        if st.st_size > tail_bytes:
+            self.offset = st.st_size - tail_bytes
+            self._skip_partial_line = True
+
+    def _reset(self, inode):
+        self.inode = inode
+        self.offset = 0
+        self.char_base = 0
+        self.partial = ''
+        self.context = ''
+        # Igual que la lectura por flujo: los bytes no UTF-8 se conservan y los offsets no se corren
+        self.decoder = codecs.getincrementaldecoder('utf-8')('surrogateescape')
+        self._skip_partial_line = False
+
+    def poll(self):
+        """Lee lo nuevo; devuelve None o un dict con texto, spans absolutos y si hubo rotación"""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+
+        rotated = st.st_ino != self.inode or st.st_size < self.offset
+        if rotated:
+            self.rotations += 1
+            self._reset(st.st_ino)
+        if st.st_size == self.offset and not rotated:
+            return None
+
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read(min(st.st_size - self.offset, self.max_read))
+        self.offset += len(data)
+
+        # Sólo se procesan líneas completas; el resto queda para la próxima lectura
+        text = self.partial + self.decoder.decode(data)
+        if self._skip_partial_line:
+            newline = text.find('\n')
+            if newline == -1:
+                self.partial = ''
+                return None
+            text = text[newline + 1:]
+            self._skip_partial_line = False
+        # Una coincidencia que empiece en las últimas `hold` posiciones podría seguir en lo próximo
+        cut = text.rfind('\n', 0, max(0, len(text) - self.hold)) + 1 if self.hold else text.rfind('\n') + 1
+        found = []
+        if cut:
+            offset = len(self.context)
+            for match in self.compiled.finditer(self.context + text, offset):
+                if match.start() >= offset + cut:
+                    break
+                found.append((match.start() - offset, match.end() - offset))
+                if match.end() >= offset + cut:
+                    # Llega a la línea incompleta: se decide con más datos
+                    break
+            # Lo que cruza el corte se vuelve a buscar desde el inicio de su línea en la próxima lectura
+            while found and (found[-1][1] >= cut or found[-1][0] >= cut):
+                cut = min(cut, text.rfind('\n', 0, found.pop()[0]) + 1)
+        self.partial = text[cut:]
+        complete = text[:cut]
+        if not complete and not rotated:
+            return None
+
+        spans = SpanList()
+        for start, end in found:
+            spans.append(self.char_base + start, self.char_base + end)
+
+        base = self.char_base
+        self.char_base += len(complete)
+        self.context = (self.context + complete)[-STREAM_CONTEXT_CHARS:]
+        return {'base': base, 'text': complete, 'spans': spans, 'rotated': rotated}
+
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+# Letras ASCII que con IGNORECASE Unicode también coinciden con letras no ASCII (İ, ı, K, ſ)
+_UNICODE_FOLDED_ASCII = frozenset(map(ord, 'IiKkSs'))
+
+def _pattern_may_cross_lines(items, flags):
+    """Indica si alguna parte del patrón puede consumir o exigir un salto de línea"""
+    for op, av in items:
+        if op is sre_constants.LITERAL:
+            if av == 10:
+                return True
+        elif op is sre_constants.NOT_LITERAL:
+            if av != 10:
+                return True
+        elif op is sre_constants.ANY:
+            if flags & re.DOTALL:
+                return True
+        elif op is sre_constants.IN:
+            if _char_in_class('\n', av, flags):
+                return True
+        elif op is sre_constants.BRANCH:
+            if any(_pattern_may_cross_lines(alt, flags) for alt in av[1]):
+                return True
+        elif op is sre_constants.SUBPATTERN:
+            if _pattern_may_cross_lines(av[3], (flags | av[1]) & ~av[2]):
+                return True
+        elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT):
+            if _pattern_may_cross_lines(av[2], flags):
+                return True
+        elif op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            if _pattern_may_cross_lines(av[1], flags):
+                return True
+        elif op is sre_constants.AT:
+            # Los finales de texto dependen de dónde termina la cadena completa
+            if av is sre_constants.AT_END_STRING or (av is sre_constants.AT_END and not flags & re.MULTILINE):
+                return True
+        else:
+            # Referencias a grupos, grupos condicionales, atómicos, etc.
+            return True
+    return False
+
+def _lookahead_width(items):
+    """Cota de cuánto pueden mirar las anticipaciones (?=...) más allá de lo consumido"""
+    width = 0
+    for op, av in items:
+        if op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            if av[0] > 0:
+                width += av[1].getwidth()[1]
+            width += _lookahead_width(av[1])
+        elif op is sre_constants.BRANCH:
+            width += sum(_lookahead_width(alt) for alt in av[1])
+        elif op is sre_constants.SUBPATTERN:
+            width += _lookahead_width(av[3])
+        elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT):
+            width += _lookahead_width(av[2])
+    return width
+
+def _stream_overlap(compiled):
+    """Caracteres a retener antes de confirmar un corte al buscar por bloques
+
+    None si el patrón no puede cruzar un salto de línea (basta cortar en líneas);
+    `sre_constants.MAXREPEAT` si la coincidencia no tiene ancho acotado y el flujo
+    debe leerse entero antes de buscar.
+    """
+    items = sre_parse.parse(compiled.pattern, compiled.flags)
+    if not _pattern_may_cross_lines(items, compiled.flags):
+        return None
+    return _match_reach(items)
+
+def _match_reach(items):
+    """Cota de los caracteres que una coincidencia abarca o mira desde su inicio"""
+    width = items.getwidth()[1]
+    if width >= sre_constants.MAXREPEAT:
+        return sre_constants.MAXREPEAT
+    # +1: $, \b y compañía miran el carácter siguiente
+    return min(width + _lookahead_width(items) + 1, sre_constants.MAXREPEAT)
+
+def _trigram_query(items, flags):
+    """Deriva la consulta de trigramas obligatorios: None (sin filtro), str, ('and', [...]) u ('or', [...])"""
+    terms = []
+    run = []
+
+    def flush():
+        literal = ''.join(run)
+        terms.extend(literal[i:i + 3] for i in range(len(literal) - 2))
+        run.clear()
+
+    def folded(av):
+        """Con IGNORECASE sólo se indexan letras cuyo plegado de mayúsculas es puramente ASCII"""
+        if not flags & re.IGNORECASE:
+            return False
+        return av > 127 or not flags & re.ASCII and av in _UNICODE_FOLDED_ASCII
+
+    for op, av in items:
+        if op is sre_constants.LITERAL and not folded(av):
+            run.append(chr(av).translate(_ASCII_LOWER))
+            continue
+        flush()
+        if op is sre_constants.SUBPATTERN:
+            sub = _trigram_query(av[3], (flags | av[1]) & ~av[2])
+        elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT) and av[0] >= 1:
+            sub = _trigram_query(av[2], flags)
+        elif op is sre_constants.BRANCH:
+            alternatives = [_trigram_query(alt, flags) for alt in av[1]]
+            sub = None if any(alt is None for alt in alternatives) else ('or', alternatives)
+        else:
+            sub = None
+        if sub is not None:
+            terms.append(sub)
+    flush()
+
+    if not terms:
+        return None
+    return terms[0] if len(terms) == 1 else ('and', terms)
+
+class TrigramIndex:
+    """Índice de trigramas por bloques de líneas para acotar búsquedas repetidas
+
+    Los trigramas se guardan con las letras ASCII en minúscula, de modo que el
+    mismo índice sirve para consultas con y sin IGNORECASE.
+    """
+
+    def __init__(self, block_starts, length, digest, postings, block_lines=64):
+        self.block_starts = block_starts
+        self.length = length
+        self.digest = digest
+        self.postings = postings
+        self.block_lines = block_lines
+
+    @staticmethod
+    def text_digest(text):
+        return _text_hasher(text).hexdigest()
+
+    @classmethod
+    def build(cls, text, block_lines=64, line_index=None):
+        """Construye el índice recorriendo el texto una sola vez"""
+        line_starts = (line_index or LineIndex(text)).line_starts
+        block_starts = array('q', line_starts[::block_lines])
+        postings = {}
+        for block_id, start in enumerate(block_starts):
+            end = block_starts[block_id + 1] if block_id + 1 < len(block_starts) else len(text)
+            block = text[start:end].translate(_ASCII_LOWER)
+            for trigram in {block[i:i + 3] for i in range(len(block) - 2)}:
+                posting = postings.get(trigram)
+                if posting is None:
+                    posting = postings[trigram] = array('I')
+                posting.append(block_id)
+        return cls(block_starts, len(text), cls.text_digest(text), postings, block_lines)
+
+    def matches_text(self, text):
+        """Verifica que el índice corresponda a este texto"""
+        return len(text) == self.length and self.text_digest(text) == self.digest
+
+    def block_count(self):
+        return len(self.block_starts)
+
+    def candidate_blocks(self, compiled):
+        """Bloques que pueden contener coincidencias, o None si el patrón no es indexable"""
+        items = sre_parse.parse(compiled.pattern, compiled.flags)
+        if _pattern_may_cross_lines(items, compiled.flags):
+            return None
+        query = _trigram_query(items, compiled.flags)
+        if query is None:
+            return None
+        return sorted(self._evaluate(query))
+
+    def candidate_ranges(self, compiled):
+        """Rangos (inicio, fin) de texto a recorrer, uniendo bloques consecutivos"""
+        blocks = self.candidate_blocks(compiled)
+        if blocks is None:
+            return None
+        ranges = []
+        for block_id in blocks:
+            start = self.block_starts[block_id]
+            end = self.block_starts[block_id + 1] if block_id + 1 < len(self.block_starts) else self.length
+            if ranges and ranges[-1][1] == start:
+                ranges[-1] = (ranges[-1][0], end)
+            else:
+                ranges.append((start, end))
+        return ranges
+
+    def _evaluate(self, query):
+        if isinstance(query, str):
+            return set(self.postings.get(query, ()))
+        kind, terms = query
+        results = [self._evaluate(term) for term in terms]
+        if kind == 'or':
+            return set().union(*results)
+        results.sort(key=len)
+        return results[0].intersection(*results[1:])
+
+class MatchExporter:
+    """Exporta coincidencias leyendo directamente de los spans y de la fuente del texto
+
+    Los registros se generan uno a uno, así que exportar millones de
+    coincidencias usa memoria constante. Los grupos se recalculan con la regex
+    sobre las líneas que contienen cada coincidencia. Sin fuente (un archivo
+    comprimido, que no se puede mapear) se relee `source_path` por bloques y
+    se vuelve a buscar para rearmar los registros de los spans dados.
+    """
+    FORMATS = ('csv', 'jsonl', 'spans')
+    SPANS_MAGIC = b'RXSPANS1\n'
+    CONTEXT_CHARS = 40
+    CHUNK_SIZE = STREAM_CHUNK_SIZE
+
+    def __init__(self, compiled, source, spans, context=CONTEXT_CHARS, source_path=None):
+        if source is None and source_path is None:
+            raise ValueError("Se necesita la fuente del texto o la ruta del archivo")
+        self.compiled = compiled
+        self.source = source
+        self.spans = spans
+        self.context = context
+        self.source_path = source_path
+
+    def records(self):
+        """Genera un diccionario por coincidencia (línea y columna en base 1)"""
+        if self.source is None:
+            yield from self._stream_records()
+            return
+        source = self.source
+        compiled = self.compiled
+        context = self.context
+        empty_groups = (None,) * compiled.groups
+        cached_line = -1
+        cached_text = ''
+        for i, (start, end) in enumerate(self.spans):
+            line, column = source.position(start)
+            line_start = start - column
+            if line != cached_line:
+                cached_line, cached_text = line, source.line_text(line)
+            if end - line_start <= len(cached_text):
+                window = cached_text
+            else:
+                # La coincidencia cruza líneas: se toma desde su línea hasta la última
+                last = source.line_of(end - 1)
+                window = source.slice(line_start, source.line_start(last) + len(source.line_text(last)) + 1)
+            local_start, local_end = start - line_start, end - line_start
+            match = compiled.match(window, local_start)
+            groups = match.groups() if match and match.end() == local_end else empty_groups
+            yield {
+                'index': i + 1,
+                'start': start,
+                'end': end,
+                'line': line + 1,
+                'column': column + 1,
+                'match': window[local_start:local_end],
+                'groups': groups,
+                'before': window[max(0, local_start - context):local_start],
+                'after': window[local_end:local_end + context],
+            }
+
+    def _stream_records(self):
+        """Registros releyendo el archivo: se vuelve a buscar y se toman las coincidencias de los spans
+
+        El contexto puede caer en el segmento anterior o en el siguiente: se
+        guarda la cola de la línea en curso y los registros cuyo `after` llega
+        al final del segmento esperan (en orden) al próximo.
+        """
+        spans = iter(self.spans)
+        wanted = next(spans, None)
+        context = self.context
+        waiting = deque()  # [registro, caracteres que faltan en `after`, incluye el salto]
+        line_tail = ''
+        index = 0
+        line = 0
+        line_start = 0
+        for base, segment, found in iter_stream_matches(self.compiled, iter_file_chunks(self.source_path,
+                                                                                         self.CHUNK_SIZE)):
+            for pending in waiting:
+                if pending[1]:
+                    record, need, newline = pending
+                    stop = segment.find('\n', 0, need)
+                    if stop >= 0:
+                        record['after'] += segment[:stop + newline]
+                        pending[1] = 0
+                    else:
+                        record['after'] += segment[:need]
+                        pending[1] = max(0, need - len(segment))
+            while waiting and not waiting[0][1]:
+                yield waiting.popleft()[0]
+            if wanted is None:
+                if not waiting:
+                    return
+                continue
+            last = 0
+            for start, end, match in found:
+                if (base + start, base + end) != wanted:
+                    continue
+                newlines = segment.count('\n', last, start)
+                if newlines:
+                    line += newlines
+                    line_start = base + segment.rfind('\n', last, start) + 1
+                last = start
+                # Mismo contexto que con fuente: la línea, o hasta el salto de la última si cruza varias
+                window_start = segment.rfind('\n', 0, start) + 1
+                if window_start:
+                    before = segment[max(window_start, start - context):start]
+                else:
+                    before = line_tail + segment[:start]
+                    before = before[max(0, len(before) - context):]
+                window_end = segment.find('\n', start)
+                newline = window_end >= 0 and end > window_end
+                if newline:
+                    window_end = segment.find('\n', end - 1)
+                    window_end = window_end if window_end < 0 else window_end + 1
+                missing = 0
+                if window_end < 0:
+                    window_end = len(segment)
+                    missing = max(0, end + context - len(segment))
+                index += 1
+                waiting.append([{
+                    'index': index,
+                    'start': base + start,
+                    'end': base + end,
+                    'line': line + 1,
+                    'column': base + start - line_start + 1,
+                    'match': match.group(),
+                    'groups': match.groups(),
+                    'before': before,
+                    'after': segment[end:min(window_end, end + context)],
+                }, missing, newline])
+                wanted = next(spans, None)
+                if wanted is None:
+                    break
+            while waiting and not waiting[0][1]:
+                yield waiting.popleft()[0]
+            newlines = segment.count('\n', last)
+            if newlines:
+                line += newlines
+                line_start = base + segment.rfind('\n', last) + 1
+            cut = segment.rfind('\n') + 1
+            line_tail = (line_tail if not cut else '') + segment[cut:]
+            line_tail = line_tail[max(0, len(line_tail) - context):]
+        # Al final del archivo el contexto que falte no existe
+        for pending in waiting:
+            yield pending[0]
+
+    def _source_identity(self):
+        """Largo y hash del texto de la fuente (releyendo el archivo si no hay fuente)"""
+        if self.source is not None:
+            return self.source.length, self.source.digest()
+        length = 0
+        hasher = hashlib.blake2b(digest_size=16)
+        for chunk in iter_file_chunks(self.source_path, self.CHUNK_SIZE):
+            length += len(chunk)
+            hasher.update(chunk.encode('utf-8', 'surrogatepass'))
+        return length, hasher.hexdigest()
+
+    def write_csv(self, path):
+        """Escribe un CSV con una columna por grupo; devuelve la cantidad de filas"""
+        count = 0
+        with open(path, 'w', encoding='utf-8', errors='surrogateescape', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['index', 'start', 'end', 'line', 'column', 'match'] +
+                            [f'group_{n}' for n in range(1, self.compiled.groups + 1)] +
+                            ['before', 'after'])
+            for record in self.records():
+                writer.writerow([record['index'], record['start'], record['end'], record['line'],
+                                 record['column'], record['match'], *record['groups'],
+                                 record['before'], record['after']])
+                count += 1
+        return count
+
+    def write_jsonl(self, path):
+        """Escribe un objeto JSON por línea; devuelve la cantidad de registros"""
+        names = {index: name for name, index in self.compiled.groupindex.items()}
+        count = 0
+        with open(path, 'w', encoding='utf-8', errors='surrogateescape') as f:
+            for record in self.records():
+                if names:
+                    record['named'] = {names[n]: value for n, value in enumerate(record['groups'], 1)
+                                       if n in names}
+                f.write(json.dumps(record, ensure_ascii=False))
+                f.write('\n')
+                count += 1
+        return count
+
+    def write_spans(self, path):
+        """Escribe el archivo binario de spans; devuelve la cantidad de spans
+
+        Formato: `SPANS_MAGIC`, tamaño del encabezado JSON (uint32), encabezado
+        (patrón, flags y hash de la fuente) rellenado a múltiplo de 8 y luego
+        los pares (inicio, fin) como int64 little-endian.
+        """
+        count = len(self.spans)
+        source_length, source_digest = self._source_identity()
+        header = json.dumps({
+            'pattern': self.compiled.pattern,
+            'flags': self.compiled.flags,
+            'count': count,
+            'source_length': source_length,
+            'source_digest': source_digest,
+        }, ensure_ascii=False).encode('utf-8')
+        offset = len(self.SPANS_MAGIC) + 4 + len(header)
+        header += b' ' * (-offset % 8)
+        with open(path, 'wb') as f:
+            f.write(self.SPANS_MAGIC)
+            f.write(struct.pack('<I', len(header)))
+            f.write(header)
+            for _pos, starts, ends in self.spans.pages():
+                pairs = array('q', bytes(16 * len(starts)))
+                pairs[0::2] = starts
+                pairs[1::2] = ends
+                if sys.byteorder == 'big':
+                    pairs.byteswap()
+                pairs.tofile(f)
+        return count
+
+    def write(self, path, fmt):
+        if fmt not in self.FORMATS:
+            raise ValueError(f"Formato de exportación desconocido: {fmt}")
+        return getattr(self, f'write_{fmt}')(path)
+
+    @classmethod
+    def read_spans(cls, path):
+        """Carga un archivo de spans: devuelve (encabezado, SpanList)"""
+        with open(path, 'rb') as f:
+            if f.read(len(cls.SPANS_MAGIC)) != cls.SPANS_MAGIC:
+                raise ValueError("El archivo no es un archivo de spans")
+            (header_size,) = struct.unpack('<I', f.read(4))
+            header = json.loads(f.read(header_size))
+            spans = SpanList()
+            for pos in range(0, header['count'], SpanList.PAGE_SIZE):
+                pairs = array('q')
+                pairs.fromfile(f, 2 * min(SpanList.PAGE_SIZE, header['count'] - pos))
+                if sys.byteorder == 'big':
+                    pairs.byteswap()
+                spans.extend(pairs[0::2], pairs[1::2])
+        return header, spans
+
+class SessionSnapshot:
+    """Sesión guardada: fuente del texto, patrones, spans e índice de líneas
+
+    Formato: `MAGIC`, tamaño del encabezado JSON (uint32), encabezado
+    rellenado a múltiplo de 8 y luego las secciones (int64 little-endian o
+    texto UTF-8), cada una alineada a 8 bytes. El encabezado guarda offset y
+    tamaño de cada sección desde el inicio de los datos, así que al abrir la
+    sesión los spans y el índice se mapean sin copiarlos ni volver a buscar.
+    """
+    MAGIC = b'RXSESS1\n'
+    VERSION = 1
+
+    def __init__(self, header, source, spans, stale=False):
+        self.header = header
+        self.source = source
+        self.spans = spans
+        self.stale = stale
+
+    @staticmethod
+    def _write_ints(f, values):
+        for pos in range(0, len(values), SpanList.PAGE_SIZE):
+            page = array('q', values[pos:pos + SpanList.PAGE_SIZE])
+            if sys.byteorder == 'big':
+                page.byteswap()
+            page.tofile(f)
+
+    @classmethod
+    def save(cls, path, source, spans, state):
+        """Guarda la sesión; `state` trae patrones, flags, modo y límite. Devuelve los bytes escritos
+
+        Un texto en memoria se guarda completo; de un archivo mapeado sólo se
+        guardan la ruta, su tamaño y fecha, y el índice de líneas.
+        """
+        sections = []
+        if isinstance(source, MmapTextSource):
+            stat = os.stat(source.path)
+            origin = {'kind': 'file', 'path': os.path.abspath(source.path),
+                      'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+            if source.line_index.line_starts is not source.byte_starts:
+                sections.append(('byte_starts', source.byte_starts))
+        else:
+            origin = {'kind': 'text'}
+            sections.append(('text', ''.join(source.chunks).encode('utf-8', 'surrogatepass')))
+        sections.append(('line_starts', source.line_index.line_starts))
+        sections.append(('starts', spans.starts))
+        sections.append(('ends', spans.ends))
+        
+        layout = {}
+        offset = 0
+        for name, values in sections:
+            size = len(values) if isinstance(values, bytes) else 8 * len(values)
+            layout[name] = [offset, size]
+            offset += size + (-size % 8)
+        header = json.dumps(dict(state, version=cls.VERSION, source=origin,
+                                 source_length=source.length, source_digest=source.digest(),
+                                 count=len(spans), sections=layout), ensure_ascii=False).encode('utf-8')
+        header += b' ' * (-(len(cls.MAGIC) + 4 + len(header)) % 8)
+        
+        with open(path, 'wb') as f:
+            f.write(cls.MAGIC)
+            f.write(struct.pack('<I', len(header)))
+            f.write(header)
+            for name, values in sections:
+                if isinstance(values, bytes):
+                    f.write(values)
+                else:
+                    cls._write_ints(f, values)
+                f.write(bytes(-layout[name][1] % 8))
+            return f.tell()
+
+    @classmethod
+    def load(cls, path, trust_mtime=False):
+        """Abre una sesión mapeando sus secciones
+
+        Si el hash de la fuente ya no coincide (el archivo cambió o la sesión
+        está dañada) la sesión queda marcada como `stale`, sin spans, para que
+        se vuelva a buscar. El hash de un archivo se verifica siempre; con
+        `trust_mtime` un archivo con el tamaño y la fecha guardados se da por
+        bueno sin leerlo, lo que no detecta una reescritura que conserve la
+        fecha (`cp -p`, `rsync -t`, `touch -r`).
+        """
+        with open(path, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if data[:len(cls.MAGIC)] != cls.MAGIC:
+            raise ValueError("El archivo no es una sesión")
+        (header_size,) = struct.unpack_from('<I', data, len(cls.MAGIC))
+        base = len(cls.MAGIC) + 4 + header_size
+        header = json.loads(data[len(cls.MAGIC) + 4:base])
+        if header.get('version') != cls.VERSION:
+            raise ValueError(f"Versión de sesión no soportada: {header.get('version')}")
+        view = memoryview(data)
+        
+        def section(name):
+            if name not in header['sections']:
+                return None
+            offset, size = header['sections'][name]
+            return view[base + offset:base + offset + size]
+        
+        def ints(name):
+            raw = section(name)
+            if raw is None:
+                return None
+            if sys.byteorder == 'big':
+                values = array('q')
+                values.frombytes(raw)
+                values.byteswap()
+                return values
+            return MappedArray(raw.cast('q'))
+        
+        length = header['source_length']
+        origin = header['source']
+        if origin['kind'] == 'text':
+            text = bytes(section('text')).decode('utf-8', 'surrogatepass')
+            source = StringTextSource(text, LineIndex.from_starts(ints('line_starts'), length))
+            if len(text) != length or source.digest() != header['source_digest']:
+                return cls(header, StringTextSource(text), None, stale=True)
+        else:
+            stat = os.stat(origin['path'])
+            if stat.st_size != origin['size']:
+                return cls(header, None, None, stale=True)
+            line_starts = ints('line_starts')
+            byte_starts = ints('byte_starts')
+            index = (line_starts, None, length) if byte_starts is None else (byte_starts, line_starts, length)
+            source = MmapTextSource(origin['path'], index=index)
+            unchanged = trust_mtime and stat.st_mtime_ns == origin['mtime_ns']
+            if not unchanged and source.digest() != header['source_digest']:
+                source.close()
+                return cls(header, None, None, stale=True)
+        return cls(header, source, SpanList(ints('starts'), ints('ends')))
+
+_process_pool = None
+
+def get_process_pool():
+    """Devuelve el pool de procesos persistente compartido por los workers"""
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=max(1, (os.cpu_count() or 2) - 1))
+    return _process_pool
+
+class SharedText:
+    """Texto publicado una sola vez en memoria compartida para las tareas del pool
+
+    Las tareas reciben sólo `ref` (nombre del segmento y tamaño en bytes), así
+    que el texto no se serializa con pickle ni viaja por la tubería en cada
+    envío. Se codifica por bloques: cada `encode` retiene el GIL poco tiempo y
+    el hilo de la interfaz sigue atendiendo. El segmento se libera al salir del
+    bloque `with`.
+    """
+
+    def __init__(self, text, chunk_chars=STREAM_CHUNK_SIZE):
+        pieces = [text[pos:pos + chunk_chars].encode('utf-8', 'surrogatepass')
+                  for pos in range(0, len(text), chunk_chars)]
+        self.size = sum(map(len, pieces))
+        self.shm = shared_memory.SharedMemory(create=True, size=max(1, self.size))
+        pos = 0
+        for piece in pieces:
+            self.shm.buf[pos:pos + len(piece)] = piece
+            pos += len(piece)
+
+    @property
+    def ref(self):
+        return self.shm.name, self.size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shm.close()
+        self.shm.unlink()
+
+# Desde Python 3.13 un segmento puede crearse sin registrarlo en el rastreador de recursos
+_SHM_UNTRACKED = {'track': False} if sys.version_info >= (3, 13) else {}
+
+def _create_handoff_memory(size):
+    """Crea un segmento que liberará otro proceso (el rastreador de éste no debe borrarlo al salir)"""
+    shm = shared_memory.SharedMemory(create=True, size=size, **_SHM_UNTRACKED)
+    if not _SHM_UNTRACKED and os.name == 'posix':
+        # En POSIX el rastreador registra el nombre con la barra inicial que `name` omite
+        resource_tracker.unregister('/' + shm.name, 'shared_memory')
+    return shm
+
+def _read_shared_text(ref):
+    """Se ejecuta en el pool: decodifica el texto publicado por `SharedText`"""
+    name, size = ref
+    # El registro en el rastreador de recursos (compartido con el padre) lo quita el padre al liberar
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        with shm.buf[:size] as view:
+            return str(view, 'utf-8', 'surrogatepass')
+    finally:
+        shm.close()
+
+def _scan_to_shared_memory(pattern, flags, text, mode='full', limit=None, line_index=False, memory_budget=None):
+    """Se ejecuta en el pool: deja los spans en memoria compartida (inicios y luego finales)
+
+    `text` es el texto o la referencia `SharedText.ref` a él. Con `line_index`
+    también se calculan aquí los inicios de línea y van a continuación de los
+    spans. `memory_budget` es el presupuesto de spans del proceso padre (el
+    hijo no comparte el valor de la clase). Devuelve (segmento, spans, coincidencias, completo, líneas); el
+    segmento es None si no hay nada que copiar y `spans` es None en el modo 'count'.
+    """
+    if not isinstance(text, str):
+        text = _read_shared_text(text)
+    scan, error = RegexValidator().scan(pattern, text, mode, limit, flags, memory_budget=memory_budget)
+    if error:
+        raise ValueError(error)
+    spans = scan['spans']
+    line_starts = LineIndex(text).line_starts if line_index else array('q')
+    span_count = None if spans is None else len(spans)
+    if spans is None and not line_starts:
+        return None, None, scan['match_count'], scan['complete'], 0
+
+    count = span_count or 0
+    shm = _create_handoff_memory(max(16, 16 * count + 8 * len(line_starts)))
+    try:
+        if spans is not None:
+            for pos, starts, ends in spans.pages():
+                shm.buf[8 * pos:8 * (pos + len(starts))] = memoryview(starts).cast('B')
+                shm.buf[8 * (count + pos):8 * (count + pos + len(ends))] = memoryview(ends).cast('B')
+        shm.buf[16 * count:16 * count + 8 * len(line_starts)] = memoryview(line_starts).cast('B')
+    finally:
+        shm.close()
+    # El proceso padre es quien libera el segmento al leerlo
+    return shm.name, span_count, scan['match_count'], scan['complete'], len(line_starts)
+
+def read_shared_result(name, span_count, line_count=0, memory_budget=None):
+    """Copia los spans y los inicios de línea desde memoria compartida y libera el segmento
+
+    Los spans se copian por páginas a una `SpanList` con `memory_budget`, que
+    se vuelca a disco al pasarlo. Devuelve (SpanList o None, arreglo de
+    inicios de línea o None).
+    """
+    if name is None:
+        return None, None
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        count = span_count or 0
+        spans = SpanList(memory_budget=memory_budget)
+        for pos in range(0, count, SpanList.PAGE_SIZE):
+            stop = min(pos + SpanList.PAGE_SIZE, count)
+            starts = array('q')
+            ends = array('q')
+            starts.frombytes(shm.buf[8 * pos:8 * stop])
+            ends.frombytes(shm.buf[8 * (count + pos):8 * (count + stop)])
+            spans.extend(starts, ends)
+        line_starts = array('q')
+        line_starts.frombytes(shm.buf[16 * count:16 * count + 8 * line_count])
+    finally:
+        shm.close()
+        shm.unlink()
+    return (None if span_count is None else spans), (line_starts if line_count else None)
+
+class _SuiteTimeout(Exception):
+    pass
+
+def _raise_suite_timeout(signum, frame):
+    raise _SuiteTimeout()
+
+def _run_suite_case(case, timeout):
+    """Se ejecuta en el pool: evalúa un patrón contra sus muestras positivas y negativas"""
+    started = time.perf_counter()
+    result = {
+        'name': case['name'],
+        'pattern': case['pattern'],
+        'status': 'ok',
+        'failures': [],
+        'samples': 0,
+        'error': None,
+    }
+    try:
+        compiled = RegexValidator().compile(case['pattern'], case['flags'])
+    except (re.error, ValueError, TypeError) as e:  # ValueError: banderas incompatibles (LOCALE con str)
+        result.update(status='error', error=str(e), elapsed=time.perf_counter() - started)
+        return result
+    
+    test = compiled.fullmatch if case['mode'] == 'fullmatch' else compiled.search
+    samples = [(sample, True) for sample in case['positive']] + [(sample, False) for sample in case['negative']]
+    # El motor de `re` atiende señales durante la búsqueda: en POSIX una alarma
+    # corta incluso un retroceso catastrófico; si no, se revisa entre muestras
+    alarm = hasattr(signal, 'setitimer') and threading.current_thread() is threading.main_thread()
+    if alarm:
+        previous = signal.signal(signal.SIGALRM, _raise_suite_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        for sample, expected in samples:
+            matched = test(sample) is not None
+            result['samples'] += 1
+            if matched != expected:
+                result['failures'].append({'sample': sample, 'expected': expected, 'matched': matched})
+            if time.perf_counter() - started > timeout:
+                raise _SuiteTimeout()
+    except _SuiteTimeout:
+        result['status'] = 'timeout'
+    except (re.error, ValueError, TypeError) as e:
+        # Una muestra que no es texto: el caso queda en error y la suite sigue
+        result.update(status='error', error=str(e))
+    finally:
+        if alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+    if result['status'] == 'ok' and result['failures']:
+        result['status'] = 'fail'
+    result['elapsed'] = time.perf_counter() - started
+    return result
+
+def _run_suite_chunk(task):
+    first, cases, timeout = task
+    return [(first + i, _run_suite_case(case, timeout)) for i, case in enumerate(cases)]
+
+class PatternSuite:
+    """Biblioteca de patrones con muestras positivas y negativas para pruebas de regresión
+
+    El archivo es JSON: una lista (o un objeto con clave `patterns`) de casos
+    con `pattern`, `positive` y `negative`, y opcionalmente `name`, `flags`
+    (nombres de `re`) y `mode` ('search' o 'fullmatch').
+    """
+    MODES = ('search', 'fullmatch')
+
+    def __init__(self, cases):
+        self.cases = cases
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data.get('patterns', [])
+        if not isinstance(data, list):
+            raise ValueError("La biblioteca debe ser una lista de casos")
+        cases = []
+        for number, entry in enumerate(data, 1):
+            if not isinstance(entry, dict):
+                raise ValueError(f"Caso {number}: se esperaba un objeto, no {type(entry).__name__}")
+            if not isinstance(entry.get('pattern'), str):
+                raise ValueError(f"Caso {number}: falta el patrón o no es texto")
+            for key in ('positive', 'negative'):
+                samples = entry.get(key, [])
+                if not isinstance(samples, list) or not all(isinstance(sample, str) for sample in samples):
+                    raise ValueError(f"Caso {number}: '{key}' debe ser una lista de textos")
+            mode = entry.get('mode', 'search')
+            if mode not in cls.MODES:
+                raise ValueError(f"Caso {number}: modo desconocido {mode!r}")
+            try:
+                flags = parse_flags(entry.get('flags'))
+            except TypeError:
+                raise ValueError(f"Caso {number}: 'flags' debe ser un entero o una lista de nombres") from None
+            cases.append({
+                'name': str(entry.get('name') or f"#{number}"),
+                'pattern': entry['pattern'],
+                'flags': flags,
+                'mode': mode,
+                'positive': list(entry.get('positive', ())),
+                'negative': list(entry.get('negative', ())),
+            })
+        return cls(cases)
+
+    def warm_up(self, validator, progress=None, pause=0.001, cancelled=None, flags=None):
+        """Precompila y analiza cada patrón llenando las cachés compartidas del proceso
+
+        Valida y compila (caché de `compile`), busca riesgos de ReDoS, prepara
+        la vía vectorizada y construye el DFA si el patrón es regular. Las
+        cachés se llenan con las banderas de cada caso o, si se indica `flags`,
+        con esas (las que usará quien analice después). Entre patrones cede el
+        GIL `pause` segundos para no frenar a la interfaz. Si el análisis de un
+        patrón falla, el error queda en su entrada y se sigue.
+        """
+        entries = []
+        for number, case in enumerate(self.cases, 1):
+            if cancelled is not None and cancelled():
+                break
+            pattern = case['pattern']
+            case_flags = case['flags'] if flags is None else flags
+            entry = {'name': case['name'], 'pattern': pattern, 'valid': True, 'error': None,
+                     'redos': [], 'dfa_states': None}
+            try:
+                is_valid, error = validator.verify_regex(pattern, case_flags)
+                if not is_valid:
+                    entry.update(valid=False, error=error)
+                else:
+                    entry['redos'] = validator.check_redos(pattern, case_flags)[0] or []
+                    # Misma clave que usa `scan`: el patrón y las banderas ya compiladas
+                    compiled = validator.compile(pattern, case_flags)
+                    _class_run_shape(compiled.pattern, compiled.flags)
+                    dfa, _error = validator.build_dfa(pattern, case_flags)
+                    if dfa is not None:
+                        entry['dfa_states'] = dfa.state_count
+            except Exception as e:
+                # Un patrón que rompe el análisis no debe frenar al resto de la biblioteca
+                entry['error'] = f"Error inesperado: {e}"
+            entries.append(entry)
+            if progress is not None:
+                progress(number, len(self.cases))
+            time.sleep(pause)
+        return {
+            'patterns': entries,
+            'total': len(self.cases),
+            'warmed': len(entries),
+            'invalid': [entry for entry in entries if not entry['valid']],
+            'failed': [entry for entry in entries if entry['valid'] and entry['error']],
+            'risky': [entry for entry in entries if entry['redos']],
+        }
+    
+    def run(self, processes=None, timeout=1.0, slowest=10, progress=None):
+        """Evalúa todos los casos en un pool de procesos y devuelve el reporte
+
+        `timeout` es el presupuesto por patrón. Donde no hay alarmas (Windows)
+        una búsqueda colgada no se puede cortar, así que además hay un plazo
+        global proporcional; al vencer se terminan los procesos y los casos
+        pendientes se marcan 'timeout'.
+        """
+        started = time.perf_counter()
+        processes = processes or max(1, (os.cpu_count() or 2) - 1)
+        deadline = started + timeout * (len(self.cases) / processes + 1) + 1
+        results = {}
+        # Lotes de casos para amortizar el envío entre procesos
+        size = max(1, len(self.cases) // (processes * 8))
+        chunks = [(first, self.cases[first:first + size], timeout) for first in range(0, len(self.cases), size)]
+        pool = multiprocessing.Pool(processes)
+        try:
+            iterator = pool.imap_unordered(_run_suite_chunk, chunks)
+            for _ in chunks:
+                try:
+                    done = iterator.next(timeout=max(0.0, deadline - time.perf_counter()))
+                except multiprocessing.TimeoutError:
+                    break
+                results.update(done)
+                if progress is not None:
+                    progress(len(results), len(self.cases))
+        finally:
+            pool.terminate()
+            pool.join()
+        
+        for i, case in enumerate(self.cases):
+            if i not in results:
+                results[i] = {'name': case['name'], 'pattern': case['pattern'], 'status': 'timeout',
+                              'failures': [], 'samples': 0, 'error': None, 'elapsed': None}
+        ordered = [results[i] for i in range(len(self.cases))]
+        timed = [result for result in ordered if result['elapsed'] is not None]
+        return {
+            'cases': ordered,
+            'total': len(ordered),
+            'passed': sum(result['status'] == 'ok' for result in ordered),
+            'failed': [result for result in ordered if result['status'] == 'fail'],
+            'errors': [result for result in ordered if result['status'] == 'error'],
+            'timeouts': [result for result in ordered if result['status'] == 'timeout'],
+            'slowest': heapq.nlargest(slowest, timed, key=lambda result: result['elapsed']),
+            'samples': sum(result['samples'] for result in ordered),
+            'elapsed': time.perf_counter() - started,
+        }
+
+_COMPRESSION_MAGIC = [
+    (b'\x1f\x8b', gzip.open),
+    (b'BZh', bz2.open),
+    (b'\xfd7zXZ\x00', lzma.open),
+]
+
+def detect_compression(path):
+    """Devuelve la función `open` del formato comprimido del archivo, o None si es texto plano"""
+    with open(path, 'rb') as f:
+        head = f.read(6)
+    for magic, opener in _COMPRESSION_MAGIC:
+        if head.startswith(magic):
+            return opener
+    return None
+
+def open_text_stream(path):
+    """Abre un archivo de texto, descomprimiendo gzip/bz2/xz al vuelo si hace falta"""
+    opener = detect_compression(path) or open
+    return opener(path, 'rt', encoding='utf-8', errors='surrogateescape', newline='')
+
+def _read_chunks_into(path, chunk_size, chunks, stop):
+    # Productor: descomprime y decodifica mientras el consumidor busca
+    try:
+        with open_text_stream(path) as f:
+            while not stop.is_set():
+                chunk = f.read(chunk_size)
+                chunks.put(chunk)
+                if not chunk:
+                    return
+    except Exception as e:
+        chunks.put(e)
+
+def iter_file_chunks(path, chunk_size=STREAM_CHUNK_SIZE, prefetch=4):
+    """Lee un archivo de texto por bloques sin cargarlo completo en memoria
+
+    Los archivos comprimidos se descomprimen en un hilo aparte (zlib, bz2 y
+    lzma liberan el GIL) con a lo sumo `prefetch` bloques en espera, de modo
+    que la descompresión se solapa con la búsqueda y la memoria queda acotada.
+    """
+    if detect_compression(path) is None:
+        with open_text_stream(path) as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        return
+
+    chunks = queue.Queue(maxsize=prefetch)
+    stop = threading.Event()
+    reader = threading.Thread(target=_read_chunks_into, args=(path, chunk_size, chunks, stop),
+                              name="regex-decompress", daemon=True)
+    reader.start()
+    try:
+        while True:
+            chunk = chunks.get()
+            if isinstance(chunk, Exception):
+                raise chunk
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        stop.set()
+        # Liberar al productor si quedó bloqueado con la cola llena
+        while reader.is_alive():
+            try:
+                chunks.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+def iter_stream_matches(compiled, chunks, max_line=16 * STREAM_CHUNK_SIZE):
+    """Busca sobre un flujo de bloques de texto con memoria acotada
+
+    Genera (base, segmento, coincidencias): `segmento` es el texto ya confirmado
+    a partir del offset global `base` y cada coincidencia es (inicio, fin, match)
+    relativa al segmento. Los cortes se hacen en saltos de línea y una
+    coincidencia que llega al final de lo leído se pospone hasta tener más
+    datos. Si el patrón puede cruzar saltos de línea, además se retienen los
+    últimos caracteres que una coincidencia podría abarcar (ver
+    `_stream_overlap`); si su ancho no está acotado no se corta nada hasta el
+    final del flujo. Una línea más larga que `max_line` se corta a mitad
+    reteniendo de igual modo lo que una coincidencia puede abarcar (o entera si
+    el ancho no está acotado). Así el resultado equivale a `finditer` sobre el
+    texto entero.
+    """
+    hold = _stream_overlap(compiled)
+    line_hold = hold if hold is not None else _match_reach(sre_parse.parse(compiled.pattern, compiled.flags))
+    carry = ''
+    context = ''
+    base = 0
+    chunks = iter(chunks)
+    eof = False
+    while not eof:
+        chunk = next(chunks, None)
+        keep = hold
+        if chunk is None:
+            eof = True
+            cut = len(carry)
+        else:
+            carry += chunk
+            cut = carry.rfind('\n') + 1
+            if cut == 0:
+                if len(carry) < max_line:
+                    continue
+                # Corte a mitad de línea: una coincidencia podría cruzarlo aunque no cruce saltos de línea
+                cut = len(carry)
+                keep = line_hold
+
+        # El contexto previo permite que \b y las aserciones vean el texto anterior
+        buffer = context + carry
+        offset = len(context)
+        limit = offset + cut
+        if keep is not None and not eof:
+            # Una coincidencia que empiece en los últimos `keep` caracteres podría seguir en el próximo bloque
+            limit = max(offset, min(limit, len(buffer) - keep))
+            if limit == offset:
+                continue
+        found = []
+        for match in compiled.finditer(buffer, offset):
+            if not eof:
+                if match.start() >= limit:
+                    break
+                if match.end() >= len(buffer) - 1:
+                    # Llega al final de lo leído ($, cuantificadores): se decide con más datos
+                    limit = match.start()
+                    break
+            found.append((match.start() - offset, match.end() - offset, match))
+            limit = max(limit, match.end())
+
+        committed = limit - offset
+        segment = carry[:committed]
+        if segment or found:
+            yield base, segment, found
+        base += committed
+        context = (context + segment)[-STREAM_CONTEXT_CHARS:]
+        carry = carry[committed:]
+
+def substitute_stream(compiled, template, chunks, write, max_line=16 * STREAM_CHUNK_SIZE):
+    """Aplica `template` (semántica de re.sub) a un flujo y escribe la salida por bloques"""
+    count = 0
+    for _base, segment, found in iter_stream_matches(compiled, chunks, max_line):
+        pieces = []
+        last = 0
+        for start, end, match in found:
+            pieces.append(segment[last:start])
+            pieces.append(match.expand(template))
+            last = end
+        pieces.append(segment[last:])
+        write(''.join(pieces))
+        count += len(found)
+    return count
+
+_CATEGORY_PATTERNS = {
+    sre_constants.CATEGORY_DIGIT: '\\d',
+    sre_constants.CATEGORY_NOT_DIGIT: '\\D',
+    sre_constants.CATEGORY_SPACE: '\\s',
+    sre_constants.CATEGORY_NOT_SPACE: '\\S',
+    sre_constants.CATEGORY_WORD: '\\w',
+    sre_constants.CATEGORY_NOT_WORD: '\\W',
+}
+
+_category_cache = {}
+
+def _category_regex(category, flags):
+    """Devuelve la regex compilada que implementa una categoría (\\d, \\w, ...)"""
+    key = (category, flags & (re.ASCII | re.LOCALE))
+    compiled = _category_cache.get(key)
+    if compiled is None:
+        compiled = re.compile(_CATEGORY_PATTERNS[category], key[1])
+        _category_cache[key] = compiled
+    return compiled
+
+def _char_in_class(ch, items, flags):
+    """Evalúa si un carácter pertenece a una clase [...] ya analizada"""
+    negate = False
+    candidates = (ch, ch.lower(), ch.upper()) if flags & re.IGNORECASE else (ch,)
+    found = False
+    for op, av in items:
+        if op is sre_constants.NEGATE:
+            negate = True
+        elif op is sre_constants.LITERAL:
+            found = any(ord(c) == av for c in candidates)
+        elif op is sre_constants.RANGE:
+            found = any(av[0] <= ord(c) <= av[1] for c in candidates)
+        elif op is sre_constants.CATEGORY:
+            found = _category_regex(av, flags).match(ch) is not None
+        else:
+            raise _UnsupportedConstruct(str(op))
+        if found:
+            break
+    return found != negate
+
+class _UnsupportedConstruct(Exception):
+    """Construcción que el simulador instrumentado no sabe ejecutar"""
+
+class _StepBudgetExceeded(Exception):
+    """El intento de coincidencia superó el presupuesto de pasos"""
+
+class _BacktrackSimulator:
+    """Motor de backtracking instrumentado que imita la búsqueda de `re`
+
+    Es iterativo: un estado es (items, índice, posición, banderas, continuación),
+    la continuación es una lista enlazada de marcos a retomar al terminar una
+    subsecuencia y los puntos de retroceso van en una pila explícita, así que
+    la profundidad no depende del largo del texto.
+    """
+
+    _SINGLE_CHAR = (sre_constants.LITERAL, sre_constants.NOT_LITERAL,
+                    sre_constants.ANY, sre_constants.IN)
+
+    def __init__(self, text, flags, attempt_budget):
+        self.text = text
+        self.flags = flags
+        self.attempt_budget = attempt_budget
+        self.steps = 0
+        self.backtracks = 0
+        self.limit = 0
+
+    def attempt(self, items, pos):
+        """Intenta una coincidencia anclada en `pos`; devuelve el final o None"""
+        self.limit = self.steps + self.attempt_budget
+        choices = []
+        state = (items, 0, pos, self.flags, None)
+        while True:
+            if state is None:
+                if not choices:
+                    return None
+                state = self._resume(choices)
+                continue
+            items, idx, pos, flags, cont = state
+            self._tick()
+            if idx == len(items):
+                if cont is None:
+                    return pos
+                (kind, *frame), cont = cont
+                if kind == 'seq':
+                    state = (frame[0], frame[1], pos, frame[2], cont)
+                else:
+                    # Fin de una vuelta de un cuantificador general
+                    rep, count, start = frame
+                    state = None if pos == start and count >= rep[1] else self._iterate(rep, count + 1, pos, choices)
+                continue
+            state = self._step(items, idx, pos, flags, cont, choices)
+
+    def _resume(self, choices):
+        """Retoma el último punto de retroceso"""
+        self.backtracks += 1
+        choice = choices.pop()
+        if choice[0] == 'state':
+            return choice[1]
+        # Racha de un solo carácter: se prueba la siguiente cantidad
+        _kind, counts, i, items, idx, pos, flags, cont = choice
+        if i + 1 < len(counts):
+            choices.append(('counts', counts, i + 1, items, idx, pos, flags, cont))
+        self._tick()
+        return items, idx + 1, pos + counts[i], flags, cont
+
+    def _tick(self):
+        self.steps += 1
+        if self.steps > self.limit:
+            raise _StepBudgetExceeded()
+
+    def _char_ok(self, op, av, pos, flags):
+        if pos >= len(self.text):
+            return False
+        ch = self.text[pos]
+        if op is sre_constants.ANY:
+            return flags & re.DOTALL or ch != '\n'
+        if op is sre_constants.IN:
+            return _char_in_class(ch, av, flags)
+        if flags & re.IGNORECASE:
+            same = ch.lower() == chr(av).lower()
+        else:
+            same = ord(ch) == av
+        return same if op is sre_constants.LITERAL else not same
+
+    def _is_word(self, pos, flags):
+        if pos < 0 or pos >= len(self.text):
+            return False
+        return _category_regex(sre_constants.CATEGORY_WORD, flags).match(self.text[pos]) is not None
+
+    def _at_ok(self, av, pos, flags):
+        text = self.text
+        if av is sre_constants.AT_BEGINNING:
+            return pos == 0 or (flags & re.MULTILINE and text[pos - 1] == '\n')
+        if av is sre_constants.AT_BEGINNING_STRING:
+            return pos == 0
+        if av is sre_constants.AT_END:
+            if flags & re.MULTILINE:
+                return pos == len(text) or text[pos] == '\n'
+            return pos == len(text) or (pos == len(text) - 1 and text[pos] == '\n')
+        if av is sre_constants.AT_END_STRING:
+            return pos == len(text)
+        if av is sre_constants.AT_BOUNDARY:
+            return self._is_word(pos - 1, flags) != self._is_word(pos, flags)
+        if av is sre_constants.AT_NON_BOUNDARY:
+            return len(text) > 0 and self._is_word(pos - 1, flags) == self._is_word(pos, flags)
+        raise _UnsupportedConstruct(str(av))
+
+    def _step(self, items, idx, pos, flags, cont, choices):
+        """Ejecuta el elemento `idx`; devuelve el estado siguiente o None si falla"""
+        op, av = items[idx]
+        if op in self._SINGLE_CHAR:
+            return (items, idx + 1, pos + 1, flags, cont) if self._char_ok(op, av, pos, flags) else None
+        if op is sre_constants.AT:
+            return (items, idx + 1, pos, flags, cont) if self._at_ok(av, pos, flags) else None
+        after = (('seq', items, idx + 1, flags), cont)
+        if op is sre_constants.BRANCH:
+            alternatives = av[1]
+            for alternative in reversed(alternatives[1:]):
+                choices.append(('state', (list(alternative), 0, pos, flags, after)))
+            return list(alternatives[0]), 0, pos, flags, after
+        if op is sre_constants.SUBPATTERN:
+            _group, add_flags, del_flags, sub = av
+            return list(sub), 0, pos, (flags | add_flags) & ~del_flags, after
+        if op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT):
+            return self._repeat(op is sre_constants.MAX_REPEAT, av, items, idx, pos, flags, cont, choices)
+        raise _UnsupportedConstruct(str(op))
+
+    def _repeat(self, greedy, av, items, idx, pos, flags, cont, choices):
+        low, high, sub = av
+        sub = list(sub)
+        if len(sub) == 1 and sub[0][0] in self._SINGLE_CHAR:
+            # Igual que REPEAT_ONE en sre: se consume la racha y se retrocede
+            op, item_av = sub[0]
+            run = 0
+            while run < high and self._char_ok(op, item_av, pos + run, flags):
+                self._tick()
+                run += 1
+            if run < low:
+                return None
+            counts = range(run, low - 1, -1) if greedy else range(low, run + 1)
+            if len(counts) > 1:
+                choices.append(('counts', counts, 1, items, idx, pos, flags, cont))
+            self._tick()
+            return items, idx + 1, pos + counts[0], flags, cont
+        return self._iterate((greedy, low, high, sub, items, idx, flags, cont), 0, pos, choices)
+
+    def _iterate(self, rep, count, pos, choices):
+        """Vuelta `count` de un cuantificador general: otra vuelta del cuerpo o seguir después"""
+        greedy, low, high, sub, items, idx, flags, cont = rep
+        body = (sub, 0, pos, flags, (('iter', rep, count, pos), None))
+        after = (items, idx + 1, pos, flags, cont) if count >= low else None
+        if greedy:
+            if count >= high:
+                return after
+            choices.append(('state', after))
+            return body
+        if after is None:
+            return body
+        choices.append(('state', body if count < high else None))
+        return after
+
+class RegexCostAnalyzer:
+    """Estima el trabajo del motor por línea ejecutando un simulador instrumentado"""
+
+    def __init__(self, attempt_budget=100000, total_budget=5000000):
+        self.attempt_budget = attempt_budget
+        self.total_budget = total_budget
+
+    def analyze(self, pattern: str, text: str, flags: int = 0) -> Tuple[Optional[Dict], Optional[str]]:
+        """Devuelve el costo por línea (mapa de calor) de buscar la regex en el texto
+
+        Se usa la misma regex compilada (caché compartida y banderas) que la
+        búsqueda real, porque las banderas cambian los retrocesos.
+        """
+        try:
+            compiled = _compile_cached(pattern, flags)
+        except re.error as e:
+            return None, str(e)
+
+        try:
+            report = self._simulate(compiled, text)
+        except _UnsupportedConstruct as e:
+            # Construcciones fuera del simulador: se mide tiempo real por línea
+            report = self._time_lines(compiled, text)
+            report['fallback_reason'] = str(e) or type(e).__name__
+
+        costs = report['line_costs']
+        report['total'] = sum(costs)
+        report['hotspots'] = sorted((i for i, c in enumerate(costs) if c),
+                                    key=lambda i: costs[i], reverse=True)[:20]
+        return report, None
+
+    def _simulate(self, compiled, text):
+        items = list(sre_parse.parse(compiled.pattern, compiled.flags))
+        sim = _BacktrackSimulator(text, compiled.flags, self.attempt_budget)
+        line_costs = [0] * (text.count('\n') + 1)
+        line = 0
+        pos = 0
+        attempts = matches = exhausted = 0
+        truncated = False
+        while pos <= len(text):
+            if sim.steps >= self.total_budget:
+                truncated = True
+                break
+            before = sim.steps
+            try:
+                end = sim.attempt(items, pos)
+            except _StepBudgetExceeded:
+                sim.steps = sim.limit
+                end = None
+                exhausted += 1
+            attempts += 1
+            line_costs[line] += sim.steps - before
+            if end is not None:
+                matches += 1
+                next_pos = end if end > pos else pos + 1
+            else:
+                next_pos = pos + 1
+            line += text.count('\n', pos, min(next_pos, len(text)))
+            pos = next_pos
+
+        return {
+            'engine': 'nfa',
+            'unit': 'pasos',
+            'line_costs': line_costs,
+            'attempts': attempts,
+            'matches': matches,
+            'backtracks': sim.backtracks,
+            'exhausted_attempts': exhausted,
+            'truncated': truncated,
+        }
+
+    def _time_lines(self, compiled, text):
+        line_costs = []
+        matches = 0
+        start = 0
+        for line in text.split('\n'):
+            end = start + len(line)
+            t0 = time.perf_counter_ns()
+            found = sum(1 for _ in compiled.finditer(text, start, end))
+            line_costs.append(time.perf_counter_ns() - t0)
+            matches += found
+            start = end + 1
+        return {
+            'engine': 'tiempo',
+            'unit': 'ns',
+            'line_costs': line_costs,
+            'attempts': None,
+            'matches': matches,
+            'backtracks': None,
+            'exhausted_attempts': 0,
+            'truncated': False,
+        }
+
+_REPEAT_OPS = (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT)
+_CHAR_OPS = (sre_constants.LITERAL, sre_constants.NOT_LITERAL, sre_constants.ANY, sre_constants.IN)
+
+def _nullable(items):
+    """True si la secuencia puede coincidir con la cadena vacía (aproximado)"""
+    for op, av in items:
+        if op in _REPEAT_OPS or op is getattr(sre_constants, 'POSSESSIVE_REPEAT', None):
+            if av[0] > 0 and not _nullable(av[2]):
+                return False
+        elif op is sre_constants.SUBPATTERN:
+            if not _nullable(av[-1]):
+                return False
+        elif op is sre_constants.BRANCH:
+            if not any(_nullable(branch) for branch in av[1]):
+                return False
+        elif op not in (sre_constants.AT, sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            return False
+    return True
+
+def _first_chars(items, flags):
+    """Caracteres ASCII con los que puede empezar la secuencia, o None si no se sabe"""
+    if not items:
+        return None
+    op, av = items[0]
+    if op in _CHAR_OPS:
+        try:
+            source = _charset_source(op, av)
+        except _UnsupportedConstruct:
+            return None
+        single = _compile_cached(source, flags)
+        return frozenset(code for code in range(128) if single.fullmatch(chr(code)))
+    if op is sre_constants.SUBPATTERN:
+        return _first_chars(av[-1], flags)
+    if op in _REPEAT_OPS and av[0] > 0:
+        return _first_chars(av[2], flags)
+    if op is sre_constants.BRANCH:
+        sets = [_first_chars(branch, flags) for branch in av[1]]
+        return None if None in sets else frozenset().union(*sets)
+    return None
+
+def redos_warnings(pattern, flags=0):
+    """Heurísticas estáticas de retroceso catastrófico sobre el árbol de la regex
+
+    Señala repeticiones anidadas cuyo cuerpo es sólo la repetición interna más
+    partes opcionales (`(a+)+`, `(\\w+\\s?)*`) y alternativas que pueden
+    empezar con el mismo carácter dentro de una repetición (`(a|ab)*`). Los
+    grupos atómicos y los cuantificadores posesivos no retroceden y se omiten.
+    """
+    warnings = []
+
+    def walk(items, exposed, repeated):
+        # exposed: lo recorrido desde la repetición externa más cercana es anulable
+        items = list(items)
+        for index, (op, av) in enumerate(items):
+            alone = exposed and _nullable(items[:index] + items[index + 1:])
+            if op in _REPEAT_OPS:
+                minimum, maximum, sub = av
+                if maximum > 1 and alone and not _nullable(sub):
+                    warnings.append(f"Cuantificadores anidados: {_describe(op, av)} dentro de otra repetición")
+                walk(sub, maximum > 1 or alone, repeated or maximum > 1)
+            elif op is sre_constants.SUBPATTERN:
+                walk(av[-1], alone, repeated)
+            elif op is sre_constants.BRANCH:
+                if repeated:
+                    known = [chars for chars in (_first_chars(list(branch), flags) for branch in av[1]) if chars]
+                    if any(a & b for i, a in enumerate(known) for b in known[i + 1:]):
+                        warnings.append("Alternativas que pueden empezar igual dentro de una repetición")
+                for branch in av[1]:
+                    walk(branch, alone, repeated)
+            elif op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+                walk(av[1], False, repeated)
+
+    parsed = sre_parse.parse(pattern, flags)
+    flags = parsed.state.flags  # Incluye las banderas en línea, p. ej. (?i)
+    walk(parsed, False, False)
+    return list(dict.fromkeys(warnings))
+
+def _describe(op, av):
+    minimum, maximum, _sub = av
+    upper = '∞' if maximum == sre_constants.MAXREPEAT else str(maximum)
+    return f"{{{minimum},{upper}}}" + ("?" if op is sre_constants.MIN_REPEAT else "")
+
+_MAX_CODEPOINT = 0x10FFFF
+
+@lru_cache(maxsize=1)
+def _all_codepoints():
+    """Cadena con todos los puntos de código, para medir clases con el propio `re`"""
+    return ''.join(map(chr, range(_MAX_CODEPOINT + 1)))
+
+def _class_escape(code):
+    return '\\U%08x' % code
+
+def _charset_source(op, av):
+    """Reescribe un nodo de un carácter como clase de `re`"""
+    if op is sre_constants.LITERAL:
+        return '[' + _class_escape(av) + ']'
+    if op is sre_constants.NOT_LITERAL:
+        return '[^' + _class_escape(av) + ']'
+    if op is sre_constants.ANY:
+        return '.'
+    parts = []
+    for item_op, item_av in av:
+        if item_op is sre_constants.NEGATE:
+            parts.insert(0, '^')
+        elif item_op is sre_constants.LITERAL:
+            parts.append(_class_escape(item_av))
+        elif item_op is sre_constants.RANGE:
+            parts.append(_class_escape(item_av[0]) + '-' + _class_escape(item_av[1]))
+        elif item_op is sre_constants.CATEGORY and item_av in _CATEGORY_PATTERNS:
+            parts.append(_CATEGORY_PATTERNS[item_av])
+        else:
+            raise _UnsupportedConstruct(str(item_op))
+    return '[' + ''.join(parts) + ']'
+
+@lru_cache(maxsize=1024)
+def _charset_intervals(source, flags):
+    """Intervalos (inicio, fin) de los caracteres que acepta una clase, según `re`
+
+    Así las categorías Unicode, IGNORECASE y DOTALL se resuelven exactamente
+    como en el motor real.
+    """
+    compiled = re.compile(source + '+', flags & (re.IGNORECASE | re.ASCII | re.DOTALL))
+    return tuple((m.start(), m.end() - 1) for m in compiled.finditer(_all_codepoints()))
+
+class _NFABuilder:
+    """Construcción de Thompson sobre el árbol de `sre_parse` (sólo el subconjunto regular)"""
+
+    _SINGLE_CHAR = (sre_constants.LITERAL, sre_constants.NOT_LITERAL, sre_constants.ANY, sre_constants.IN)
+    _STARTS = (sre_constants.AT_BEGINNING, sre_constants.AT_BEGINNING_STRING)
+    _ENDS = (sre_constants.AT_END, sre_constants.AT_END_STRING)
+
+    def __init__(self, max_states):
+        self.max_states = max_states
+        self.eps = []
+        self.edges = []
+
+    def new_state(self):
+        if len(self.eps) >= self.max_states:
+            raise _UnsupportedConstruct("el autómata finito no determinista es demasiado grande")
+        self.eps.append([])
+        self.edges.append([])
+        return len(self.eps) - 1
+
+    def build(self, items, flags):
+        """Devuelve (inicial, final) para el lenguaje de `fullmatch`"""
+        start = self.new_state()
+        return start, self.sequence(self._strip_anchors(list(items)), flags, start)
+
+    def _strip_anchors(self, items):
+        # ^ al inicio y $ al final no cambian el lenguaje de fullmatch
+        while items and items[0][0] is sre_constants.AT and items[0][1] in self._STARTS:
+            items.pop(0)
+        while items and items[-1][0] is sre_constants.AT and items[-1][1] in self._ENDS:
+            items.pop()
+        if len(items) == 1 and items[0][0] is sre_constants.BRANCH:
+            alternatives = [self._strip_anchors(list(alt)) for alt in items[0][1][1]]
+            items = [(sre_constants.BRANCH, (None, alternatives))]
+        return items
+
+    def sequence(self, items, flags, entry):
+        for op, av in items:
+            entry = self.node(op, av, flags, entry)
+        return entry
+
+    def node(self, op, av, flags, entry):
+        if op in self._SINGLE_CHAR:
+            target = self.new_state()
+            self.edges[entry].append((_charset_intervals(_charset_source(op, av), flags), target))
+            return target
+        if op is sre_constants.SUBPATTERN:
+            _group, add_flags, del_flags, items = av
+            return self.sequence(items, (flags | add_flags) & ~del_flags, entry)
+        if op is sre_constants.BRANCH:
+            exit_state = self.new_state()
+            for alternative in av[1]:
+                start = self.new_state()
+                self.eps[entry].append(start)
+                self.eps[self.sequence(alternative, flags, start)].append(exit_state)
+            return exit_state
+        if op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT):
+            low, high, items = av
+            for _ in range(low):
+                entry = self.sequence(items, flags, entry)
+            if high is sre_constants.MAXREPEAT:
+                loop = self.new_state()
+                self.eps[entry].append(loop)
+                self.eps[self.sequence(items, flags, loop)].append(loop)
+                exit_state = self.new_state()
+                self.eps[loop].append(exit_state)
+                return exit_state
+            exit_state = self.new_state()
+            self.eps[entry].append(exit_state)
+            for _ in range(high - low):
+                entry = self.sequence(items, flags, entry)
+                self.eps[entry].append(exit_state)
+            return exit_state
+        raise _UnsupportedConstruct(str(op))
+
+def _hopcroft(table, classes, accepting):
+    """Refinamiento de particiones de Hopcroft; devuelve el bloque de cada estado"""
+    count = len(accepting)
+    inverse = [[[] for _ in range(count)] for _ in range(classes)]
+    for state in range(count):
+        row = table[state * classes:(state + 1) * classes]
+        for symbol, target in enumerate(row):
+            inverse[symbol][target].append(state)
+    
+    final = {state for state in range(count) if accepting[state]}
+    blocks = [block for block in (final, set(range(count)) - final) if block]
+    block_of = [0] * count
+    for index, block in enumerate(blocks):
+        for state in block:
+            block_of[state] = index
+    smaller = min(range(len(blocks)), key=lambda index: len(blocks[index]))
+    pending = {(smaller, symbol) for symbol in range(classes)} if len(blocks) > 1 else set()
+    
+    while pending:
+        splitter, symbol = pending.pop()
+        predecessors = set()
+        for state in blocks[splitter]:
+            predecessors.update(inverse[symbol][state])
+        touched = {}
+        for state in predecessors:
+            touched.setdefault(block_of[state], []).append(state)
+        for index, inside in touched.items():
+            if len(inside) == len(blocks[index]):
+                continue
+            new_index = len(blocks)
+            new_block = set(inside)
+            blocks[index] -= new_block
+            blocks.append(new_block)
+            for state in inside:
+                block_of[state] = new_index
+            for other in range(classes):
+                if (index, other) in pending:
+                    pending.add((new_index, other))
+                elif len(new_block) <= len(blocks[index]):
+                    pending.add((new_index, other))
+                else:
+                    pending.add((index, other))
+    return block_of, len(blocks)
+
+class RegexDFA:
+    """DFA mínimo del lenguaje de una regex (semántica de `fullmatch`)
+
+    Cubre el subconjunto regular: literales, clases, `.`, alternancia, grupos
+    y repeticiones, con ^/$ sólo en los extremos. El alfabeto se parte en
+    intervalos de puntos de código con el mismo comportamiento, de modo que
+    la tabla queda en estados × clases y sirve como motor compacto.
+    """
+    MAX_NFA_STATES = 50000
+    MAX_DFA_STATES = 20000
+    _PREFERRED_CHARS = "a0A _-.:/@"
+
+    def __init__(self, interval_starts, interval_class, table, classes, start, accepting, dead, stats):
+        self.interval_starts = interval_starts
+        self.interval_class = interval_class
+        self.table = table
+        self.classes = classes
+        self.start = start
+        self.accepting = accepting
+        self.dead = dead
+        self.stats = stats
+        self._ascii = [interval_class[bisect_right(interval_starts, code) - 1] for code in range(128)]
+
+    @property
+    def state_count(self):
+        return len(self.accepting)
+
+    @classmethod
+    def from_pattern(cls, pattern, flags=0):
+        """Construye y minimiza el DFA (lanza `re.error` o `_UnsupportedConstruct`)"""
+        compiled = re.compile(pattern, flags)
+        if isinstance(pattern, bytes):
+            raise _UnsupportedConstruct("patrones de bytes")
+        builder = _NFABuilder(cls.MAX_NFA_STATES)
+        nfa_start, nfa_final = builder.build(sre_parse.parse(pattern, compiled.flags), compiled.flags)
+        
+        # Alfabeto: intervalos entre todos los bordes de las clases del patrón
+        bounds = {0, _MAX_CODEPOINT + 1}
+        for edges in builder.edges:
+            for intervals, _target in edges:
+                for low, high in intervals:
+                    bounds.add(low)
+                    bounds.add(high + 1)
+        boundaries = sorted(bounds)
+        bound_index = {bound: index for index, bound in enumerate(boundaries)}
+        classes = len(boundaries) - 1
+        edge_symbols = {}
+        nfa_edges = []
+        for edges in builder.edges:
+            converted = []
+            for intervals, target in edges:
+                symbols = edge_symbols.get(intervals)
+                if symbols is None:
+                    symbols = [symbol for low, high in intervals
+                               for symbol in range(bound_index[low], bound_index[high + 1])]
+                    edge_symbols[intervals] = symbols
+                converted.append((symbols, target))
+            nfa_edges.append(converted)
+        
+        closures = {}
+        def closure(states):
+            key = frozenset(states)
+            result = closures.get(key)
+            if result is None:
+                seen = set(key)
+                stack = list(key)
+                while stack:
+                    for nxt in builder.eps[stack.pop()]:
+                        if nxt not in seen:
+                            seen.add(nxt)
+                            stack.append(nxt)
+                result = closures[key] = frozenset(seen)
+            return result
+        
+        # Construcción por subconjuntos; el conjunto vacío es el estado muerto 0
+        ids = {frozenset(): 0}
+        order = [frozenset(), closure([nfa_start])]
+        ids[order[1]] = 1
+        table = array('i')
+        position = 0
+        while position < len(order):
+            current = order[position]
+            position += 1
+            moves = {}
+            for state in current:
+                for symbols, target in nfa_edges[state]:
+                    for symbol in symbols:
+                        moves.setdefault(symbol, set()).add(target)
+            row = [0] * classes
+            for symbol, targets in moves.items():
+                following = closure(targets)
+                index = ids.get(following)
+                if index is None:
+                    if len(order) >= cls.MAX_DFA_STATES:
+                        raise _UnsupportedConstruct("el DFA excede el máximo de estados")
+                    index = ids[following] = len(order)
+                    order.append(following)
+                row[symbol] = index
+            table.extend(row)
+        accepting = bytes(nfa_final in states for states in order)
+        
+        # Minimización y compactación de columnas equivalentes
+        block_of, block_count = _hopcroft(table, classes, accepting)
+        representative = {}
+        for state in range(len(order)):
+            representative.setdefault(block_of[state], state)
+        rows = [[block_of[table[representative[block] * classes + symbol]] for symbol in range(classes)]
+                for block in range(block_count)]
+        columns = {}
+        symbol_column = []
+        for symbol in range(classes):
+            column = tuple(row[symbol] for row in rows)
+            symbol_column.append(columns.setdefault(column, len(columns)))
+        compact = array('i')
+        for row in rows:
+            compact_row = [0] * len(columns)
+            for symbol, column in enumerate(symbol_column):
+                compact_row[column] = row[symbol]
+            compact.extend(compact_row)
+        interval_starts = array('l')
+        interval_class = array('i')
+        for symbol, column in enumerate(symbol_column):
+            if not interval_class or interval_class[-1] != column:
+                interval_starts.append(boundaries[symbol])
+                interval_class.append(column)
+        
+        stats = {'nfa_states': len(builder.eps), 'dfa_states': len(order), 'alphabet_intervals': classes}
+        return cls(interval_starts, interval_class, compact, len(columns), block_of[1],
+                   bytes(accepting[representative[block]] for block in range(block_count)),
+                   block_of[0], stats)
+
+    def symbol(self, ch):
+        """Clase del alfabeto de un carácter"""
+        code = ord(ch)
+        if code < 128:
+            return self._ascii[code]
+        return self.interval_class[bisect_right(self.interval_starts, code) - 1]
+
+    def fullmatch(self, text):
+        """¿Pertenece el texto completo al lenguaje? Un paso de tabla por carácter"""
+        table, classes, dead = self.table, self.classes, self.dead
+        ascii_classes = self._ascii
+        starts, interval_class = self.interval_starts, self.interval_class
+        state = self.start
+        for ch in text:
+            code = ord(ch)
+            symbol = ascii_classes[code] if code < 128 else interval_class[bisect_right(starts, code) - 1]
+            state = table[state * classes + symbol]
+            if state == dead:
+                return False
+        return bool(self.accepting[state])
+
+    def memory_bytes(self):
+        """Tamaño de las tablas del motor compacto"""
+        return (self.table.itemsize * len(self.table) + self.interval_starts.itemsize * len(self.interval_starts)
+                + self.interval_class.itemsize * len(self.interval_class) + len(self.accepting))
+
+    def _representative(self, low, high):
+        for ch in self._PREFERRED_CHARS:
+            if low <= ord(ch) <= high:
+                return ch
+        for code in range(low, min(high, low + 256) + 1):
+            ch = chr(code)
+            if ch.isprintable() and not ch.isspace():
+                return ch
+        return chr(low)
+
+    def counterexample(self, other):
+        """Cadena más corta aceptada por sólo uno de los dos DFA, o None si son equivalentes"""
+        # Alfabeto común: un símbolo por cada par de clases distinto, con un carácter legible
+        bounds = sorted(set(self.interval_starts) | set(other.interval_starts))
+        bounds.append(_MAX_CODEPOINT + 1)
+        symbols = {}
+        for low, following in zip(bounds, bounds[1:]):
+            pair = (self.interval_class[bisect_right(self.interval_starts, low) - 1],
+                    other.interval_class[bisect_right(other.interval_starts, low) - 1])
+            ch = self._representative(low, following - 1)
+            known = symbols.get(pair)
+            if known is None or not known.isprintable() and ch.isprintable():
+                symbols[pair] = ch
+        
+        start = (self.start, other.start)
+        parents = {start: None}
+        frontier = [start]
+        while frontier:
+            following = []
+            for pair in frontier:
+                a, b = pair
+                if self.accepting[a] != other.accepting[b]:
+                    chars = []
+                    while parents[pair] is not None:
+                        pair, ch = parents[pair]
+                        chars.append(ch)
+                    return ''.join(reversed(chars))
+                if a == self.dead and b == other.dead:
+                    continue
+                for (sa, sb), ch in symbols.items():
+                    nxt = (self.table[a * self.classes + sa], other.table[b * other.classes + sb])
+                    if nxt not in parents:
+                        parents[nxt] = (pair, ch)
+                        following.append(nxt)
+            frontier = following
+        return None
@@ -1,70 +1,42 @@
 import sys
+import os
 import re
-from typing import List, Tuple, Optional
+import time
+import json
+import struct
+import difflib
+from bisect import bisect_right
+
+# Referencia para la traza de arranque: todo se mide desde aquí (antes de cargar Qt)
+_STARTUP_STARTED = time.perf_counter()
+
+from regex_engine import (RegexValidator, RegexCostAnalyzer, MatchResultCache, LineIndex, SpanList,
+                          StringTextSource, MmapTextSource, LogFollower, TrigramIndex, MatchExporter,
+                          SessionSnapshot, PatternSuite, SharedText, get_process_pool,
+                          read_shared_result, detect_compression, diff_spans, _scan_to_shared_memory,
+                          _stream_overlap)
+
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                              QHBoxLayout, QLabel, QLineEdit, QTextEdit, QPushButton, 
-                             QListWidget, QSplitter, QGroupBox, QMessageBox, QTabWidget,
-                             QScrollArea, QFrame, QGridLayout, QSpacerItem, QSizePolicy,
-                             QStatusBar, QMenuBar, QMenu, QToolBar, QProgressBar,
-                             QDockWidget, QTextBrowser, QComboBox, QSpinBox, QCheckBox)
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QTimer, QPropertyAnimation, QEasingCurve
-from PyQt6.QtGui import (QFont, QColor, QTextCharFormat, QSyntaxHighlighter, 
-                        QTextDocument, QPalette, QLinearGradient, QBrush, QPainter,
-                        QAction, QIcon, QTextCursor, QTextBlockFormat)
-
-class RegexValidator:
-    """Clase para validar y procesar expresiones regulares"""
-    
-    def __init__(self):
-        self.supported_metacharacters = {
-            '\\d': 'cualquier dígito [0-9]',
-            '\\D': 'cualquier no dígito [^0-9]',
-            '\\s': 'cualquier espacio en blanco',
-            '\\S': 'cualquier no espacio en blanco',
-            '\\w': 'cualquier alfanumérico [a-zA-Z0-9_]',
-            '\\W': 'cualquier no alfanumérico [^a-zA-Z0-9_]',
-            '.': 'cualquier carácter excepto nueva línea',
-            '^': 'inicio de línea',
-            '$': 'final de línea',
-            '*': 'cero o más repeticiones',
-            '+': 'una o más repeticiones',
-            '?': 'cero o una repetición',
-            '|': 'alternancia (OR)',
-            '()': 'agrupación',
-            '[]': 'clases de caracteres',
-            '\\': 'escape'
-        }
-    
-    def verify_regex(self, pattern: str) -> Tuple[bool, Optional[str]]:
-        """Verifica si una expresión regular está bien formada"""
-        if not pattern.strip():
-            return False, "La expresión regular no puede estar vacía"
-            
-        try:
-            re.compile(pattern)
-            return True, None
-        except re.error as e:
-            return False, str(e)
-    
-    def find_matches(self, pattern: str, text: str) -> Tuple[Optional[List[str]], Optional[str]]:
-        """Encuentra todas las coincidencias de la regex en el texto"""
-        try:
-            compiled_pattern = re.compile(pattern)
-            matches = compiled_pattern.findall(text)
-            return matches, None
-        except re.error as e:
-            return None, str(e)
-    
-    def get_match_positions(self, pattern: str, text: str) -> Tuple[Optional[List[Tuple[int, int, str]]], Optional[str]]:
-        """Obtiene las posiciones de las coincidencias en el texto"""
-        try:
-            compiled_pattern = re.compile(pattern)
-            matches = []
-            for match in compiled_pattern.finditer(text):
-                matches.append((match.start(), match.end(), match.group()))
-            return matches, None
-        except re.error as e:
-            return None, str(e)
+                             QSplitter, QGroupBox, QMessageBox, QScrollArea, QFrame,
+                             QStatusBar, QProgressBar, QTextBrowser, QComboBox, QSpinBox, QCheckBox,
+                             QTableWidget, QTableWidgetItem, QHeaderView, QFileDialog,
+                             QAbstractScrollArea, QListView)
+from PyQt6.QtCore import Qt, QThread, pyqtSignal, QTimer, QPoint, QAbstractListModel, QModelIndex
+from PyQt6.QtGui import (QFont, QColor, QTextCharFormat, QSyntaxHighlighter, QPalette, QPainter,
+                         QFontDatabase, QFontMetrics)
+
+try:
+    from re import _constants as sre_constants
+except ImportError:  # Python < 3.11
+    import sre_constants
+
+# Marcas (etiqueta, ms desde el inicio) de la traza de arranque de la interfaz
+STARTUP_TRACE = []
+
+def startup_mark(label):
+    """Agrega una marca a la traza de arranque"""
+    STARTUP_TRACE.append((label, round((time.perf_counter() - _STARTUP_STARTED) * 1000, 2)))
 
 class RegexHighlighter(QSyntaxHighlighter):
     """Resaltador de sintaxis para expresiones regulares"""
@@ -111,86 +83,350 @@ class RegexHighlighter(QSyntaxHighlighter):
                 start, end = match.span()
                 self.setFormat(start, end - start, format)
 
-class TextHighlighter(QTextEdit):
-    """Editor de texto con resaltado de coincidencias"""
+class VirtualTextViewer(QAbstractScrollArea):
+    """Visor de sólo lectura que pinta únicamente las líneas visibles
+
+    El texto viene de una fuente con índice de líneas (`StringTextSource` o
+    `MmapTextSource`) y los resaltados se buscan por bisección en los spans
+    ordenados, así que el costo de pintar depende del tamaño de la ventana y
+    no del tamaño del texto.
+    """
+    TAB_WIDTH = 4
+    PADDING = 12
+    TEXT_COLOR = QColor(31, 41, 55)           # Gray-800
+    MATCH_COLOR = QColor(254, 240, 138)       # Yellow-200
+    MATCH_UNDERLINE = QColor(17, 24, 39)      # Gray-900
+    SELECTION_COLOR = QColor(253, 186, 116)   # Orange-300
+    _SURROGATES = re.compile('[\udc80-\udcff]')
+
     def __init__(self):
         super().__init__()
-        self.setReadOnly(True)
-        self.matches = []
-        
-    def highlight_matches(self, text, matches):
-        """Resalta las coincidencias en el texto"""
-        self.matches = matches
-        self.clear()
-        
-        if not matches:
-            self.setPlainText(text)
+        font = QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont)
+        font.setPointSize(10)
+        self.setFont(font)
+        self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
+        metrics = QFontMetrics(font)
+        self.line_height = metrics.lineSpacing()
+        self.char_width = max(1, metrics.horizontalAdvance('M'))
+        self.ascent = metrics.ascent()
+        self.source = StringTextSource()
+        self.matches = SpanList()
+        self.layers = []
+        self.line_style = None
+        self.selection = None
+        self.max_cells = 0
+        self.update_scrollbars()
+
+    # --- Contenido -------------------------------------------------------
+
+    def set_source(self, source, spans=None, line_style=None, layers=()):
+        """Cambia la fuente de texto y los resaltados, volviendo al inicio
+
+        `layers` son capas extra de spans (SpanList, QColor) pintadas debajo
+        de las coincidencias.
+        """
+        if source is not self.source:
+            self.source.close()
+        self.source = source
+        self.matches = self._as_span_list(spans)
+        self.layers = list(layers)
+        self.line_style = line_style
+        self.selection = None
+        self.max_cells = 0
+        self.verticalScrollBar().setValue(0)
+        self.horizontalScrollBar().setValue(0)
+        self.update_scrollbars()
+        self.viewport().update()
+
+    @staticmethod
+    def _as_span_list(spans):
+        if spans is None:
+            return SpanList()
+        if isinstance(spans, SpanList):
+            return spans
+        span_list = SpanList()
+        for start, end in spans:
+            span_list.append(start, end)
+        return span_list
+
+    def clear(self):
+        self.set_source(StringTextSource())
+
+    def setPlainText(self, text):
+        self.set_source(StringTextSource(text))
+
+    def highlight_matches(self, text, matches, line_index=None):
+        """Resalta las coincidencias (spans inicio, fin) en el texto"""
+        self.set_source(StringTextSource(text, line_index), matches)
+
+    def append_matches(self, text, spans):
+        """Agrega texto al final resaltando sus coincidencias (spans absolutos en el texto completo)"""
+        if not isinstance(self.source, StringTextSource):
+            self.clear()
+        at_bottom = self.verticalScrollBar().value() >= self.verticalScrollBar().maximum()
+        self.source.append(text)
+        for start, end in spans:
+            self.matches.append(start, end)
+        self.update_scrollbars()
+        if at_bottom:
+            self.verticalScrollBar().setValue(self.verticalScrollBar().maximum())
+        self.viewport().update()
+
+    def show_diff(self, lines):
+        """Muestra un diff unificado coloreando las líneas agregadas y eliminadas"""
+        normal = (None, QColor(107, 114, 128))                          # Gray-500
+        added = (QColor(220, 252, 231), QColor(22, 101, 52))            # Green-100 / Green-800
+        removed = (QColor(254, 226, 226), QColor(153, 27, 27))          # Red-100 / Red-800
+        styles = []
+        for line in lines:
+            if line.startswith('+') and not line.startswith('+++'):
+                styles.append(added)
+            elif line.startswith('-') and not line.startswith('---'):
+                styles.append(removed)
+            else:
+                styles.append(normal)
+        self.set_source(StringTextSource('\n'.join(lines)),
+                        line_style=lambda line: styles[line] if line < len(styles) else normal)
+
+    def show_cost_heatmap(self, text, line_costs):
+        """Colorea cada línea según el costo relativo que tuvo para el motor"""
+        peak = max(line_costs) if line_costs else 0
+
+        def line_style(line):
+            cost = line_costs[line] if line < len(line_costs) else 0
+            if not cost:
+                return None, None
+            # Interpolar de amarillo claro (barato) a rojo (costoso)
+            ratio = cost / peak
+            return QColor(254, int(240 - 172 * ratio), int(138 - 70 * ratio)), None
+
+        self.set_source(StringTextSource(text), line_style=line_style if peak else None)
+
+    def scroll_to_offset(self, offset, length=0):
+        """Lleva la vista a un offset del texto usando el índice de líneas"""
+        if offset > self.source.length:
             return
+        line, column = self.source.position(offset)
+        self.selection = (offset, offset + length)
+        text = self.source.line_text(line)
+        self.max_cells = max(self.max_cells, len(self._display(text)))
+        self.update_scrollbars()
+        
+        # La línea queda a un tercio de la altura visible
+        self.verticalScrollBar().setValue(max(0, line - self.visible_lines() // 3))
+        x = self._cell(text, column) * self.char_width
+        hbar = self.horizontalScrollBar()
+        width = self.viewport().width() - 2 * self.PADDING
+        if x < hbar.value() or x + length * self.char_width > hbar.value() + width:
+            hbar.setValue(max(0, x - width // 3))
+        self.viewport().update()
+
+    # --- Geometría -------------------------------------------------------
+
+    def visible_lines(self):
+        return max(1, self.viewport().height() // self.line_height)
+
+    def update_scrollbars(self):
+        visible = self.visible_lines()
+        vbar = self.verticalScrollBar()
+        vbar.setRange(0, max(0, self.source.line_count() - visible))
+        vbar.setPageStep(visible)
+        vbar.setSingleStep(1)
+        hbar = self.horizontalScrollBar()
+        width = self.viewport().width()
+        hbar.setRange(0, max(0, self.max_cells * self.char_width + 2 * self.PADDING - width))
+        hbar.setPageStep(width)
+        hbar.setSingleStep(self.char_width)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_scrollbars()
+
+    def scrollContentsBy(self, dx, dy):
+        self.viewport().update()
+
+    # --- Pintado ---------------------------------------------------------
+
+    def _display(self, text):
+        """Texto tal como se dibuja: tabuladores expandidos y bytes inválidos como �"""
+        if text.endswith('\r'):
+            text = text[:-1]
+        if '\t' in text:
+            text = text.expandtabs(self.TAB_WIDTH)
+        if not text.isascii():
+            text = self._SURROGATES.sub('�', text)
+        return text
+
+    def _cell(self, text, column):
+        """Columna de pantalla de un carácter, considerando los tabuladores"""
+        if '\t' not in text:
+            return column
+        return len(text[:column].expandtabs(self.TAB_WIDTH))
+
+    @staticmethod
+    def _spans_between(spans, start, end):
+        """Spans que se solapan con [start, end], en O(log n + k)"""
+        i = bisect_right(spans.ends, start)
+        starts, ends = spans.starts, spans.ends
+        while i < len(starts) and starts[i] <= end:
+            yield starts[i], ends[i]
+            i += 1
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        painter.setFont(self.font())
+        width = self.viewport().width()
+        painter.fillRect(self.viewport().rect(), QColor(255, 255, 255))
+        
+        lh, cw = self.line_height, self.char_width
+        first = self.verticalScrollBar().value()
+        left = self.PADDING - self.horizontalScrollBar().value()
+        first_cell = max(0, -left // cw)
+        cells = width // cw + 2
+        last = min(self.source.line_count(), first + self.visible_lines() + 1)
+        max_cells = self.max_cells
+        
+        for row, line in enumerate(range(first, last)):
+            y = row * lh
+            text = self.source.line_text(line)
+            start = self.source.line_start(line)
+            end = start + len(text)
+            display = self._display(text)
+            max_cells = max(max_cells, len(display))
             
-        # Crear documento con formato
-        doc = QTextDocument()
-        self.setDocument(doc)
-        cursor = self.textCursor()
-        
-        # Procesar texto línea por línea
-        lines = text.split('\n')
-        current_pos = 0
-        
-        for line_num, line in enumerate(lines):
-            line_start = current_pos
-            
-            # Crear formato para texto normal
-            normal_format = QTextCharFormat()
-            normal_format.setForeground(QColor(31, 41, 55))  # Gray-800
-            
-            # Crear formato para coincidencias
-            match_format = QTextCharFormat()
-            match_format.setBackground(QColor(254, 240, 138))  # Yellow-200
-            match_format.setForeground(QColor(17, 24, 39))     # Gray-900
-            match_format.setFontWeight(QFont.Weight.Bold)
-            match_format.setUnderlineStyle(QTextCharFormat.UnderlineStyle.SingleUnderline)
-            
-            # Procesar cada coincidencia en esta línea
-            line_matches = []
-            for match_start, match_end, match_text in matches:
-                if match_start >= current_pos and match_start < current_pos + len(line):
-                    line_matches.append((match_start - current_pos, match_end - current_pos, match_text))
-            
-            # Ordenar coincidencias por posición
-            line_matches.sort(key=lambda x: x[0])
-            
-            # Construir texto con formato
-            last_pos = 0
-            for match_start, match_end, match_text in line_matches:
-                # Agregar texto antes de la coincidencia
-                if match_start > last_pos:
-                    before_text = line[last_pos:match_start]
-                    cursor.insertText(before_text, normal_format)
-                
-                # Agregar coincidencia con formato especial
-                cursor.insertText(match_text, match_format)
-                last_pos = match_end
-            
-            # Agregar el resto de la línea
-            if last_pos < len(line):
-                remaining_text = line[last_pos:]
-                cursor.insertText(remaining_text, normal_format)
+            background, foreground = self.line_style(line) if self.line_style else (None, None)
+            if background is not None:
+                painter.fillRect(0, y, width, lh, background)
             
-            # Agregar salto de línea (excepto en la última línea)
-            if line_num < len(lines) - 1:
-                cursor.insertText('\n', normal_format)
+            # Capas, coincidencias y selección de la línea (sólo las visibles)
+            for spans, color in self.layers:
+                for span_start, span_end in self._spans_between(spans, start, end):
+                    if span_end > span_start:
+                        self._paint_span(painter, text, start, end, span_start, span_end, left, y, color, False)
+            for span_start, span_end in self._spans_between(self.matches, start, end):
+                if span_end > span_start:
+                    self._paint_span(painter, text, start, end, span_start, span_end, left, y,
+                                     self.MATCH_COLOR, True)
+            if self.selection and self.selection[0] <= end and self.selection[1] >= start:
+                self._paint_span(painter, text, start, end, *self.selection, left, y,
+                                 self.SELECTION_COLOR, False)
             
-            current_pos += len(line) + 1
+            painter.setPen(foreground or self.TEXT_COLOR)
+            painter.drawText(left + first_cell * cw, y + self.ascent, display[first_cell:first_cell + cells])
+        painter.end()
+        
+        if max_cells > self.max_cells:
+            self.max_cells = max_cells
+            self.update_scrollbars()
+
+    def _paint_span(self, painter, text, line_start, line_end, span_start, span_end, left, y, color, underline):
+        cw = self.char_width
+        first = self._cell(text, max(span_start, line_start) - line_start)
+        # Un span que continúa en la línea siguiente cubre también el salto de línea
+        last = self._cell(text, min(span_end, line_end) - line_start) + (span_end > line_end)
+        if last <= first:
+            last = first + 1
+        x = left + first * cw
+        painter.fillRect(x, y, (last - first) * cw, self.line_height, color)
+        if underline:
+            painter.setPen(self.MATCH_UNDERLINE)
+            painter.drawLine(x, y + self.ascent + 2, x + (last - first) * cw - 1, y + self.ascent + 2)
+
+class MatchListModel(QAbstractListModel):
+    """Modelo de la lista de coincidencias que genera cada fila al mostrarse
+
+    Las filas se leen de los spans (en memoria o volcados a disco) y de la
+    fuente del texto, así que la vista sólo paga por las filas visibles.
+    """
+    KIND_MARKERS = ("− ", "+ ", "~ ")
+
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+        self.spans = SpanList()
+        self.source = None
+        self.values = None
+        self.positions = None
+        self.kinds = None
+        self._shown = 0
+
+    def clear(self):
+        self.set_messages()
+
+    def set_messages(self, *messages):
+        """Muestra filas de texto simples en lugar de coincidencias"""
+        self.beginResetModel()
+        self.messages = list(messages)
+        self.spans = SpanList()
+        self.source = self.values = self.positions = self.kinds = None
+        self._shown = len(self.messages)
+        self.endResetModel()
+
+    def set_matches(self, spans, source=None, values=None, positions=None, kinds=None):
+        """Muestra coincidencias; `values`, `positions` (línea, columna) y `kinds` son opcionales
+
+        Sin `values` el texto de cada fila se toma de la fuente; sin
+        `positions` la línea y la columna se calculan con su índice de líneas.
+        `kinds` marca cada fila como eliminada, agregada o desplazada (ver
+        `diff_spans`).
+        """
+        self.beginResetModel()
+        self.messages = []
+        self.spans = spans
+        self.source = source
+        self.values = values
+        self.positions = positions
+        self.kinds = kinds
+        self._shown = len(spans)
+        self.endResetModel()
+
+    def sync_appended(self):
+        """Notifica a la vista las filas que se agregaron a los spans (modo seguimiento)"""
+        count = len(self.spans)
+        if count > self._shown:
+            self.beginInsertRows(QModelIndex(), self._shown, count - 1)
+            self._shown = count
+            self.endInsertRows()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._shown
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        row = index.row()
+        if self.messages:
+            return self.messages[row] if role == Qt.ItemDataRole.DisplayRole else None
+        if role == Qt.ItemDataRole.UserRole:
+            return self.spans[row]
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        start, end = self.spans[row]
+        if self.positions is not None:
+            line, column = self.positions[row]
+        else:
+            line, column = self.source.position(start)
+        marker = self.KIND_MARKERS[self.kinds[row]] if self.kinds is not None else ''
+        if self.values is not None:
+            value = self.values[row]
+        elif self.source is not None:
+            value = self.source.slice(start, end)
+        else:
+            return f"{marker}{row + 1}. {line + 1}:{column + 1}"
+        return f"{marker}{row + 1}. {line + 1}:{column + 1}  '{value}'"
 
 class RegexWorker(QThread):
     """Worker thread para procesar regex sin bloquear la UI"""
     finished = pyqtSignal(dict)
     error = pyqtSignal(str)
     
-    def __init__(self, pattern, text):
+    def __init__(self, pattern, text, cache=None, mode='full', limit=None, use_index=False, index=None):
         super().__init__()
         self.pattern = pattern
         self.text = text
+        self.cache = cache
+        self.mode = mode
+        self.limit = limit
+        self.use_index = use_index
+        self.index = index
         self.validator = RegexValidator()
     
     def run(self):
@@ -202,135 +438,729 @@ class RegexWorker(QThread):
                 self.error.emit(f"Error en la expresión regular: {error_msg}")
                 return
             
-            # Encontrar coincidencias
-            matches, error = self.validator.find_matches(self.pattern, self.text)
+            # Un análisis repetido se resuelve sin recorrer el texto
+            cache_key = None
+            if self.cache is not None:
+                cache_key = self.cache.make_key(self.pattern, 0, self.text, (self.mode, self.limit))
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    self.finished.emit(dict(cached, cached=True))
+                    return
+            
+            # El índice de trigramas se construye una vez por texto y se reutiliza
+            line_index = LineIndex(self.text)
+            index = None
+            if self.use_index:
+                index = self.index
+                if index is None or not index.matches_text(self.text):
+                    index = TrigramIndex.build(self.text, line_index=line_index)
+            
+            # Encontrar coincidencias y posiciones en una sola pasada
+            result, error = self.validator.scan(self.pattern, self.text, self.mode, self.limit, index=index)
             if error:
                 self.error.emit(f"Error al procesar: {error}")
                 return
             
-            # Obtener posiciones de coincidencias
-            positions, error = self.validator.get_match_positions(self.pattern, self.text)
-            if error:
-                self.error.emit(f"Error al obtener posiciones: {error}")
+            result['is_valid'] = is_valid
+            result['line_index'] = line_index
+            if index is not None:
+                candidates = index.candidate_blocks(self.validator.compile(self.pattern))
+                result['index_stats'] = {
+                    'blocks': index.block_count(),
+                    'candidates': index.block_count() if candidates is None else len(candidates),
+                }
+            
+            if cache_key is not None:
+                self.cache.put(cache_key, result)
+            self.finished.emit(dict(result, trigram_index=index))
+            
+        except Exception as e:
+            self.error.emit(f"Error inesperado: {str(e)}")
+
+class ProcessRegexWorker(QThread):
+    """Worker que delega la búsqueda al pool de procesos para no competir por el GIL"""
+    finished = pyqtSignal(dict)
+    error = pyqtSignal(str)
+    
+    def __init__(self, pattern, text, cache=None, mode='full', limit=None):
+        super().__init__()
+        self.pattern = pattern
+        self.text = text
+        self.cache = cache
+        self.mode = mode
+        self.limit = limit
+        self.validator = RegexValidator()
+    
+    def run(self):
+        try:
+            is_valid, error_msg = self.validator.verify_regex(self.pattern)
+            
+            if not is_valid:
+                self.error.emit(f"Error en la expresión regular: {error_msg}")
                 return
             
+            cache_key = None
+            if self.cache is not None:
+                cache_key = self.cache.make_key(self.pattern, 0, self.text, (self.mode, self.limit))
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    self.finished.emit(dict(cached, cached=True))
+                    return
+            
+            # El hilo sólo espera al proceso hijo, que también indexa las líneas;
+            # los spans y los inicios de línea vuelven por memoria compartida
+            with SharedText(self.text) as shared:
+                future = get_process_pool().submit(_scan_to_shared_memory, self.pattern, 0, shared.ref,
+                                                   self.mode, self.limit, True, SpanList.memory_budget)
+                name, span_count, count, complete, line_count = future.result()
+            spans, line_starts = read_shared_result(name, span_count, line_count, SpanList.memory_budget)
+            
             result = {
                 'is_valid': is_valid,
-                'matches': matches,
-                'positions': positions,
-                'match_count': len(matches) if matches else 0
+                'mode': self.mode,
+                'matches': None,
+                'spans': spans,
+                'line_index': LineIndex.from_starts(line_starts, len(self.text)),
+                'match_count': count,
+                'complete': complete
             }
             
+            if cache_key is not None:
+                self.cache.put(cache_key, result)
             self.finished.emit(result)
             
         except Exception as e:
             self.error.emit(f"Error inesperado: {str(e)}")
 
+class CompareWorker(QThread):
+    """Worker que busca dos patrones a la vez en el pool de procesos y compara sus spans"""
+    finished = pyqtSignal(dict)
+    error = pyqtSignal(str)
+    
+    def __init__(self, old_pattern, new_pattern, text, cache=None):
+        super().__init__()
+        self.patterns = (old_pattern, new_pattern)
+        self.text = text
+        self.cache = cache
+        self.validator = RegexValidator()
+    
+    def run(self):
+        try:
+            for label, pattern in zip(("actual", "alternativo"), self.patterns):
+                is_valid, error_msg = self.validator.verify_regex(pattern)
+                if not is_valid:
+                    self.error.emit(f"Error en el patrón {label}: {error_msg}")
+                    return
+            
+            # Se reutilizan los resultados en caché; el resto corre en paralelo en el pool
+            spans = [None, None]
+            line_index = None
+            pending = []
+            for side, pattern in enumerate(self.patterns):
+                if self.cache is not None:
+                    cached = self.cache.get(self.cache.make_key(pattern, 0, self.text, ('full', None)))
+                    if cached is not None:
+                        spans[side] = cached['spans']
+                        line_index = line_index or cached.get('line_index')
+                        continue
+                pending.append(side)
+            if pending:
+                # Ambas búsquedas leen el mismo segmento de texto compartido; la primera indexa las líneas
+                with SharedText(self.text) as shared:
+                    futures = {side: get_process_pool().submit(_scan_to_shared_memory, self.patterns[side], 0,
+                                                               shared.ref, 'full', None,
+                                                               line_index is None and side == pending[0],
+                                                               SpanList.memory_budget)
+                               for side in pending}
+                    for side, future in futures.items():
+                        name, span_count, _count, _complete, line_count = future.result()
+                        spans[side], line_starts = read_shared_result(name, span_count, line_count,
+                                                                      SpanList.memory_budget)
+                        if line_starts is not None:
+                            line_index = LineIndex.from_starts(line_starts, len(self.text))
+            
+            result = diff_spans(*spans)
+            result['counts'] = (len(spans[0]), len(spans[1]))
+            result['line_index'] = line_index or LineIndex(self.text)
+            self.finished.emit(result)
+        except Exception as e:
+            self.error.emit(f"Error inesperado: {str(e)}")
+
+class CostWorker(QThread):
+    """Worker thread para estimar el costo de la regex sin bloquear la UI"""
+    finished = pyqtSignal(dict)
+    error = pyqtSignal(str)
+
+    def __init__(self, pattern, text, flags=0):
+        super().__init__()
+        self.pattern = pattern
+        self.text = text
+        self.flags = flags
+        self.analyzer = RegexCostAnalyzer()
+
+    def run(self):
+        try:
+            report, error = self.analyzer.analyze(self.pattern, self.text, self.flags)
+            if error:
+                self.error.emit(f"Error en la expresión regular: {error}")
+                return
+            self.finished.emit(report)
+        except Exception as e:
+            self.error.emit(f"Error inesperado: {str(e)}")
+
+class AggregateWorker(QThread):
+    """Worker thread para calcular el histograma de coincidencias"""
+    finished = pyqtSignal(dict)
+    error = pyqtSignal(str)
+
+    def __init__(self, pattern, text, group=0, top_k=100):
+        super().__init__()
+        self.pattern = pattern
+        self.text = text
+        self.group = group
+        self.top_k = top_k
+        self.validator = RegexValidator()
+
+    def run(self):
+        try:
+            result, error = self.validator.aggregate(self.pattern, self.text, self.group, self.top_k)
+            if error:
+                self.error.emit(f"Error al agregar: {error}")
+                return
+            self.finished.emit(result)
+        except Exception as e:
+            self.error.emit(f"Error inesperado: {str(e)}")
+
+class FollowWorker(QThread):
+    """Worker thread para leer y buscar lo agregado a un archivo seguido"""
+    finished = pyqtSignal(dict)
+    error = pyqtSignal(str)
+
+    def __init__(self, follower):
+        super().__init__()
+        self.follower = follower
+
+    def run(self):
+        try:
+            # Siempre se emite (vacío si no hubo nada nuevo) para que la interfaz sepa que terminó
+            self.finished.emit(self.follower.poll() or {})
+        except OSError as e:
+            self.error.emit(f"No se pudo leer el archivo: {e}")
+        except Exception as e:
+            self.error.emit(f"Error inesperado: {str(e)}")
+
+class FileScanWorker(QThread):
+    """Worker thread para buscar en un archivo (posiblemente comprimido) por bloques"""
+    finished = pyqtSignal(dict)
+    error = pyqtSignal(str)
+
+    def __init__(self, pattern, path, mode='full', limit=None):
+        super().__init__()
+        self.pattern = pattern
+        self.path = path
+        self.mode = mode
+        self.limit = limit
+        self.validator = RegexValidator()
+
+    def run(self):
+        try:
+            result, error = self.validator.scan_file(self.pattern, self.path, self.mode, self.limit)
+            if error:
+                self.error.emit(f"Error al procesar el archivo: {error}")
+                return
+            result['path'] = self.path
+            # El índice de líneas del visor se construye aquí, fuera del hilo de la interfaz
+            result['source'] = None
+            if detect_compression(self.path) is None:
+                try:
+                    result['source'] = MmapTextSource(self.path)
+                except (OSError, ValueError):
+                    pass
+            self.finished.emit(result)
+        except Exception as e:
+            self.error.emit(f"Error inesperado: {str(e)}")
+
+class SubstituteWorker(QThread):
+    """Worker thread para reescribir un archivo con la regex por bloques"""
+    finished = pyqtSignal(dict)
+    error = pyqtSignal(str)
+
+    def __init__(self, pattern, template, source_path, target_path):
+        super().__init__()
+        self.pattern = pattern
+        self.template = template
+        self.source_path = source_path
+        self.target_path = target_path
+        self.validator = RegexValidator()
+
+    def run(self):
+        try:
+            count, error = self.validator.substitute_file(self.pattern, self.template,
+                                                          self.source_path, self.target_path)
+            if error:
+                self.error.emit(f"Error al reemplazar: {error}")
+                return
+            self.finished.emit({'count': count, 'target_path': self.target_path})
+        except Exception as e:
+            self.error.emit(f"Error inesperado: {str(e)}")
+
+class ExportWorker(QThread):
+    """Worker thread para exportar coincidencias sin pasar por la lista de la interfaz"""
+    finished = pyqtSignal(dict)
+    error = pyqtSignal(str)
+
+    def __init__(self, pattern, fmt, path, source, spans, source_path=None):
+        super().__init__()
+        self.pattern = pattern
+        self.fmt = fmt
+        self.path = path
+        self.source = source
+        self.spans = spans
+        self.source_path = source_path
+        self.validator = RegexValidator()
+
+    def run(self):
+        try:
+            exporter = MatchExporter(self.validator.compile(self.pattern), self.source, self.spans,
+                                     source_path=self.source_path)
+            count = exporter.write(self.path, self.fmt)
+            self.finished.emit({'count': count, 'path': self.path})
+        except (OSError, ValueError, re.error) as e:
+            self.error.emit(f"Error al exportar: {e}")
+        except Exception as e:
+            self.error.emit(f"Error inesperado: {str(e)}")
+
+class SessionWorker(QThread):
+    """Worker thread para guardar (con `state`) o abrir una sesión sin bloquear la interfaz"""
+    finished = pyqtSignal(dict)
+    error = pyqtSignal(str)
+
+    def __init__(self, path, source=None, spans=None, state=None):
+        super().__init__()
+        self.path = path
+        self.source = source
+        self.spans = spans
+        self.state = state
+
+    def run(self):
+        try:
+            if self.state is not None:
+                size = SessionSnapshot.save(self.path, self.source, self.spans, self.state)
+                self.finished.emit({'path': self.path, 'bytes': size})
+            else:
+                self.finished.emit({'path': self.path, 'snapshot': SessionSnapshot.load(self.path)})
+        except (OSError, ValueError, KeyError, struct.error) as e:
+            self.error.emit(f"Error en la sesión: {e}")
+        except Exception as e:
+            self.error.emit(f"Error inesperado: {str(e)}")
+
+class SuiteWorker(QThread):
+    """Worker thread para ejecutar una suite de patrones en el pool de procesos"""
+    finished = pyqtSignal(dict)
+    error = pyqtSignal(str)
+
+    def __init__(self, path, timeout=1.0):
+        super().__init__()
+        self.path = path
+        self.timeout = timeout
+
+    def run(self):
+        try:
+            suite = PatternSuite.load(self.path)
+            self.finished.emit(suite.run(timeout=self.timeout))
+        except (OSError, ValueError, KeyError) as e:
+            self.error.emit(f"No se pudo cargar la suite: {e}")
+        except Exception as e:
+            self.error.emit(f"Error inesperado: {str(e)}")
+
+class LibraryWarmupWorker(QThread):
+    """Worker de baja prioridad que precompila la biblioteca de patrones guardada"""
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(dict)
+    error = pyqtSignal(str)
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self.validator = RegexValidator()
+
+    def run(self):
+        try:
+            library = PatternSuite.load(self.path)
+            # La interfaz analiza sin banderas (las inline, como (?i), van en el patrón):
+            # se precalienta con las mismas claves que usará el primer Analizar
+            report = library.warm_up(self.validator, progress=self.progress.emit,
+                                     cancelled=self.isInterruptionRequested, flags=0)
+            report['path'] = self.path
+            self.finished.emit(report)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            self.error.emit(f"No se pudo cargar la biblioteca de patrones: {e}")
+        except Exception as e:
+            self.error.emit(f"Error inesperado: {str(e)}")
+
+class AutomatonWorker(QThread):
+    """Worker thread para construir el DFA mínimo o comparar dos patrones"""
+    finished = pyqtSignal(dict)
+    error = pyqtSignal(str)
+
+    def __init__(self, pattern, other=None):
+        super().__init__()
+        self.pattern = pattern
+        self.other = other
+        self.validator = RegexValidator()
+
+    def run(self):
+        try:
+            if self.other is not None:
+                result, error = self.validator.compare_patterns(self.pattern, self.other)
+            else:
+                dfa, error = self.validator.build_dfa(self.pattern)
+                result = None if error else {
+                    'states': dfa.state_count,
+                    'classes': dfa.classes,
+                    'memory': dfa.memory_bytes(),
+                    **dfa.stats,
+                }
+            if error:
+                self.error.emit(error)
+                return
+            self.finished.emit(result)
+        except Exception as e:
+            self.error.emit(f"Error inesperado: {str(e)}")
+
+# Hoja de estilo única de la aplicación: los widgets sólo declaran su nombre
+# de objeto o propiedades (`scheme`, `state`, `kind`) y Qt la interpreta una vez
+APP_STYLE_SHEET = """
+    QWidget {
+        background: transparent;
+    }
+    QMainWindow {
+        background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+            stop:0 #F8FAFC, stop:1 #F1F5F9);
+    }
+    
+    QPushButton[scheme="primary"], QPushButton[scheme="success"], QPushButton[scheme="danger"] {
+        border: none;
+        border-radius: 8px;
+        color: white;
+        padding: 12px 24px;
+        font-weight: 600;
+        font-size: 14px;
+    }
+    QPushButton[scheme="primary"] {
+        background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+            stop:0 #3B82F6, stop:1 #2563EB);
+    }
+    QPushButton[scheme="primary"]:hover {
+        background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+            stop:0 #60A5FA, stop:1 #3B82F6);
+    }
+    QPushButton[scheme="primary"]:pressed {
+        background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+            stop:0 #2563EB, stop:1 #1D4ED8);
+    }
+    QPushButton[scheme="primary"]:disabled {
+        background: #E5E7EB;
+        color: #9CA3AF;
+    }
+    QPushButton[scheme="success"] {
+        background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+            stop:0 #10B981, stop:1 #059669);
+    }
+    QPushButton[scheme="success"]:hover {
+        background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+            stop:0 #34D399, stop:1 #10B981);
+    }
+    QPushButton[scheme="success"]:pressed {
+        background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+            stop:0 #059669, stop:1 #047857);
+    }
+    QPushButton[scheme="danger"] {
+        background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+            stop:0 #EF4444, stop:1 #DC2626);
+    }
+    QPushButton[scheme="danger"]:hover {
+        background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+            stop:0 #F87171, stop:1 #EF4444);
+    }
+    QPushButton[scheme="danger"]:pressed {
+        background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+            stop:0 #DC2626, stop:1 #B91C1C);
+    }
+    QPushButton[scheme="secondary"] {
+        background: #F3F4F6;
+        border: 2px solid #E5E7EB;
+        border-radius: 8px;
+        color: #374151;
+        padding: 12px 24px;
+        font-weight: 600;
+        font-size: 14px;
+    }
+    QPushButton[scheme="secondary"]:hover {
+        background: #E5E7EB;
+        border-color: #D1D5DB;
+    }
+    QPushButton[scheme="secondary"]:pressed {
+        background: #D1D5DB;
+    }
+    
+    QSplitter::handle {
+        background: #E5E7EB;
+        width: 2px;
+        border-radius: 1px;
+    }
+    QSplitter::handle:hover {
+        background: #3B82F6;
+    }
+    QFrame#header {
+        background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+            stop:0 #E2E8F0, stop:1 #CBD5E1);
+        border-radius: 16px;
+        border: 1px solid #94A3B8;
+    }
+    QFrame#logoBadge {
+        background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
+            stop:0 #3B82F6, stop:1 #1D4ED8);
+        border-radius: 45px;
+        border: 3px solid white;
+    }
+    QLabel#logoLabel {
+        color: white;
+        font-size: 24px;
+        font-weight: bold;
+        background: transparent;
+        border: none;
+    }
+    QGroupBox {
+        font-weight: 700;
+        font-size: 16px;
+        color: #374151;
+        border: 2px solid #E5E7EB;
+        border-radius: 16px;
+        margin-top: 16px;
+        padding-top: 20px;
+        background: white;
+    }
+    QGroupBox::title {
+        subcontrol-origin: margin;
+        left: 20px;
+        padding: 0 12px 0 12px;
+        background: white;
+    }
+    
+    QTextEdit#regexInput, QTextEdit#textInput {
+        border: 2px solid #E5E7EB;
+        border-radius: 12px;
+        padding: 16px;
+        background: #FAFAFA;
+    }
+    QTextEdit#regexInput {
+        font-family: 'JetBrains Mono', 'Consolas', monospace;
+        font-size: 14px;
+    }
+    QTextEdit#textInput {
+        font-family: 'Inter', sans-serif;
+        font-size: 13px;
+    }
+    QTextEdit#regexInput:focus, QTextEdit#textInput:focus {
+        border-color: #3B82F6;
+        background: white;
+    }
+    
+    QLabel#statsLabel {
+        font-weight: 700;
+        font-size: 16px;
+        color: #6B7280;
+        background: #F9FAFB;
+        border: 2px solid #E5E7EB;
+        border-radius: 12px;
+        padding: 20px;
+    }
+    QLabel#statsLabel[state="empty"] {
+        color: #EF4444;
+        background: #FEF2F2;
+        border-color: #FECACA;
+    }
+    QLabel#statsLabel[state="found"] {
+        color: #059669;
+        background: #ECFDF5;
+        border-color: #A7F3D0;
+    }
+    QLabel#wordCountLabel {
+        font-weight: 600;
+        font-size: 14px;
+        color: #6B7280;
+        background: #F9FAFB;
+        border: 2px solid #E5E7EB;
+        border-radius: 12px;
+        padding: 16px;
+        margin-top: 8px;
+    }
+    QLabel#libraryLabel {
+        font-size: 12px;
+        color: #9CA3AF;
+        padding: 0 8px;
+    }
+    QLabel#diagnosticsLabel {
+        font-size: 12px;
+        color: #9CA3AF;
+        padding: 4px 16px;
+    }
+    
+    QListView#matchesList, QTableWidget#topTable {
+        border: 2px solid #E5E7EB;
+        border-radius: 12px;
+        background: #FAFAFA;
+        font-family: 'JetBrains Mono', 'Consolas', monospace;
+        font-size: 12px;
+    }
+    QListView#matchesList::item {
+        padding: 12px 16px;
+        border-bottom: 1px solid #F3F4F6;
+        background: white;
+        margin: 2px;
+        border-radius: 8px;
+    }
+    QListView#matchesList::item:selected {
+        background: #DBEAFE;
+        color: #1D4ED8;
+        border: 2px solid #3B82F6;
+    }
+    QListView#matchesList::item:hover {
+        background: #F3F4F6;
+    }
+    QAbstractScrollArea#highlightedText {
+        border: 2px solid #E5E7EB;
+        border-radius: 12px;
+        background: white;
+    }
+    
+    QStatusBar {
+        background: #F9FAFB;
+        border-top: 2px solid #E5E7EB;
+        color: #6B7280;
+        font-weight: 500;
+        padding: 8px 16px;
+    }
+    QProgressBar {
+        border: 2px solid #E5E7EB;
+        border-radius: 8px;
+        background: #F3F4F6;
+        text-align: center;
+    }
+    QProgressBar::chunk {
+        background: qlineargradient(x1:0, y1:0, x2:1, y2:0,
+            stop:0 #3B82F6, stop:1 #1D4ED8);
+        border-radius: 6px;
+    }
+    
+    QMessageBox {
+        background: white;
+        border-radius: 12px;
+    }
+    QMessageBox QLabel {
+        color: #374151;
+        font-size: 14px;
+    }
+    QMessageBox QPushButton {
+        color: white;
+        border: none;
+        border-radius: 6px;
+        padding: 8px 16px;
+        font-weight: 600;
+    }
+    QMessageBox[kind="success"] QPushButton { background: #3B82F6; }
+    QMessageBox[kind="success"] QPushButton:hover { background: #2563EB; }
+    QMessageBox[kind="warning"] QPushButton { background: #F59E0B; }
+    QMessageBox[kind="warning"] QPushButton:hover { background: #D97706; }
+    QMessageBox[kind="error"] QPushButton { background: #EF4444; }
+    QMessageBox[kind="error"] QPushButton:hover { background: #DC2626; }
+    
+    QLabel#helpTitle {
+        font-size: 24px;
+        font-weight: bold;
+        margin-bottom: 20px;
+        padding: 20px;
+        background: qlineargradient(x1:0, y1:0, x2:1, y2:0,
+            stop:0 #3B82F6, stop:1 #1D4ED8);
+        color: white;
+        border-radius: 12px;
+    }
+    QScrollArea#helpScroll {
+        border: 2px solid #E2E8F0;
+        border-radius: 12px;
+        background: white;
+    }
+    QScrollArea#helpScroll QScrollBar:vertical {
+        background: #F1F5F9;
+        width: 12px;
+        border-radius: 6px;
+    }
+    QScrollArea#helpScroll QScrollBar::handle:vertical {
+        background: #CBD5E1;
+        border-radius: 6px;
+        min-height: 20px;
+    }
+    QScrollArea#helpScroll QScrollBar::handle:vertical:hover {
+        background: #94A3B8;
+    }
+"""
+
 class ModernButton(QPushButton):
-    """Botón con estilo moderno"""
+    """Botón con estilo moderno (el esquema de color lo aplica `APP_STYLE_SHEET`)"""
     def __init__(self, text, color_scheme="primary", icon=None):
         super().__init__(text)
         self.color_scheme = color_scheme
+        self.setProperty("scheme", color_scheme)
         self.setMinimumHeight(44)
         self.setFont(QFont("Segoe UI", 11, QFont.Weight.Medium))
-        self.setStyleSheet(self.get_style())
-        
-    def get_style(self):
-        if self.color_scheme == "primary":
-            return """
-                QPushButton {
-                    background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                        stop:0 #3B82F6, stop:1 #2563EB);
-                    border: none;
-                    border-radius: 8px;
-                    color: white;
-                    padding: 12px 24px;
-                    font-weight: 600;
-                    font-size: 14px;
-                }
-                QPushButton:hover {
-                    background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                        stop:0 #60A5FA, stop:1 #3B82F6);
-                    transform: translateY(-1px);
-                }
-                QPushButton:pressed {
-                    background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                        stop:0 #2563EB, stop:1 #1D4ED8);
-                }
-                QPushButton:disabled {
-                    background: #E5E7EB;
-                    color: #9CA3AF;
-                }
-            """
-        elif self.color_scheme == "success":
-            return """
-                QPushButton {
-                    background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                        stop:0 #10B981, stop:1 #059669);
-                    border: none;
-                    border-radius: 8px;
-                    color: white;
-                    padding: 12px 24px;
-                    font-weight: 600;
-                    font-size: 14px;
-                }
-                QPushButton:hover {
-                    background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                        stop:0 #34D399, stop:1 #10B981);
-                }
-                QPushButton:pressed {
-                    background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                        stop:0 #059669, stop:1 #047857);
-                }
-            """
-        elif self.color_scheme == "danger":
-            return """
-                QPushButton {
-                    background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                        stop:0 #EF4444, stop:1 #DC2626);
-                    border: none;
-                    border-radius: 8px;
-                    color: white;
-                    padding: 12px 24px;
-                    font-weight: 600;
-                    font-size: 14px;
-                }
-                QPushButton:hover {
-                    background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                        stop:0 #F87171, stop:1 #EF4444);
-                }
-                QPushButton:pressed {
-                    background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                        stop:0 #DC2626, stop:1 #B91C1C);
-                }
-            """
-        else:  # secondary
-            return """
-                QPushButton {
-                    background: #F3F4F6;
-                    border: 2px solid #E5E7EB;
-                    border-radius: 8px;
-                    color: #374151;
-                    padding: 12px 24px;
-                    font-weight: 600;
-                    font-size: 14px;
-                }
-                QPushButton:hover {
-                    background: #E5E7EB;
-                    border-color: #D1D5DB;
-                }
-                QPushButton:pressed {
-                    background: #D1D5DB;
-                }
-            """
 
 class RegexMainWindow(QMainWindow):
     """Ventana principal de la aplicación"""
+    
+    SCAN_MODE_LABELS = [
+        ("Completo", 'full'),
+        ("Primeras N", 'limit'),
+        ("Sólo contar", 'count'),
+        ("Sólo existencia", 'exists'),
+        ("Frecuencias (top-K)", 'aggregate'),
+    ]
+    # A partir de este tamaño el modo completo se limita salvo que se pida "Cargar todo"
+    LARGE_TEXT_THRESHOLD = 5_000_000
+    DEFAULT_LARGE_LIMIT = 1000
+    FOLLOW_INTERVAL_MS = 500
+    SUITE_TIMEOUT = 1.0
+    # Biblioteca de patrones favoritos (formato de `PatternSuite`; las muestras son opcionales)
+    LIBRARY_PATH = os.path.join(os.path.expanduser("~"), ".regex_studio", "biblioteca.json")
+    
     def __init__(self):
         super().__init__()
         self.validator = RegexValidator()
-        self.init_ui()
+        self.result_cache = MatchResultCache()
+        self.trigram_index = None
+        self.result_pattern = None
+        self.result_mode = 'full'
+        self.result_complete = True
+        # Último análisis de un archivo comprimido (sus spans no están en el visor)
+        self.streamed_scan = None
+        self.follower = None
+        self.follow_worker = None
+        self.follow_busy = False
+        self.follow_count = 0
+        self.follow_timer = QTimer(self)
+        self.follow_timer.setInterval(self.FOLLOW_INTERVAL_MS)
+        self.follow_timer.timeout.connect(self.poll_follow)
+        # La ventana de ayuda, la tabla de frecuencias y el diagnóstico se construyen en su primer uso
+        self.help_window = None
+        self.top_group = None
+        self.diagnostics_label = None
+        self.first_painted = False
+        self.library_worker = None
+        self.library_report = None
         self.apply_modern_style()
+        startup_mark('style')
+        self.init_ui()
+        startup_mark('ui')
         
     def init_ui(self):
         self.setWindowTitle("Regex Studio - Analizador de Expresiones Regulares")
@@ -350,16 +1180,6 @@ class RegexMainWindow(QMainWindow):
         
         # Splitter principal
         main_splitter = QSplitter(Qt.Orientation.Horizontal)
-        main_splitter.setStyleSheet("""
-            QSplitter::handle {
-                background: #E5E7EB;
-                width: 2px;
-                border-radius: 1px;
-            }
-            QSplitter::handle:hover {
-                background: #3B82F6;
-            }
-        """)
         main_layout.addWidget(main_splitter)
         
         # Panel izquierdo - Entrada
@@ -377,43 +1197,24 @@ class RegexMainWindow(QMainWindow):
     def create_header(self, parent_layout):
         """Crear encabezado con logo a la izquierda y botones"""
         header_frame = QFrame()
+        header_frame.setObjectName("header")
         header_frame.setFixedHeight(120)  # Altura aumentada para evitar cortes
-        header_frame.setStyleSheet("""
-            QFrame {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                    stop:0 #E2E8F0, stop:1 #CBD5E1);
-                border-radius: 16px;
-                border: 1px solid #94A3B8;
-            }
-        """)
         header_layout = QHBoxLayout(header_frame)
         header_layout.setContentsMargins(20, 15, 20, 15)
         header_layout.setSpacing(20)
         
         # Contenedor del logo con fondo circular
         logo_container = QFrame()
+        logo_container.setObjectName("logoBadge")
         logo_container.setFixedSize(90, 90)  # Tamaño optimizado
-        logo_container.setStyleSheet("""
-            QFrame {
-                background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
-                    stop:0 #3B82F6, stop:1 #1D4ED8);
-                border-radius: 45px;
-                border: 3px solid white;
-            }
-        """)
         logo_container_layout = QHBoxLayout(logo_container)
         logo_container_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
         logo_container_layout.setContentsMargins(8, 8, 8, 8)
         
         # Logo
         logo_label = QLabel()
+        logo_label.setObjectName("logoLabel")
         logo_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        logo_label.setStyleSheet("""
-            QLabel {
-                background: transparent;
-                border: none;
-            }
-        """)
         
         # Cargar y escalar el logo con mejor calidad
         try:
@@ -425,24 +1226,8 @@ class RegexMainWindow(QMainWindow):
                 logo_label.setPixmap(scaled_pixmap)
             else:
                 logo_label.setText("REGEX")
-                logo_label.setStyleSheet("""
-                    QLabel {
-                        color: white;
-                        font-size: 24px;
-                        font-weight: bold;
-                        background: transparent;
-                    }
-                """)
         except:
             logo_label.setText("REGEX")
-            logo_label.setStyleSheet("""
-                QLabel {
-                    color: white;
-                    font-size: 24px;
-                    font-weight: bold;
-                    background: transparent;
-                }
-            """)
         
         logo_container_layout.addWidget(logo_label)
         header_layout.addWidget(logo_container)
@@ -485,25 +1270,9 @@ class RegexMainWindow(QMainWindow):
         
         # Campo de entrada de regex
         self.regex_input = QTextEdit()
+        self.regex_input.setObjectName("regexInput")
         self.regex_input.setMaximumHeight(100)
         self.regex_input.setPlaceholderText("Ingrese su expresión regular aquí...\nEjemplo: \\d{3}-\\d{3}-\\d{4}")
-        self.regex_input.setStyleSheet("""
-            QTextEdit {
-                border: 2px solid #E5E7EB;
-                border-radius: 12px;
-                padding: 16px;
-                font-family: 'JetBrains Mono', 'Consolas', monospace;
-                font-size: 14px;
-                background: #FAFAFA;
-                line-height: 1.5;
-            }
-            QTextEdit:focus {
-                border-color: #3B82F6;
-                background: white;
-                box-shadow: 0 0 0 3px rgba(59, 130, 246, 0.1);
-            }
-        """)
-        
         # Aplicar resaltador de sintaxis
         self.highlighter = RegexHighlighter(self.regex_input.document())
         
@@ -517,41 +1286,162 @@ class RegexMainWindow(QMainWindow):
         self.validate_btn.clicked.connect(self.validate_regex)
         
         self.process_btn = ModernButton("Analizar", "success")
-        self.process_btn.clicked.connect(self.process_text)
+        self.process_btn.clicked.connect(lambda: self.process_text())
         self.process_btn.setEnabled(False)
         
+        self.cost_btn = ModernButton("Costo", "secondary")
+        self.cost_btn.setToolTip("Mapa de calor del trabajo del motor por línea")
+        self.cost_btn.clicked.connect(self.estimate_cost)
+        
+        self.scan_file_btn = ModernButton("Analizar archivo...", "secondary")
+        self.scan_file_btn.setToolTip("Busca en un archivo por bloques (admite .gz, .bz2 y .xz)")
+        self.scan_file_btn.clicked.connect(self.process_file)
+        
+        self.follow_btn = ModernButton("Seguir archivo...", "secondary")
+        self.follow_btn.setToolTip("Vigila un log que crece y muestra las coincidencias nuevas")
+        self.follow_btn.clicked.connect(self.toggle_follow)
+        
+        self.export_btn = ModernButton("Exportar...", "secondary")
+        self.export_btn.setToolTip("Guarda las coincidencias en CSV, JSONL o un archivo binario de spans")
+        self.export_btn.clicked.connect(self.export_results)
+        
+        self.load_spans_btn = ModernButton("Cargar spans...", "secondary")
+        self.load_spans_btn.setToolTip("Recupera un archivo de spans exportado sin volver a buscar")
+        self.load_spans_btn.clicked.connect(self.load_spans)
+        
+        self.save_session_btn = ModernButton("Guardar sesión...", "secondary")
+        self.save_session_btn.setToolTip("Guarda texto o archivo, patrones, spans e índice de líneas en un archivo binario")
+        self.save_session_btn.clicked.connect(self.save_session)
+        
+        self.open_session_btn = ModernButton("Abrir sesión...", "secondary")
+        self.open_session_btn.setToolTip("Reabre una sesión sin volver a buscar si la fuente no cambió")
+        self.open_session_btn.clicked.connect(self.open_session)
+        
+        self.suite_btn = ModernButton("Pruebas...", "secondary")
+        self.suite_btn.setToolTip("Ejecuta una suite de patrones con muestras positivas y negativas")
+        self.suite_btn.clicked.connect(self.run_suite)
+        
         self.clear_btn = ModernButton("Limpiar", "danger")
         self.clear_btn.clicked.connect(self.clear_all)
         
         button_layout.addWidget(self.validate_btn)
         button_layout.addWidget(self.process_btn)
+        button_layout.addWidget(self.cost_btn)
+        button_layout.addWidget(self.scan_file_btn)
+        button_layout.addWidget(self.follow_btn)
+        button_layout.addWidget(self.export_btn)
+        button_layout.addWidget(self.load_spans_btn)
+        button_layout.addWidget(self.save_session_btn)
+        button_layout.addWidget(self.open_session_btn)
+        button_layout.addWidget(self.suite_btn)
         button_layout.addWidget(self.clear_btn)
         button_layout.addStretch()
         
         regex_layout.addLayout(button_layout)
         
+        # Opciones de búsqueda
+        options_layout = QHBoxLayout()
+        options_layout.setSpacing(12)
+        
+        options_layout.addWidget(QLabel("Modo:"))
+        self.mode_combo = QComboBox()
+        for label, mode in self.SCAN_MODE_LABELS:
+            self.mode_combo.addItem(label, mode)
+        self.mode_combo.currentIndexChanged.connect(self.on_mode_changed)
+        options_layout.addWidget(self.mode_combo)
+        
+        self.limit_spin = QSpinBox()
+        self.limit_spin.setRange(1, 10000000)
+        self.limit_spin.setValue(100)
+        self.limit_spin.setPrefix("N = ")
+        self.limit_spin.setEnabled(False)
+        options_layout.addWidget(self.limit_spin)
+        
+        self.group_spin = QSpinBox()
+        self.group_spin.setRange(0, 99)
+        self.group_spin.setPrefix("Grupo ")
+        self.group_spin.setToolTip("Grupo de captura a contar (0 = coincidencia completa)")
+        self.group_spin.setVisible(False)
+        options_layout.addWidget(self.group_spin)
+        
+        self.load_all_btn = ModernButton("Cargar todo", "secondary")
+        self.load_all_btn.setToolTip("Repetir el análisis sin límite de coincidencias")
+        self.load_all_btn.clicked.connect(lambda: self.process_text(load_all=True))
+        self.load_all_btn.setVisible(False)
+        options_layout.addWidget(self.load_all_btn)
+        
+        options_layout.addStretch()
+        
+        self.index_check = QCheckBox("Índice de trigramas")
+        self.index_check.setToolTip("Indexa el texto una vez y sólo recorre los bloques candidatos en cada análisis")
+        options_layout.addWidget(self.index_check)
+        
+        self.process_pool_check = QCheckBox("Usar procesos")
+        self.process_pool_check.setToolTip("Ejecuta la búsqueda en un pool de procesos para textos grandes")
+        options_layout.addWidget(self.process_pool_check)
+        
+        self.budget_spin = QSpinBox()
+        self.budget_spin.setRange(16, 65536)
+        self.budget_spin.setValue(SpanList.memory_budget // (1024 * 1024))
+        self.budget_spin.setPrefix("Memoria ")
+        self.budget_spin.setSuffix(" MB")
+        self.budget_spin.setToolTip("Memoria para los spans de resultados; lo que exceda se guarda en disco")
+        self.budget_spin.valueChanged.connect(self.on_budget_changed)
+        options_layout.addWidget(self.budget_spin)
+        
+        regex_layout.addLayout(options_layout)
+        
+        # Reemplazo
+        replace_layout = QHBoxLayout()
+        replace_layout.setSpacing(12)
+        
+        self.template_input = QLineEdit()
+        self.template_input.setPlaceholderText("Plantilla de reemplazo (admite \\1, \\g<nombre>)")
+        replace_layout.addWidget(self.template_input)
+        
+        self.preview_btn = ModernButton("Vista previa", "secondary")
+        self.preview_btn.setToolTip("Diff del reemplazo sobre la parte visible del texto")
+        self.preview_btn.clicked.connect(self.preview_substitution)
+        replace_layout.addWidget(self.preview_btn)
+        
+        self.replace_file_btn = ModernButton("Reemplazar en archivo...", "secondary")
+        self.replace_file_btn.clicked.connect(self.substitute_in_file)
+        replace_layout.addWidget(self.replace_file_btn)
+        
+        regex_layout.addLayout(replace_layout)
+        
+        # Autómatas: DFA mínimo y equivalencia con un patrón alternativo
+        automaton_layout = QHBoxLayout()
+        automaton_layout.setSpacing(12)
+        
+        self.compare_input = QLineEdit()
+        self.compare_input.setPlaceholderText("Patrón alternativo (por ejemplo, la versión refactorizada)")
+        automaton_layout.addWidget(self.compare_input)
+        
+        self.dfa_btn = ModernButton("Autómata", "secondary")
+        self.dfa_btn.setToolTip("Construye y minimiza el DFA del patrón (subconjunto regular)")
+        self.dfa_btn.clicked.connect(self.build_automaton)
+        automaton_layout.addWidget(self.dfa_btn)
+        
+        self.equivalence_btn = ModernButton("Equivalencia", "secondary")
+        self.equivalence_btn.setToolTip("Comprueba si ambos patrones aceptan el mismo lenguaje")
+        self.equivalence_btn.clicked.connect(self.check_equivalence)
+        automaton_layout.addWidget(self.equivalence_btn)
+        
+        self.compare_btn = ModernButton("Comparar", "secondary")
+        self.compare_btn.setToolTip("Coincidencias ganadas, perdidas y desplazadas por el patrón alternativo en el texto")
+        self.compare_btn.clicked.connect(self.compare_matches)
+        automaton_layout.addWidget(self.compare_btn)
+        
+        regex_layout.addLayout(automaton_layout)
+        
         # Grupo de texto
         text_group = self.create_group_box("Texto a Analizar", input_layout)
         text_layout = QVBoxLayout(text_group)
         
         self.text_input = QTextEdit()
+        self.text_input.setObjectName("textInput")
         self.text_input.setPlaceholderText("Ingrese el texto a analizar aquí...\n\nEjemplo:\nMi teléfono es 555-123-4567\nEmail: usuario@ejemplo.com\nFecha: 2024-01-15")
-        self.text_input.setStyleSheet("""
-            QTextEdit {
-                border: 2px solid #E5E7EB;
-                border-radius: 12px;
-                padding: 16px;
-                font-family: 'Inter', sans-serif;
-                font-size: 13px;
-                background: #FAFAFA;
-                line-height: 1.6;
-            }
-            QTextEdit:focus {
-                border-color: #3B82F6;
-                background: white;
-                box-shadow: 0 0 0 3px rgba(59, 130, 246, 0.1);
-            }
-        """)
         text_layout.addWidget(self.text_input)
         
         parent.addWidget(input_widget)
@@ -561,160 +1451,170 @@ class RegexMainWindow(QMainWindow):
         output_widget = QWidget()
         output_layout = QVBoxLayout(output_widget)
         output_layout.setSpacing(20)
+        self.output_layout = output_layout
         
         # Estadísticas
         stats_group = self.create_group_box("Estadísticas", output_layout)
         stats_layout = QVBoxLayout(stats_group)
         
         self.stats_label = QLabel("Coincidencias encontradas: 0")
-        self.stats_label.setStyleSheet("""
-            font-weight: 700; 
-            font-size: 16px;
-            color: #6B7280;
-            background: #F9FAFB;
-            border: 2px solid #E5E7EB;
-            border-radius: 12px;
-            padding: 20px;
-        """)
+        self.stats_label.setObjectName("statsLabel")
         stats_layout.addWidget(self.stats_label)
         
         # Contador de palabras
         self.word_count_label = QLabel("Palabras en el texto: 0")
-        self.word_count_label.setStyleSheet("""
-            font-weight: 600; 
-            font-size: 14px;
-            color: #6B7280;
-            background: #F9FAFB;
-            border: 2px solid #E5E7EB;
-            border-radius: 12px;
-            padding: 16px;
-            margin-top: 8px;
-        """)
+        self.word_count_label.setObjectName("wordCountLabel")
         stats_layout.addWidget(self.word_count_label)
+        self.stats_layout = stats_layout
         
         # Lista de coincidencias
         matches_group = self.create_group_box("Coincidencias Encontradas", output_layout)
         matches_layout = QVBoxLayout(matches_group)
         
-        self.matches_list = QListWidget()
+        self.matches_model = MatchListModel()
+        self.matches_list = QListView()
+        self.matches_list.setObjectName("matchesList")
+        self.matches_list.setModel(self.matches_model)
+        self.matches_list.setUniformItemSizes(True)
         self.matches_list.setMaximumHeight(220)  # Aumentado para mejor visibilidad
-        self.matches_list.setStyleSheet("""
-            QListWidget {
-                border: 2px solid #E5E7EB;
-                border-radius: 12px;
-                background: #FAFAFA;
-                font-family: 'JetBrains Mono', 'Consolas', monospace;
-                font-size: 12px;
-            }
-            QListWidget::item {
-                padding: 12px 16px;
-                border-bottom: 1px solid #F3F4F6;
-                background: white;
-                margin: 2px;
-                border-radius: 8px;
-            }
-            QListWidget::item:selected {
-                background: #DBEAFE;
-                color: #1D4ED8;
-                border: 2px solid #3B82F6;
-            }
-            QListWidget::item:hover {
-                background: #F3F4F6;
-            }
-        """)
+        self.matches_list.clicked.connect(self.jump_to_match)
         matches_layout.addWidget(self.matches_list)
         
         # Texto resaltado
-        highlight_group = self.create_group_box("Texto con Coincidencias Resaltadas", output_layout)
-        highlight_layout = QVBoxLayout(highlight_group)
-        
-        self.highlighted_text = TextHighlighter()
-        self.highlighted_text.setStyleSheet("""
-            QTextEdit {
-                border: 2px solid #E5E7EB;
-                border-radius: 12px;
-                background: white;
-                font-family: 'Inter', sans-serif;
-                font-size: 13px;
-                line-height: 1.6;
-                padding: 16px;
-            }
-        """)
+        self.highlight_group = self.create_group_box("Texto con Coincidencias Resaltadas", output_layout)
+        highlight_layout = QVBoxLayout(self.highlight_group)
+        
+        self.highlighted_text = VirtualTextViewer()
+        self.highlighted_text.setObjectName("highlightedText")
         highlight_layout.addWidget(self.highlighted_text)
         
         parent.addWidget(output_widget)
         
-    def create_group_box(self, title, parent_layout):
-        """Crear un grupo con estilo moderno"""
+    def create_group_box(self, title, parent_layout, index=None):
+        """Crear un grupo con estilo moderno (al final del layout o en la posición `index`)"""
         group = QGroupBox(title)
-        group.setStyleSheet("""
-            QGroupBox {
-                font-weight: 700;
-                font-size: 16px;
-                color: #374151;
-                border: 2px solid #E5E7EB;
-                border-radius: 16px;
-                margin-top: 16px;
-                padding-top: 20px;
-                background: white;
-            }
-            QGroupBox::title {
-                subcontrol-origin: margin;
-                left: 20px;
-                padding: 0 12px 0 12px;
-                background: white;
-            }
-        """)
-        parent_layout.addWidget(group)
+        if index is None:
+            parent_layout.addWidget(group)
+        else:
+            parent_layout.insertWidget(index, group)
         return group
+    
+    def ensure_top_table(self):
+        """Construir la tabla de frecuencias la primera vez que se usa"""
+        if self.top_group is not None:
+            return
+        self.top_group = self.create_group_box("Valores Más Frecuentes", self.output_layout,
+                                               self.output_layout.indexOf(self.highlight_group))
+        top_layout = QVBoxLayout(self.top_group)
+        
+        self.top_table = QTableWidget(0, 3)
+        self.top_table.setObjectName("topTable")
+        self.top_table.setHorizontalHeaderLabels(["Valor", "Conteo", "Error ±"])
+        self.top_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.top_table.verticalHeader().setVisible(False)
+        self.top_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.top_table.setSortingEnabled(True)
+        self.top_table.setMaximumHeight(260)
+        top_layout.addWidget(self.top_table)
+    
+    def ensure_diagnostics(self):
+        """Construir el diagnóstico de la caché de resultados la primera vez que se usa"""
+        if self.diagnostics_label is not None:
+            return
+        self.diagnostics_label = QLabel()
+        self.diagnostics_label.setObjectName("diagnosticsLabel")
+        self.stats_layout.addWidget(self.diagnostics_label)
+    
+    def hide_top_table(self):
+        if self.top_group is not None:
+            self.top_group.setVisible(False)
+    
+    def set_stats_state(self, state):
+        """Cambiar el color del contador ('neutral', 'empty' o 'found')"""
+        self.stats_label.setProperty("state", state)
+        self.stats_label.style().unpolish(self.stats_label)
+        self.stats_label.style().polish(self.stats_label)
         
     def create_status_bar(self):
         """Crear barra de estado"""
         self.status_bar = QStatusBar()
-        self.status_bar.setStyleSheet("""
-            QStatusBar {
-                background: #F9FAFB;
-                border-top: 2px solid #E5E7EB;
-                color: #6B7280;
-                font-weight: 500;
-                padding: 8px 16px;
-            }
-        """)
         
         self.status_label = QLabel("Listo para analizar")
         self.progress_bar = QProgressBar()
         self.progress_bar.setVisible(False)
         self.progress_bar.setMaximumWidth(200)
-        self.progress_bar.setStyleSheet("""
-            QProgressBar {
-                border: 2px solid #E5E7EB;
-                border-radius: 8px;
-                background: #F3F4F6;
-                text-align: center;
-            }
-            QProgressBar::chunk {
-                background: qlineargradient(x1:0, y1:0, x2:1, y2:0,
-                    stop:0 #3B82F6, stop:1 #1D4ED8);
-                border-radius: 6px;
-            }
-        """)
+        
+        self.library_label = QLabel()
+        self.library_label.setObjectName("libraryLabel")
+        self.library_label.setVisible(False)
         
         self.status_bar.addWidget(self.status_label)
+        self.status_bar.addPermanentWidget(self.library_label)
         self.status_bar.addPermanentWidget(self.progress_bar)
         
         self.setStatusBar(self.status_bar)
         
     def apply_modern_style(self):
-        """Aplicar estilo moderno a toda la aplicación"""
-        self.setStyleSheet("""
-            QMainWindow {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                    stop:0 #F8FAFC, stop:1 #F1F5F9);
-            }
-            QWidget {
-                background: transparent;
-            }
-        """)
+        """Aplicar la hoja de estilo única a toda la aplicación (una sola vez, antes de crear los widgets)"""
+        app = QApplication.instance()
+        if app.styleSheet() != APP_STYLE_SHEET:
+            app.setStyleSheet(APP_STYLE_SHEET)
+    
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.first_painted:
+            self.first_painted = True
+            startup_mark('first_paint')
+            if os.environ.get('REGEX_GUI_TRACE'):
+                print(json.dumps(dict(STARTUP_TRACE)), file=sys.stderr)
+            # La biblioteca se prepara cuando la ventana ya está en pantalla
+            QTimer.singleShot(0, self.start_library_warmup)
+    
+    def start_library_warmup(self, path=None):
+        """Precompilar la biblioteca de patrones en un hilo de baja prioridad"""
+        path = path or os.environ.get('REGEX_GUI_LIBRARY') or self.LIBRARY_PATH
+        if self.library_worker is not None or not os.path.isfile(path):
+            return
+        self.library_label.setText("Biblioteca: cargando...")
+        self.library_label.setVisible(True)
+        self.library_worker = LibraryWarmupWorker(path)
+        self.library_worker.progress.connect(self.on_library_progress)
+        self.library_worker.finished.connect(self.on_library_finished)
+        self.library_worker.error.connect(self.on_library_error)
+        self.library_worker.start(QThread.Priority.LowestPriority)
+    
+    def on_library_progress(self, done, total):
+        self.library_label.setText(f"Biblioteca: {done}/{total}")
+    
+    def on_library_finished(self, report):
+        """Resumir la biblioteca preparada en la barra de estado"""
+        self.library_worker = None
+        self.library_report = report
+        text = f"Biblioteca: {report['warmed']} patrones listos"
+        if report['risky']:
+            text += f", {len(report['risky'])} con riesgo de ReDoS"
+        if report['invalid']:
+            text += f", {len(report['invalid'])} inválidos"
+        if report['failed']:
+            text += f", {len(report['failed'])} con errores"
+        self.library_label.setText(text)
+        details = [f"{entry['name']}: {'; '.join(entry['redos'])}" for entry in report['risky']]
+        details += [f"{entry['name']}: {entry['error']}" for entry in report['invalid'] + report['failed']]
+        self.library_label.setToolTip("\n".join(details[:30]) or report['path'])
+    
+    def closeEvent(self, event):
+        # El precalentamiento revisa la interrupción entre patrones, así que termina enseguida
+        if self.library_worker is not None:
+            self.library_worker.requestInterruption()
+            self.library_worker.wait()
+        if self.follower is not None:
+            self.stop_follow()
+        super().closeEvent(event)
+    
+    def on_library_error(self, error_msg):
+        self.library_worker = None
+        self.library_label.setText("Biblioteca: error")
+        self.library_label.setToolTip(error_msg)
         
     def validate_regex(self):
         """Validar la expresión regular ingresada"""
@@ -735,7 +1635,7 @@ class RegexMainWindow(QMainWindow):
             self.process_btn.setEnabled(False)
             self.status_label.setText("Regex inválida")
     
-    def process_text(self):
+    def process_text(self, load_all=False):
         """Procesar el texto con la expresión regular"""
         pattern = self.regex_input.toPlainText().strip()
         text = self.text_input.toPlainText().strip()
@@ -748,6 +1648,9 @@ class RegexMainWindow(QMainWindow):
             self.show_message("Advertencia", "Por favor ingrese texto a analizar.", "warning")
             return
         
+        if self.follower is not None:
+            self.stop_follow()
+        
         # Contar palabras
         word_count = len(text.split())
         self.word_count_label.setText(f"Palabras en el texto: {word_count}")
@@ -757,8 +1660,27 @@ class RegexMainWindow(QMainWindow):
         self.progress_bar.setRange(0, 0)  # Indeterminado
         self.status_label.setText("Analizando texto...")
         
+        # Elegir el modo de resultados; en textos enormes se limita por defecto
+        mode = self.mode_combo.currentData()
+        if mode == 'aggregate' and not load_all:
+            self.start_aggregation(pattern, text)
+            return
+        
+        limit = self.limit_spin.value() if mode == 'limit' else None
+        if load_all:
+            mode, limit = 'full', None
+        elif mode == 'full' and len(text) > self.LARGE_TEXT_THRESHOLD:
+            mode, limit = 'limit', self.DEFAULT_LARGE_LIMIT
+        
         # Crear y ejecutar worker thread
-        self.worker = RegexWorker(pattern, text)
+        self.analyzed_text = text
+        self.result_pattern = pattern
+        self.load_all_btn.setVisible(False)
+        if self.process_pool_check.isChecked():
+            self.worker = ProcessRegexWorker(pattern, text, self.result_cache, mode, limit)
+        else:
+            self.worker = RegexWorker(pattern, text, self.result_cache, mode, limit,
+                                      self.index_check.isChecked(), self.trigram_index)
         self.worker.finished.connect(self.on_processing_finished)
         self.worker.error.connect(self.on_processing_error)
         self.worker.start()
@@ -767,53 +1689,679 @@ class RegexMainWindow(QMainWindow):
         self.process_btn.setEnabled(False)
         self.process_btn.setText("Analizando...")
     
+    def start_aggregation(self, pattern, text):
+        """Calcular el top-K de valores coincidentes en segundo plano"""
+        self.worker = AggregateWorker(pattern, text, self.group_spin.value(), self.limit_spin.value())
+        self.worker.finished.connect(self.on_aggregation_finished)
+        self.worker.error.connect(self.on_processing_error)
+        self.worker.start()
+        
+        self.process_btn.setEnabled(False)
+        self.process_btn.setText("Analizando...")
+    
+    def on_aggregation_finished(self, result):
+        """Mostrar la tabla de valores más frecuentes"""
+        self.progress_bar.setVisible(False)
+        self.ensure_top_table()
+        
+        precision = "exacto" if result['exact'] else "aproximado (Space-Saving)"
+        self.stats_label.setText(f"Coincidencias agregadas: {result['total']}")
+        self.status_label.setText(f"Frecuencias calculadas - {result['tracked']} valores distintos, conteo {precision}")
+        
+        self.top_table.setSortingEnabled(False)
+        self.top_table.setRowCount(len(result['top']))
+        for row, (value, count, error) in enumerate(result['top']):
+            self.top_table.setItem(row, 0, QTableWidgetItem(value))
+            for column, number in ((1, count), (2, error)):
+                item = QTableWidgetItem()
+                item.setData(Qt.ItemDataRole.DisplayRole, number)
+                self.top_table.setItem(row, column, item)
+        self.top_table.setSortingEnabled(True)
+        self.top_table.sortByColumn(1, Qt.SortOrder.DescendingOrder)
+        self.top_group.setVisible(True)
+        
+        self.process_btn.setEnabled(True)
+        self.process_btn.setText("Analizar")
+    
     def on_processing_finished(self, result):
         """Manejar el resultado del procesamiento"""
         # Ocultar progreso
         self.progress_bar.setVisible(False)
+        self.hide_top_table()
         
         # Actualizar estadísticas
         count = result['match_count']
         if count == 0:
             self.stats_label.setText("Coincidencias encontradas: 0")
-            self.stats_label.setStyleSheet("""
-                font-weight: 700; 
-                font-size: 16px;
-                color: #EF4444;
-                background: #FEF2F2;
-                border: 2px solid #FECACA;
-                border-radius: 12px;
-                padding: 20px;
-            """)
+            self.set_stats_state('empty')
             self.status_label.setText("No se encontraron coincidencias")
         else:
             self.stats_label.setText(f"Coincidencias encontradas: {count}")
-            self.stats_label.setStyleSheet("""
-                font-weight: 700; 
-                font-size: 16px;
-                color: #059669;
-                background: #ECFDF5;
-                border: 2px solid #A7F3D0;
-                border-radius: 12px;
-                padding: 20px;
-            """)
+            self.set_stats_state('found')
             self.status_label.setText(f"Análisis completado - {count} coincidencias encontradas")
+            if result['mode'] == 'exists':
+                self.stats_label.setText("Existe al menos una coincidencia")
+            elif not result['complete']:
+                self.stats_label.setText(f"Coincidencias mostradas: {count} (hay más)")
+                self.status_label.setText(f"Análisis detenido tras {count} coincidencias")
+                self.load_all_btn.setVisible(True)
         
-        # Limpiar y llenar lista de coincidencias
-        self.matches_list.clear()
-        if result['matches']:
-            for i, match in enumerate(result['matches'], 1):
-                self.matches_list.addItem(f"{i}. '{match}'")
-        else:
-            self.matches_list.addItem("No se encontraron coincidencias.")
+        self.result_mode = result['mode']
+        self.result_complete = result['complete']
         
         # Mostrar texto resaltado
-        self.highlighted_text.highlight_matches(self.text_input.toPlainText(), result['positions'])
+        spans = result['spans']
+        self.highlighted_text.highlight_matches(self.analyzed_text, spans, result['line_index'])
+        
+        # La lista lee las filas de los spans y del texto sólo cuando se muestran
+        if spans is None:
+            self.matches_model.set_messages(f"Conteo: {count} coincidencias (sin posiciones)")
+        elif spans:
+            self.matches_model.set_matches(spans, self.highlighted_text.source, result['matches'])
+        else:
+            self.matches_model.set_messages("No se encontraron coincidencias.")
+        
+        if result.get('cached'):
+            self.status_label.setText(self.status_label.text() + " (desde caché)")
+        elif result.get('index_stats'):
+            stats = result['index_stats']
+            self.status_label.setText(self.status_label.text() +
+                                      f" (índice: {stats['candidates']}/{stats['blocks']} bloques)")
+        if result.get('trigram_index') is not None:
+            self.trigram_index = result['trigram_index']
+        self.update_diagnostics()
         
         # Restaurar botón
         self.process_btn.setEnabled(True)
         self.process_btn.setText("Analizar")
     
+    def process_file(self):
+        """Analizar un archivo completo sin cargarlo en el editor"""
+        pattern = self.regex_input.toPlainText().strip()
+        is_valid, error_msg = self.validator.verify_regex(pattern)
+        if not is_valid:
+            self.show_message("Error", f"Error en la expresión regular:\n\n{error_msg}", "error")
+            return
+        
+        path, _ = QFileDialog.getOpenFileName(self, "Archivo a analizar", "",
+                                              "Texto y logs (*.txt *.log *.gz *.bz2 *.xz);;Todos (*)")
+        if not path:
+            return
+        
+        mode = self.mode_combo.currentData()
+        if mode == 'aggregate':
+            mode = 'full'
+        limit = self.limit_spin.value() if mode == 'limit' else None
+        self.start_file_scan(pattern, path, mode, limit)
+    
+    def start_file_scan(self, pattern, path, mode, limit):
+        """Lanzar la búsqueda por bloques de un archivo"""
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setRange(0, 0)
+        self.status_label.setText(f"Analizando {os.path.basename(path)}...{self.stream_warning(pattern)}")
+        self.scan_file_btn.setEnabled(False)
+        
+        self.result_pattern = pattern
+        self.file_worker = FileScanWorker(pattern, path, mode, limit)
+        self.file_worker.finished.connect(self.on_file_scan_finished)
+        self.file_worker.error.connect(self.on_file_scan_error)
+        self.file_worker.start()
+    
+    def stream_warning(self, pattern):
+        """Aviso para la barra de estado si el patrón obliga a leer el archivo entero"""
+        if _stream_overlap(self.validator.compile(pattern)) == sre_constants.MAXREPEAT:
+            return " (patrón multilínea sin ancho acotado: el archivo se lee entero en memoria)"
+        return ""
+    
+    def on_file_scan_finished(self, result):
+        """Mostrar las coincidencias de un archivo"""
+        self.progress_bar.setVisible(False)
+        self.scan_file_btn.setEnabled(True)
+        self.hide_top_table()
+        
+        count = result['match_count']
+        name = os.path.basename(result['path'])
+        self.result_mode = result['mode']
+        self.result_complete = result['complete']
+        suffix = "" if result['complete'] else " (hay más)"
+        self.stats_label.setText(f"Coincidencias encontradas: {count}{suffix}")
+        self.status_label.setText(f"Archivo {name} analizado - {count} coincidencias"
+                                  f"{self.stream_warning(self.result_pattern)}")
+        
+        # Los archivos sin comprimir se muestran mapeados en memoria, página a página
+        if result.get('source') is not None:
+            self.highlighted_text.set_source(result['source'], result['spans'])
+        else:
+            self.highlighted_text.setPlainText(f"Archivo analizado por bloques: {result['path']}")
+            # El visor sólo muestra un aviso: se exporta desde los spans del análisis releyendo el archivo
+            if result['spans']:
+                self.streamed_scan = {'placeholder': self.highlighted_text.source,
+                                      'path': result['path'], 'spans': result['spans']}
+        
+        if result['spans'] is None:
+            self.matches_model.set_messages(f"Conteo: {count} coincidencias (sin posiciones)")
+        elif not result['spans']:
+            self.matches_model.set_messages("No se encontraron coincidencias.")
+        else:
+            self.matches_model.set_matches(result['spans'], result.get('source'), result['matches'],
+                                           SpanList(result['line_numbers'], result['columns']))
+    
+    def on_file_scan_error(self, error_msg):
+        """Manejar errores del análisis de archivos"""
+        self.progress_bar.setVisible(False)
+        self.scan_file_btn.setEnabled(True)
+        self.show_message("Error", error_msg, "error")
+        self.status_label.setText("Error en el análisis del archivo")
+    
+    def toggle_follow(self):
+        """Iniciar o detener el seguimiento de un archivo de log"""
+        if self.follower is not None:
+            self.stop_follow()
+            return
+        
+        pattern = self.regex_input.toPlainText().strip()
+        is_valid, error_msg = self.validator.verify_regex(pattern)
+        if not is_valid:
+            self.show_message("Error", f"Error en la expresión regular:\n\n{error_msg}", "error")
+            return
+        
+        path, _ = QFileDialog.getOpenFileName(self, "Archivo a seguir")
+        if not path:
+            return
+        try:
+            self.follower = LogFollower(path, self.validator.compile(pattern))
+        except OSError as e:
+            self.show_message("Error", f"No se pudo abrir el archivo:\n\n{e}", "error")
+            return
+        
+        self.reset_follow_view()
+        self.result_pattern = pattern
+        self.follow_btn.setText("Detener")
+        self.status_label.setText(f"Siguiendo {os.path.basename(path)}...")
+        self.poll_follow()
+        self.follow_timer.start()
+    
+    def stop_follow(self):
+        """Detener el seguimiento"""
+        self.follow_timer.stop()
+        if self.follow_worker is not None:
+            # Una lectura en curso lee a lo sumo `max_read` bytes: se espera a que termine
+            self.follow_worker.wait()
+            self.follow_worker = None
+        self.follow_busy = False
+        self.follower = None
+        self.follow_btn.setText("Seguir archivo...")
+        self.status_label.setText(f"Seguimiento detenido - {self.follow_count} coincidencias")
+    
+    def reset_follow_view(self):
+        self.follow_count = 0
+        self.highlighted_text.clear()
+        self.matches_model.set_matches(self.highlighted_text.matches, self.highlighted_text.source)
+    
+    def poll_follow(self):
+        """Leer y buscar en un hilo sólo lo agregado al archivo desde la última lectura"""
+        if self.follower is None or self.follow_busy:
+            return
+        if self.follow_worker is not None:
+            self.follow_worker.wait()  # Ya emitió su resultado: sólo falta que el hilo termine
+        self.follow_busy = True
+        self.follow_worker = FollowWorker(self.follower)
+        self.follow_worker.finished.connect(self.on_follow_update)
+        self.follow_worker.error.connect(self.on_follow_error)
+        self.follow_worker.start()
+    
+    def on_follow_update(self, update):
+        """Agregar al visor el texto nuevo y sus coincidencias"""
+        if self.sender() is not self.follow_worker:
+            return  # Lectura de un seguimiento ya detenido
+        self.follow_busy = False
+        if not update:
+            return
+        if update['rotated']:
+            self.reset_follow_view()
+        
+        self.highlighted_text.append_matches(update['text'], update['spans'])
+        self.matches_model.sync_appended()
+        self.follow_count = len(self.highlighted_text.matches)
+        
+        self.stats_label.setText(f"Coincidencias encontradas: {self.follow_count}")
+        if update['spans']:
+            self.matches_list.scrollToBottom()
+    
+    def on_follow_error(self, error_msg):
+        """Detener el seguimiento si el archivo ya no se puede leer"""
+        if self.sender() is not self.follow_worker:
+            return
+        self.stop_follow()
+        self.show_message("Error", error_msg, "error")
+    
+    def export_results(self):
+        """Exportar las coincidencias mostradas leyendo directamente de los spans"""
+        spans, source, source_path = self.highlighted_text.matches, self.highlighted_text.source, None
+        scan = self.streamed_scan
+        if scan is not None and scan['placeholder'] is source:
+            spans, source, source_path = scan['spans'], None, scan['path']
+        if not self.result_pattern or not len(spans):
+            self.show_message("Advertencia", "No hay coincidencias con posiciones para exportar.", "warning")
+            return
+        
+        filters = {"CSV (*.csv)": 'csv', "JSON Lines (*.jsonl)": 'jsonl', "Spans binarios (*.spans)": 'spans'}
+        path, selected = QFileDialog.getSaveFileName(self, "Exportar coincidencias", "coincidencias.csv",
+                                                     ";;".join(filters))
+        if not path:
+            return
+        # La extensión manda; si no es conocida se usa el filtro elegido
+        fmt = os.path.splitext(path)[1].lstrip('.').lower()
+        if fmt not in MatchExporter.FORMATS:
+            fmt = filters.get(selected, 'csv')
+        
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setRange(0, 0)
+        self.status_label.setText(f"Exportando {len(spans)} coincidencias...")
+        self.export_btn.setEnabled(False)
+        
+        self.export_worker = ExportWorker(self.result_pattern, fmt, path, source, spans, source_path)
+        self.export_worker.finished.connect(self.on_export_finished)
+        self.export_worker.error.connect(self.on_export_error)
+        self.export_worker.start()
+    
+    def on_export_finished(self, result):
+        """Informar el resultado de la exportación"""
+        self.progress_bar.setVisible(False)
+        self.export_btn.setEnabled(True)
+        self.status_label.setText(f"Exportación completada - {result['count']} coincidencias en {result['path']}")
+    
+    def on_export_error(self, error_msg):
+        """Manejar errores de la exportación"""
+        self.progress_bar.setVisible(False)
+        self.export_btn.setEnabled(True)
+        self.show_message("Error", error_msg, "error")
+        self.status_label.setText("Error en la exportación")
+    
+    def load_spans(self):
+        """Mostrar un archivo de spans sobre el texto actual si el hash de la fuente coincide"""
+        path, _ = QFileDialog.getOpenFileName(self, "Archivo de spans", "", "Spans binarios (*.spans);;Todos (*)")
+        if not path:
+            return
+        try:
+            header, spans = MatchExporter.read_spans(path)
+        except (OSError, ValueError, KeyError) as e:
+            self.show_message("Error", f"No se pudo leer el archivo de spans:\n\n{e}", "error")
+            return
+        
+        # Se prueba primero la fuente del visor (p. ej. un archivo mapeado) y luego el editor
+        candidates = [self.highlighted_text.source, StringTextSource(self.text_input.toPlainText().strip())]
+        source = next((candidate for candidate in candidates
+                       if candidate.length == header['source_length']
+                       and candidate.digest() == header['source_digest']), None)
+        if source is None:
+            self.show_message("Advertencia", "El texto actual no coincide con la fuente de los spans "
+                              "(hash distinto). Vuelva a analizarlo.", "warning")
+            return
+        
+        if self.follower is not None:
+            self.stop_follow()
+        self.result_pattern = header['pattern']
+        self.highlighted_text.set_source(source, spans)
+        self.matches_model.set_matches(spans, source)
+        self.stats_label.setText(f"Coincidencias encontradas: {len(spans)}")
+        self.status_label.setText(f"Spans cargados desde {os.path.basename(path)} - patrón {header['pattern']}")
+    
+    def save_session(self):
+        """Guardar la sesión actual: fuente, patrones, spans e índice de líneas"""
+        spans = self.highlighted_text.matches
+        if not self.result_pattern or not len(spans):
+            self.show_message("Advertencia", "No hay un análisis con posiciones para guardar.", "warning")
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "Guardar sesión", "sesion.rxsession",
+                                              "Sesiones (*.rxsession);;Todos (*)")
+        if not path:
+            return
+        if self.follower is not None:
+            self.stop_follow()
+        
+        state = {
+            'pattern': self.result_pattern,
+            'regex_input': self.regex_input.toPlainText(),
+            'compare_pattern': self.compare_input.text(),
+            'flags': 0,
+            'mode': self.result_mode,
+            'limit': len(spans) if self.result_mode == 'limit' else None,
+            'complete': self.result_complete,
+        }
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setRange(0, 0)
+        self.status_label.setText("Guardando sesión...")
+        self.save_session_btn.setEnabled(False)
+        self.session_worker = SessionWorker(path, self.highlighted_text.source, spans, state)
+        self.session_worker.finished.connect(self.on_session_saved)
+        self.session_worker.error.connect(self.on_session_error)
+        self.session_worker.start()
+    
+    def on_session_saved(self, result):
+        """Informar el guardado de la sesión"""
+        self.progress_bar.setVisible(False)
+        self.save_session_btn.setEnabled(True)
+        self.status_label.setText(f"Sesión guardada en {os.path.basename(result['path'])} "
+                                  f"({result['bytes'] / (1024 * 1024):.1f} MB)")
+    
+    def open_session(self):
+        """Abrir una sesión guardada"""
+        path, _ = QFileDialog.getOpenFileName(self, "Abrir sesión", "", "Sesiones (*.rxsession);;Todos (*)")
+        if not path:
+            return
+        if self.follower is not None:
+            self.stop_follow()
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setRange(0, 0)
+        self.status_label.setText("Abriendo sesión...")
+        self.open_session_btn.setEnabled(False)
+        self.session_worker = SessionWorker(path)
+        self.session_worker.finished.connect(self.on_session_opened)
+        self.session_worker.error.connect(self.on_session_error)
+        self.session_worker.start()
+    
+    def on_session_opened(self, result):
+        """Restaurar la sesión; si la fuente cambió se vuelve a buscar"""
+        self.progress_bar.setVisible(False)
+        self.open_session_btn.setEnabled(True)
+        self.hide_top_table()
+        snapshot = result['snapshot']
+        header = snapshot.header
+        origin = header['source']
+        name = os.path.basename(result['path'])
+        
+        self.regex_input.setPlainText(header.get('regex_input') or header['pattern'])
+        self.compare_input.setText(header.get('compare_pattern', ''))
+        if origin['kind'] == 'text':
+            self.text_input.setPlainText(''.join(snapshot.source.chunks))
+        
+        if snapshot.stale:
+            self.status_label.setText(f"La fuente de {name} cambió; volviendo a analizar...")
+            if origin['kind'] == 'file':
+                self.start_file_scan(header['pattern'], origin['path'], header['mode'], header['limit'])
+            else:
+                # Se vuelve a buscar con el modo y el límite guardados, no con los de la interfaz
+                self.mode_combo.setCurrentIndex(self.mode_combo.findData(header['mode']))
+                if header['limit'] is not None:
+                    self.limit_spin.setValue(header['limit'])
+                self.process_text(load_all=header['mode'] == 'full')
+            return
+        
+        spans = snapshot.spans
+        self.result_pattern = header['pattern']
+        self.result_mode = header['mode']
+        self.result_complete = header['complete']
+        self.highlighted_text.set_source(snapshot.source, spans)
+        if spans:
+            self.matches_model.set_matches(spans, snapshot.source)
+        else:
+            self.matches_model.set_messages("No se encontraron coincidencias.")
+        suffix = "" if header['complete'] else " (hay más)"
+        self.stats_label.setText(f"Coincidencias encontradas: {len(spans)}{suffix}")
+        self.status_label.setText(f"Sesión {name} abierta - patrón {header['pattern']}")
+    
+    def on_session_error(self, error_msg):
+        """Manejar errores al guardar o abrir sesiones"""
+        self.progress_bar.setVisible(False)
+        self.save_session_btn.setEnabled(True)
+        self.open_session_btn.setEnabled(True)
+        self.show_message("Error", error_msg, "error")
+        self.status_label.setText("Error en la sesión")
+    
+    def run_suite(self):
+        """Ejecutar una suite de regresión de patrones en segundo plano"""
+        path, _ = QFileDialog.getOpenFileName(self, "Suite de patrones", "", "Suites JSON (*.json);;Todos (*)")
+        if not path:
+            return
+        
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setRange(0, 0)
+        self.status_label.setText(f"Ejecutando {os.path.basename(path)}...")
+        self.suite_btn.setEnabled(False)
+        
+        self.suite_worker = SuiteWorker(path, self.SUITE_TIMEOUT)
+        self.suite_worker.finished.connect(self.on_suite_finished)
+        self.suite_worker.error.connect(self.on_suite_error)
+        self.suite_worker.start()
+    
+    def on_suite_finished(self, report):
+        """Listar fallas, errores, tiempos agotados y los patrones más lentos"""
+        self.progress_bar.setVisible(False)
+        self.suite_btn.setEnabled(True)
+        
+        rows = []
+        for result in report['failed']:
+            for failure in result['failures']:
+                expected = "coincidir" if failure['expected'] else "no coincidir"
+                rows.append(f"FALLA {result['name']}: debía {expected} con '{failure['sample']}'")
+        rows.extend(f"ERROR {result['name']}: {result['error']}" for result in report['errors'])
+        rows.extend(f"TIEMPO {result['name']}: superó {self.SUITE_TIMEOUT:g} s" for result in report['timeouts'])
+        rows.extend(f"LENTO {result['name']}: {result['elapsed'] * 1000:.2f} ms ({result['samples']} muestras)"
+                    for result in report['slowest'])
+        self.matches_model.set_messages(*rows)
+        
+        self.stats_label.setText(f"Patrones correctos: {report['passed']}/{report['total']}")
+        self.status_label.setText(f"Suite completada - {report['samples']} muestras en {report['elapsed']:.2f} s")
+    
+    def on_suite_error(self, error_msg):
+        """Manejar errores de la suite"""
+        self.progress_bar.setVisible(False)
+        self.suite_btn.setEnabled(True)
+        self.show_message("Error", error_msg, "error")
+        self.status_label.setText("Error en la suite")
+    
+    def compare_matches(self):
+        """Comparar las coincidencias del patrón actual y del alternativo sobre el texto"""
+        pattern = self.regex_input.toPlainText().strip()
+        other = self.compare_input.text().strip()
+        text = self.text_input.toPlainText().strip()
+        if not pattern or not other or not text:
+            self.show_message("Advertencia", "Ingrese ambos patrones y el texto a analizar.", "warning")
+            return
+        if self.follower is not None:
+            self.stop_follow()
+        
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setRange(0, 0)
+        self.status_label.setText("Comparando patrones...")
+        self.compare_btn.setEnabled(False)
+        
+        self.analyzed_text = text
+        self.result_pattern = None
+        self.compare_worker = CompareWorker(pattern, other, text, self.result_cache)
+        self.compare_worker.finished.connect(self.on_compare_finished)
+        self.compare_worker.error.connect(self.on_compare_error)
+        self.compare_worker.start()
+    
+    def on_compare_finished(self, result):
+        """Colorear las coincidencias sin cambios, eliminadas, agregadas y desplazadas"""
+        self.progress_bar.setVisible(False)
+        self.compare_btn.setEnabled(True)
+        self.hide_top_table()
+        
+        source = StringTextSource(self.analyzed_text, result['line_index'])
+        self.highlighted_text.set_source(source, layers=[
+            (result['unchanged'], QColor(254, 240, 138)),   # Yellow-200
+            (result['removed'], QColor(254, 202, 202)),     # Red-200
+            (result['added'], QColor(187, 247, 208)),       # Green-200
+            (result['shifted'], QColor(253, 186, 116)),     # Orange-300
+        ])
+        if result['changes']:
+            self.matches_model.set_matches(result['changes'], source, kinds=result['kinds'])
+        else:
+            self.matches_model.set_messages("Ambos patrones producen las mismas coincidencias.")
+        
+        old_count, new_count = result['counts']
+        self.stats_label.setText(f"+{len(result['added'])}  −{len(result['removed'])}  ~{len(result['shifted'])}")
+        self.status_label.setText(f"Comparación: {old_count} → {new_count} coincidencias, "
+                                  f"{len(result['unchanged'])} sin cambios")
+    
+    def on_compare_error(self, error_msg):
+        """Manejar errores de la comparación"""
+        self.progress_bar.setVisible(False)
+        self.compare_btn.setEnabled(True)
+        self.show_message("Error", error_msg, "error")
+        self.status_label.setText("Error en la comparación")
+    
+    def build_automaton(self):
+        """Construir el DFA mínimo del patrón en segundo plano"""
+        pattern = self.regex_input.toPlainText().strip()
+        if not pattern:
+            self.show_message("Advertencia", "Por favor ingrese una expresión regular.", "warning")
+            return
+        self.start_automaton_worker(AutomatonWorker(pattern), self.on_automaton_finished)
+    
+    def check_equivalence(self):
+        """Comparar el lenguaje del patrón con el del patrón alternativo"""
+        pattern = self.regex_input.toPlainText().strip()
+        other = self.compare_input.text().strip()
+        if not pattern or not other:
+            self.show_message("Advertencia", "Ingrese la expresión regular y el patrón alternativo.", "warning")
+            return
+        self.start_automaton_worker(AutomatonWorker(pattern, other), self.on_equivalence_finished)
+    
+    def start_automaton_worker(self, worker, on_finished):
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setRange(0, 0)
+        self.status_label.setText("Construyendo autómatas...")
+        self.dfa_btn.setEnabled(False)
+        self.equivalence_btn.setEnabled(False)
+        
+        self.automaton_worker = worker
+        self.automaton_worker.finished.connect(on_finished)
+        self.automaton_worker.error.connect(self.on_automaton_error)
+        self.automaton_worker.start()
+    
+    def finish_automaton_worker(self):
+        self.progress_bar.setVisible(False)
+        self.dfa_btn.setEnabled(True)
+        self.equivalence_btn.setEnabled(True)
+    
+    def on_automaton_finished(self, result):
+        """Mostrar el tamaño del DFA mínimo"""
+        self.finish_automaton_worker()
+        self.stats_label.setText(f"DFA mínimo: {result['states']} estados")
+        self.status_label.setText(
+            f"Autómata: {result['nfa_states']} estados NFA → {result['dfa_states']} DFA → "
+            f"{result['states']} mínimo, {result['classes']} clases de caracteres, {result['memory']} bytes")
+    
+    def on_equivalence_finished(self, result):
+        """Mostrar si los patrones son equivalentes o un contraejemplo mínimo"""
+        self.finish_automaton_worker()
+        if result['equivalent']:
+            self.stats_label.setText("Los patrones son equivalentes")
+            self.status_label.setText(f"Equivalentes - DFA mínimos de {result['states'][0]} estados")
+            return
+        owner = "el patrón actual" if result['accepted_by'] == 'a' else "el patrón alternativo"
+        self.stats_label.setText("Los patrones no son equivalentes")
+        self.status_label.setText(f"Contraejemplo más corto: {result['counterexample']!r} (sólo lo acepta {owner})")
+    
+    def on_automaton_error(self, error_msg):
+        """Manejar errores de la construcción de autómatas"""
+        self.finish_automaton_worker()
+        self.show_message("Error", error_msg, "error")
+        self.status_label.setText("No se pudo construir el autómata")
+    
+    def preview_substitution(self):
+        """Mostrar el diff del reemplazo limitado a las líneas visibles del texto"""
+        pattern = self.regex_input.toPlainText().strip()
+        if not pattern:
+            self.show_message("Advertencia", "Por favor ingrese una expresión regular.", "warning")
+            return
+        
+        text = self.text_input.toPlainText()
+        viewport = self.text_input.viewport()
+        start = self.text_input.cursorForPosition(QPoint(0, 0)).position()
+        end = self.text_input.cursorForPosition(QPoint(viewport.width() - 1, viewport.height() - 1)).position()
+        start = text.rfind('\n', 0, start) + 1
+        end = text.find('\n', end)
+        if end == -1:
+            end = len(text)
+        
+        replaced, count, error = self.validator.substitute(pattern, self.template_input.text(), text, start, end)
+        if error:
+            self.show_message("Error", f"Error en el reemplazo:\n\n{error}", "error")
+            return
+        
+        first_line = text.count('\n', 0, start) + 1
+        diff = difflib.unified_diff(text[start:end].split('\n'), replaced.split('\n'),
+                                    f"original (desde línea {first_line})", "reemplazado", lineterm='', n=1)
+        lines = list(diff)
+        self.highlighted_text.show_diff(lines or ["Sin cambios en la región visible."])
+        self.status_label.setText(f"Vista previa - {count} reemplazos en la región visible")
+    
+    def substitute_in_file(self):
+        """Reescribir un archivo completo con la plantilla, por bloques"""
+        pattern = self.regex_input.toPlainText().strip()
+        if not pattern:
+            self.show_message("Advertencia", "Por favor ingrese una expresión regular.", "warning")
+            return
+        is_valid, error = self.validator.verify_template(pattern, self.template_input.text())
+        if not is_valid:
+            self.show_message("Error", f"Error en el reemplazo:\n\n{error}", "error")
+            return
+        
+        source_path, _ = QFileDialog.getOpenFileName(self, "Archivo de origen")
+        if not source_path:
+            return
+        target_path, _ = QFileDialog.getSaveFileName(self, "Guardar resultado como", source_path + ".out")
+        if not target_path:
+            return
+        if os.path.abspath(target_path) == os.path.abspath(source_path):
+            self.show_message("Advertencia", "El destino debe ser distinto del archivo de origen.", "warning")
+            return
+        
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setRange(0, 0)
+        self.status_label.setText(f"Reemplazando en archivo...{self.stream_warning(pattern)}")
+        self.replace_file_btn.setEnabled(False)
+        
+        self.substitute_worker = SubstituteWorker(pattern, self.template_input.text(), source_path, target_path)
+        self.substitute_worker.finished.connect(self.on_substitution_finished)
+        self.substitute_worker.error.connect(self.on_substitution_error)
+        self.substitute_worker.start()
+    
+    def on_substitution_finished(self, result):
+        """Informar el resultado del reemplazo en archivo"""
+        self.progress_bar.setVisible(False)
+        self.replace_file_btn.setEnabled(True)
+        self.status_label.setText(f"Reemplazo completado - {result['count']} reemplazos en {result['target_path']}")
+    
+    def on_substitution_error(self, error_msg):
+        """Manejar errores del reemplazo en archivo"""
+        self.progress_bar.setVisible(False)
+        self.replace_file_btn.setEnabled(True)
+        self.show_message("Error", error_msg, "error")
+        self.status_label.setText("Error en el reemplazo")
+    
+    def on_mode_changed(self):
+        """Mostrar sólo las opciones que aplican al modo elegido"""
+        mode = self.mode_combo.currentData()
+        self.limit_spin.setEnabled(mode in ('limit', 'aggregate'))
+        self.group_spin.setVisible(mode == 'aggregate')
+    
+    def on_budget_changed(self, megabytes):
+        """Aplicar el presupuesto de memoria a los resultados de los próximos análisis"""
+        SpanList.memory_budget = megabytes * 1024 * 1024
+    
+    def jump_to_match(self, index):
+        """Llevar el texto resaltado a la coincidencia seleccionada"""
+        span = index.data(Qt.ItemDataRole.UserRole)
+        if span:
+            start, end = span
+            self.highlighted_text.scroll_to_offset(start, end - start)
+    
+    def update_diagnostics(self):
+        """Actualizar la tasa de aciertos de la caché de resultados"""
+        stats = self.result_cache.stats()
+        self.ensure_diagnostics()
+        self.diagnostics_label.setText(
+            f"Caché: {stats['hits']} aciertos / {stats['misses']} fallos "
+            f"({stats['hit_rate']:.0%}) - {stats['entries']} entradas, "
+            f"{stats['bytes'] / 1024:.0f} KB"
+        )
+    
     def on_processing_error(self, error_msg):
         """Manejar errores del procesamiento"""
         self.progress_bar.setVisible(False)
@@ -824,101 +2372,101 @@ class RegexMainWindow(QMainWindow):
         self.process_btn.setEnabled(True)
         self.process_btn.setText("Analizar")
     
+    def estimate_cost(self):
+        """Estimar el costo de la regex sobre el texto con el motor instrumentado"""
+        # Mismo texto normalizado y banderas que `process_text`
+        pattern = self.regex_input.toPlainText().strip()
+        text = self.text_input.toPlainText().strip()
+        
+        if not pattern:
+            self.show_message("Advertencia", "Por favor ingrese una expresión regular.", "warning")
+            return
+            
+        if not text:
+            self.show_message("Advertencia", "Por favor ingrese texto a analizar.", "warning")
+            return
+        
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setRange(0, 0)
+        self.status_label.setText("Estimando costo del motor...")
+        
+        self.cost_text = text
+        self.cost_worker = CostWorker(pattern, text, 0)
+        self.cost_worker.finished.connect(self.on_cost_finished)
+        self.cost_worker.error.connect(self.on_cost_error)
+        self.cost_worker.start()
+        
+        self.cost_btn.setEnabled(False)
+        self.cost_btn.setText("Midiendo...")
+    
+    def on_cost_finished(self, report):
+        """Mostrar el mapa de calor de costo"""
+        self.progress_bar.setVisible(False)
+        unit = report['unit']
+        costs = report['line_costs']
+        
+        self.stats_label.setText(f"Costo total: {report['total']} {unit}")
+        if report['engine'] == 'nfa':
+            details = (f"Intentos: {report['attempts']} - Retrocesos: {report['backtracks']}"
+                       f" - Intentos agotados: {report['exhausted_attempts']}")
+        else:
+            details = "Medición por tiempo (construcción no soportada por el simulador)"
+        if report['truncated']:
+            details += " - Análisis truncado por presupuesto"
+        self.word_count_label.setText(details)
+        
+        self.matches_model.set_messages(*(f"Línea {line_num + 1}: {costs[line_num]} {unit}"
+                                          for line_num in report['hotspots']))
+        if not report['hotspots']:
+            self.matches_model.set_messages("Sin costo medible.")
+        
+        self.highlighted_text.show_cost_heatmap(self.cost_text, costs)
+        self.status_label.setText(f"Costo estimado - {report['matches']} coincidencias simuladas")
+        
+        self.cost_btn.setEnabled(True)
+        self.cost_btn.setText("Costo")
+    
+    def on_cost_error(self, error_msg):
+        """Manejar errores de la estimación de costo"""
+        self.progress_bar.setVisible(False)
+        self.show_message("Error", f"Error al estimar el costo:\n\n{error_msg}", "error")
+        self.status_label.setText("Error en la estimación de costo")
+        
+        self.cost_btn.setEnabled(True)
+        self.cost_btn.setText("Costo")
+    
     def show_message(self, title, message, msg_type):
         """Mostrar mensaje con estilo moderno"""
         msg_box = QMessageBox(self)
         msg_box.setWindowTitle(title)
         msg_box.setText(message)
         
-        if msg_type == "success":
-            msg_box.setIcon(QMessageBox.Icon.Information)
-            msg_box.setStyleSheet("""
-                QMessageBox {
-                    background: white;
-                    border-radius: 12px;
-                }
-                QMessageBox QLabel {
-                    color: #374151;
-                    font-size: 14px;
-                }
-                QPushButton {
-                    background: #3B82F6;
-                    color: white;
-                    border: none;
-                    border-radius: 6px;
-                    padding: 8px 16px;
-                    font-weight: 600;
-                }
-                QPushButton:hover {
-                    background: #2563EB;
-                }
-            """)
-        elif msg_type == "warning":
-            msg_box.setIcon(QMessageBox.Icon.Warning)
-            msg_box.setStyleSheet("""
-                QMessageBox {
-                    background: white;
-                    border-radius: 12px;
-                }
-                QMessageBox QLabel {
-                    color: #374151;
-                    font-size: 14px;
-                }
-                QPushButton {
-                    background: #F59E0B;
-                    color: white;
-                    border: none;
-                    border-radius: 6px;
-                    padding: 8px 16px;
-                    font-weight: 600;
-                }
-                QPushButton:hover {
-                    background: #D97706;
-                }
-            """)
-        elif msg_type == "error":
-            msg_box.setIcon(QMessageBox.Icon.Critical)
-            msg_box.setStyleSheet("""
-                QMessageBox {
-                    background: white;
-                    border-radius: 12px;
-                }
-                QMessageBox QLabel {
-                    color: #374151;
-                    font-size: 14px;
-                }
-                QPushButton {
-                    background: #EF4444;
-                    color: white;
-                    border: none;
-                    border-radius: 6px;
-                    padding: 8px 16px;
-                    font-weight: 600;
-                }
-                QPushButton:hover {
-                    background: #DC2626;
-                }
-            """)
+        msg_box.setProperty("kind", msg_type)
+        icons = {
+            "success": QMessageBox.Icon.Information,
+            "warning": QMessageBox.Icon.Warning,
+            "error": QMessageBox.Icon.Critical,
+        }
+        if msg_type in icons:
+            msg_box.setIcon(icons[msg_type])
         
         msg_box.exec()
     
     def clear_all(self):
         """Limpiar todos los campos"""
+        if self.follower is not None:
+            self.stop_follow()
         self.regex_input.clear()
         self.text_input.clear()
-        self.matches_list.clear()
+        self.matches_model.clear()
         self.highlighted_text.clear()
         self.stats_label.setText("Coincidencias encontradas: 0")
-        self.stats_label.setStyleSheet("""
-            font-weight: 700; 
-            font-size: 16px;
-            color: #6B7280;
-            background: #F9FAFB;
-            border: 2px solid #E5E7EB;
-            border-radius: 12px;
-            padding: 20px;
-        """)
+        self.set_stats_state('neutral')
         self.word_count_label.setText("Palabras en el texto: 0")
+        self.load_all_btn.setVisible(False)
+        if self.top_group is not None:
+            self.top_table.setRowCount(0)
+        self.hide_top_table()
         self.process_btn.setEnabled(False)
         self.status_label.setText("Listo para analizar")
     
@@ -927,16 +2475,18 @@ class RegexMainWindow(QMainWindow):
         self.show_message("Inicio", "Bienvenido a Regex Studio\n\nEsta es la pantalla principal donde puedes:\n• Ingresar expresiones regulares\n• Validar su sintaxis\n• Analizar texto\n• Ver coincidencias resaltadas", "success")
     
     def show_ayuda(self):
-        """Mostrar ventana de ayuda completa"""
+        """Mostrar ventana de ayuda completa (se construye una vez y se reutiliza)"""
+        if self.help_window is None:
+            self.help_window = self.create_help_window()
+        self.help_window.show()
+        self.help_window.raise_()
+        self.help_window.activateWindow()
+    
+    def create_help_window(self):
+        """Construir la ventana de ayuda"""
         ayuda_window = QMainWindow(self)
         ayuda_window.setWindowTitle("Ayuda - Regex Studio")
         ayuda_window.setGeometry(200, 200, 1000, 700)
-        ayuda_window.setStyleSheet("""
-            QMainWindow {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                    stop:0 #F8FAFC, stop:1 #F1F5F9);
-            }
-        """)
         
         # Widget central
         central_widget = QWidget()
@@ -949,43 +2499,14 @@ class RegexMainWindow(QMainWindow):
         
         # Título
         title_label = QLabel("📚 Guía Completa de Expresiones Regulares")
+        title_label.setObjectName("helpTitle")
         title_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        title_label.setStyleSheet("""
-            font-size: 24px;
-            font-weight: bold;
-            color: #1E293B;
-            margin-bottom: 20px;
-            padding: 20px;
-            background: qlineargradient(x1:0, y1:0, x2:1, y2:0,
-                stop:0 #3B82F6, stop:1 #1D4ED8);
-            color: white;
-            border-radius: 12px;
-        """)
         main_layout.addWidget(title_label)
         
         # Scroll area para el contenido
         scroll = QScrollArea()
         scroll.setWidgetResizable(True)
-        scroll.setStyleSheet("""
-            QScrollArea {
-                border: 2px solid #E2E8F0;
-                border-radius: 12px;
-                background: white;
-            }
-            QScrollBar:vertical {
-                background: #F1F5F9;
-                width: 12px;
-                border-radius: 6px;
-            }
-            QScrollBar::handle:vertical {
-                background: #CBD5E1;
-                border-radius: 6px;
-                min-height: 20px;
-            }
-            QScrollBar::handle:vertical:hover {
-                background: #94A3B8;
-            }
-        """)
+        scroll.setObjectName("helpScroll")
         
         scroll_widget = QWidget()
         scroll_layout = QVBoxLayout(scroll_widget)
@@ -1142,11 +2663,11 @@ class RegexMainWindow(QMainWindow):
         btn_layout.addStretch()
         btn_layout.addWidget(close_btn)
         main_layout.addLayout(btn_layout)
-        
-        ayuda_window.show()
+        return ayuda_window
 
 def main():
     """Función principal para ejecutar la aplicación"""
+    startup_mark('imports')
     app = QApplication(sys.argv)
     
     # Configurar estilo de la aplicación
@@ -1171,6 +2692,7 @@ def main():
     
     # Crear y mostrar ventana principal
     window = RegexMainWindow()
+    startup_mark('window')
     window.show()
     
     sys.exit(app.exec())
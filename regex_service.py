@@ -0,0 +1,162 @@
+import re
+import json
+import time
+import asyncio
+import contextlib
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from regex_engine import RegexValidator, iter_file_chunks, iter_stream_matches, parse_flags
+
+class RegexService:
+    """Servicio local asíncrono que atiende trabajos de búsqueda sobre un socket
+
+    Protocolo: una petición JSON por línea con `pattern` y `text` o `path`
+    (opcionales: `id`, `flags`, `batch`). Los archivos se leen por bloques y
+    pueden estar comprimidos con gzip, bz2 o xz. Las respuestas también son líneas
+    JSON: varios mensajes `spans` a medida que se encuentran y un `done` final,
+    o un único `error`.
+
+    Los trabajos corren en hilos: son concurrentes (uno lento no detiene a los
+    demás ni al bucle de eventos), pero `re` no libera el GIL, así que no se
+    ejecutan en paralelo y `max_jobs` no multiplica el rendimiento.
+    """
+
+    def __init__(self, max_jobs=4, queue_batches=8, batch_size=1000):
+        self.validator = RegexValidator()
+        self.max_jobs = max_jobs
+        self.queue_batches = queue_batches
+        self.batch_size = batch_size
+        self.executor = ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix="regex-job")
+        self.job_slots = None
+
+    async def serve(self, host="127.0.0.1", port=8765, unix_path=None):
+        """Inicia el servidor y atiende clientes hasta que se cancele"""
+        self.job_slots = asyncio.Semaphore(self.max_jobs)
+        if unix_path:
+            server = await asyncio.start_unix_server(self.handle_client, path=unix_path)
+        else:
+            server = await asyncio.start_server(self.handle_client, host, port)
+        async with server:
+            await server.serve_forever()
+
+    async def handle_client(self, reader, writer):
+        """Atiende las peticiones de un cliente, una tras otra"""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                await self.handle_request(line, writer)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def handle_request(self, line, writer):
+        job_id = None
+        try:
+            request = json.loads(line)
+            job_id = request.get('id')
+            pattern = request['pattern']
+            flags = parse_flags(request.get('flags'))
+            batch_size = int(request.get('batch') or self.batch_size)
+            text = request.get('text')
+            path = None if text is not None else request['path']
+            if text is not None and not isinstance(text, str):
+                raise TypeError("`text` debe ser una cadena")
+            if path is not None and not isinstance(path, str):
+                raise TypeError("`path` debe ser una cadena")
+            compiled = self.validator.compile(pattern, flags)
+        except (ValueError, KeyError, TypeError, re.error) as e:
+            await self.send(writer, {'id': job_id, 'type': 'error', 'message': str(e)})
+            return
+
+        # El semáforo limita los trabajos simultáneos entre todos los clientes
+        async with self.job_slots:
+            await self.run_job(job_id, compiled, text, path, batch_size, writer)
+
+    def iter_spans(self, compiled, text, path):
+        """Spans del texto o, por bloques, del archivo (descomprimido si hace falta)"""
+        if text is not None:
+            for match in compiled.finditer(text):
+                yield match.span()
+            return
+        for base, _segment, found in iter_stream_matches(compiled, iter_file_chunks(path)):
+            for start, end, _match in found:
+                yield base + start, base + end
+
+    async def run_job(self, job_id, compiled, text, path, batch_size, writer):
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self.queue_batches)
+        cancelled = threading.Event()
+        started = time.perf_counter()
+
+        def produce():
+            # La cola acotada bloquea al hilo si el cliente no consume (contrapresión)
+            count = 0
+            batch = []
+            try:
+                for span in self.iter_spans(compiled, text, path):
+                    if cancelled.is_set():
+                        return count
+                    batch.append(span)
+                    count += 1
+                    if len(batch) >= batch_size:
+                        asyncio.run_coroutine_threadsafe(queue.put(batch), loop).result()
+                        batch = []
+                if batch:
+                    asyncio.run_coroutine_threadsafe(queue.put(batch), loop).result()
+                return count
+            finally:
+                asyncio.run_coroutine_threadsafe(queue.put(None), loop).result()
+
+        producer = loop.run_in_executor(self.executor, produce)
+        try:
+            while True:
+                batch = await queue.get()
+                if batch is None:
+                    break
+                await self.send(writer, {'id': job_id, 'type': 'spans', 'spans': batch})
+        except ConnectionError:
+            cancelled.set()
+            while await queue.get() is not None:
+                pass
+            # El cliente ya no está: el error del productor (si lo hubo) sólo se recoge
+            with contextlib.suppress(Exception):
+                await producer
+            raise
+        try:
+            count = await producer
+        except Exception as e:  # E/S, descompresión o cualquier falla del patrón sobre el texto
+            await self.send(writer, {'id': job_id, 'type': 'error', 'message': str(e)})
+            return
+        await self.send(writer, {
+            'id': job_id,
+            'type': 'done',
+            'count': count,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 3),
+        })
+
+    async def send(self, writer, message):
+        writer.write(json.dumps(message, ensure_ascii=False).encode('utf-8') + b'\n')
+        await writer.drain()
+
+def main():
+    """Punto de entrada del servicio de búsqueda"""
+    parser = argparse.ArgumentParser(description="Servicio local de búsqueda con expresiones regulares")
+    parser.add_argument('--host', default='127.0.0.1', help="dirección de escucha TCP")
+    parser.add_argument('--port', type=int, default=8765, help="puerto TCP")
+    parser.add_argument('--unix', help="ruta de un socket Unix (reemplaza a host/puerto)")
+    parser.add_argument('--jobs', type=int, default=4, help="trabajos concurrentes como máximo (hilos; no en paralelo)")
+    args = parser.parse_args()
+
+    service = RegexService(max_jobs=args.jobs)
+    try:
+        asyncio.run(service.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
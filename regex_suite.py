@@ -0,0 +1,48 @@
+import sys
+import json
+import argparse
+
+from regex_engine import PatternSuite
+
+def print_report(report, show_slowest):
+    """Imprime el resumen del reporte en texto plano"""
+    for result in report['failed']:
+        print(f"FALLA  {result['name']}: {result['pattern']}")
+        for failure in result['failures']:
+            expected = "coincidir" if failure['expected'] else "no coincidir"
+            print(f"         debía {expected}: {failure['sample']!r}")
+    for result in report['errors']:
+        print(f"ERROR  {result['name']}: {result['error']}")
+    for result in report['timeouts']:
+        print(f"TIEMPO {result['name']}: {result['pattern']}")
+    if show_slowest and report['slowest']:
+        print("Más lentos:")
+        for result in report['slowest'][:show_slowest]:
+            print(f"  {result['elapsed'] * 1000:9.2f} ms  {result['name']} ({result['samples']} muestras)")
+    print(f"{report['passed']}/{report['total']} patrones correctos, {report['samples']} muestras "
+          f"en {report['elapsed']:.2f} s")
+
+def main():
+    """Punto de entrada del ejecutor de pruebas de patrones"""
+    parser = argparse.ArgumentParser(description="Ejecuta una suite de patrones con muestras positivas y negativas")
+    parser.add_argument('suite', help="archivo JSON de la suite")
+    parser.add_argument('--jobs', type=int, default=None, help="procesos del pool (por defecto, núcleos - 1)")
+    parser.add_argument('--timeout', type=float, default=1.0, help="presupuesto por patrón en segundos")
+    parser.add_argument('--slowest', type=int, default=10, help="cantidad de patrones lentos a listar")
+    parser.add_argument('--json', dest='json_path', help="guardar el reporte completo en JSON")
+    args = parser.parse_args()
+
+    try:
+        suite = PatternSuite.load(args.suite)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"No se pudo cargar la suite: {e}", file=sys.stderr)
+        return 2
+    report = suite.run(args.jobs, args.timeout, args.slowest)
+    print_report(report, args.slowest)
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0 if report['passed'] == report['total'] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+import random
+from collections import Counter
+
+import pytest
+
+from regex_engine import MatchFrequencyAggregator, RegexValidator
+
+def zipf_stream(seed, size=20000, keys=2000):
+    rng = random.Random(seed)
+    weights = [1 / rank ** 1.2 for rank in range(1, keys + 1)]
+    return [f'v{rank}' for rank in rng.choices(range(keys), weights, k=size)]
+
+def aggregate(values, memory_budget):
+    aggregator = MatchFrequencyAggregator(memory_budget)
+    for value in values:
+        aggregator.add(value)
+    return aggregator
+
+def test_exact_within_budget():
+    values = zipf_stream(1, size=3000, keys=50)
+    aggregator = aggregate(values, memory_budget=1 << 20)
+    assert aggregator.exact and aggregator.total == len(values)
+    expected = Counter(values)
+    assert aggregator.counts == expected
+    assert [(key, count) for key, count, _error in aggregator.top(10)] == expected.most_common(10)
+    assert all(error == 0 for _key, _count, error in aggregator.top(10))
+
+@pytest.mark.parametrize('seed', range(5))
+def test_space_saving_bounds_on_a_skewed_stream(seed):
+    values = zipf_stream(seed)
+    # Unas 60 entradas de ~163 bytes: el histograma pasa a Space-Saving enseguida
+    aggregator = aggregate(values, memory_budget=60 * 163)
+    expected = Counter(values)
+    assert not aggregator.exact and aggregator.total == len(values)
+    # La memoria queda acotada por la capacidad fijada al cambiar de modo
+    assert len(aggregator.counts) <= aggregator.capacity < 60
+    for key, count in aggregator.counts.items():
+        error = aggregator.errors.get(key, 0)
+        assert count - error <= expected[key] <= count, key
+        assert error <= aggregator.total / aggregator.capacity
+    # Todo valor más frecuente que total/capacidad sigue contado
+    for key, true_count in expected.items():
+        if true_count > aggregator.total / aggregator.capacity:
+            assert key in aggregator.counts, key
+    # Con esta asimetría los primeros puestos son exactos
+    assert [key for key, _count, _error in aggregator.top(3)] == [key for key, _ in expected.most_common(3)]
+
+def test_aggregate_counts_the_selected_group():
+    validator = RegexValidator()
+    text = 'user=ana id=1 user=luis id=2 user=ana id=3 id=4'
+    whole, error = validator.aggregate('user=(?P<name>\\w+)', text)
+    assert error is None and whole['top'] == [('user=ana', 2, 0), ('user=luis', 1, 0)]
+    for group in (1, 'name'):
+        result, error = validator.aggregate('user=(?P<name>\\w+)', text, group=group)
+        assert error is None and result['exact'] and result['total'] == 3
+        assert result['top'] == [('ana', 2, 0), ('luis', 1, 0)]
+    whole, _ = validator.aggregate('id=\\d', text)
+    assert whole['total'] == 4 and whole['tracked'] == 4
+
+def test_aggregate_skips_groups_that_did_not_take_part():
+    result, error = RegexValidator().aggregate('(a)|b', 'a b a b b', group=1)
+    assert error is None and result['total'] == 2 and result['top'] == [('a', 2, 0)]
+
+@pytest.mark.parametrize('pattern, group', [('(a)', 2), ('(?P<x>a)', 'y'), ('(', 0)])
+def test_aggregate_errors(pattern, group):
+    result, error = RegexValidator().aggregate(pattern, 'a', group=group)
+    assert result is None and error
@@ -0,0 +1,40 @@
+import re
+import random
+
+import pytest
+
+from regex_engine import RegexCostAnalyzer
+
+ATOMS = ['a', 'b', '.', '[ab]', '\\d', '(?:a|b)', '(a|ab)', '(?:ab)*', 'a*', 'b+?', '(?:a|)', '^', '$',
+         '\\b', '(?:a*)*', '(?:a|b)+?', 'a{2,3}', '(?:ab|a){1,2}?']
+
+@pytest.mark.parametrize('seed', range(5))
+def test_simulated_matches_agree_with_re(seed):
+    rng = random.Random(seed)
+    analyzer = RegexCostAnalyzer()
+    for _ in range(200):
+        pattern = ''.join(rng.choice(ATOMS) for _ in range(rng.randint(1, 4)))
+        text = ''.join(rng.choice('ab1 \n') for _ in range(rng.randint(0, 30)))
+        flags = rng.choice([0, re.IGNORECASE, re.MULTILINE, re.DOTALL])
+        report, error = analyzer.analyze(pattern, text, flags)
+        assert error is None and report['engine'] == 'nfa', (pattern, report.get('fallback_reason'))
+        assert report['matches'] == len(re.findall(pattern, text, flags)), (pattern, flags, text)
+        assert len(report['line_costs']) == text.count('\n') + 1
+
+@pytest.mark.parametrize('pattern', ['(?:ab|cd)*x', '(?:ab)*$', '(a|bc)+?x'])
+def test_long_input_is_simulated(pattern):
+    # Con un simulador recursivo estas entradas agotaban la pila y se medía con tiempo real
+    analyzer = RegexCostAnalyzer(attempt_budget=200000, total_budget=200000)
+    report, error = analyzer.analyze(pattern, 'ab' * 20000)
+    assert error is None
+    assert report['engine'] == 'nfa' and 'fallback_reason' not in report
+
+def test_backtracks_grow_with_nested_quantifiers():
+    analyzer = RegexCostAnalyzer()
+    safe, _ = analyzer.analyze('\\d+x', '1' * 12)
+    risky, _ = analyzer.analyze('(\\d+)+x', '1' * 12)
+    assert risky['backtracks'] > 100 * safe['backtracks']
+
+def test_unsupported_construct_falls_back_to_timing():
+    report, error = RegexCostAnalyzer().analyze('(a)\\1', 'aa ab aa')
+    assert error is None and report['engine'] == 'tiempo' and report['matches'] == 2
@@ -0,0 +1,80 @@
+import re
+import random
+from itertools import product
+
+import pytest
+
+from regex_engine import RegexDFA, RegexValidator
+
+ALPHABET = 'abc'
+SAMPLES = [''.join(chars) for size in range(7) for chars in product(ALPHABET, repeat=size)]
+
+def random_pattern(rng, depth=3):
+    """Regex aleatoria del subconjunto regular sobre un alfabeto chico"""
+    if depth == 0 or rng.random() < 0.3:
+        return rng.choice(['a', 'b', 'c', '[ab]', '[^a]', '.', 'a?'])
+    kind = rng.randrange(4)
+    if kind == 0:
+        return random_pattern(rng, depth - 1) + random_pattern(rng, depth - 1)
+    if kind == 1:
+        return f'(?:{random_pattern(rng, depth - 1)}|{random_pattern(rng, depth - 1)})'
+    if kind == 2:
+        return f'(?:{random_pattern(rng, depth - 1)}){rng.choice(["*", "+", "?", "*?", "{1,3}", "{2}"])}'
+    return f'({random_pattern(rng, depth - 1)})'
+
+@pytest.mark.parametrize('seed', range(5))
+def test_dfa_agrees_with_fullmatch(seed):
+    rng = random.Random(seed)
+    for _ in range(40):
+        pattern = random_pattern(rng)
+        dfa = RegexDFA.from_pattern(pattern)
+        compiled = re.compile(pattern)
+        for sample in SAMPLES:
+            assert dfa.fullmatch(sample) == bool(compiled.fullmatch(sample)), (pattern, sample)
+
+@pytest.mark.parametrize('pattern, states', [
+    # Los conteos incluyen el estado muerto
+    ('a', 3), ('(a|b)*', 2), ('ab|ac', 4), ('a[bc]', 4), ('(?:ab)*', 3), ('a{2,4}', 6), ('(a|b)*abb', 5),
+])
+def test_dfa_is_minimal(pattern, states):
+    assert RegexDFA.from_pattern(pattern).state_count == states
+
+@pytest.mark.parametrize('seed', range(5))
+def test_counterexample_is_a_shortest_difference(seed):
+    rng = random.Random(seed)
+    for _ in range(40):
+        pattern_a, pattern_b = random_pattern(rng, 2), random_pattern(rng, 2)
+        dfa_a, dfa_b = RegexDFA.from_pattern(pattern_a), RegexDFA.from_pattern(pattern_b)
+        compiled_a, compiled_b = re.compile(pattern_a), re.compile(pattern_b)
+        # SAMPLES está ordenado por largo: la primera diferencia es una de las más cortas
+        shortest = next((sample for sample in SAMPLES
+                         if bool(compiled_a.fullmatch(sample)) != bool(compiled_b.fullmatch(sample))), None)
+        found = dfa_a.counterexample(dfa_b)
+        if shortest is None:
+            assert found is None or len(found) > len(SAMPLES[-1]), (pattern_a, pattern_b)
+            continue
+        assert found is not None and len(found) == len(shortest), (pattern_a, pattern_b, found)
+        assert bool(compiled_a.fullmatch(found)) != bool(compiled_b.fullmatch(found))
+
+@pytest.mark.parametrize('pattern_a, pattern_b', [('(a|b)*', '[ab]*'), ('a+', 'aa*'), ('(?:ab)*a', 'a(?:ba)*'),
+                                                  ('x?y?', '(?:x|y|xy)?')])
+def test_compare_equivalent_patterns(pattern_a, pattern_b):
+    result, error = RegexValidator().compare_patterns(pattern_a, pattern_b)
+    assert error is None and result['equivalent'] and result['counterexample'] is None
+
+@pytest.mark.parametrize('pattern_a, pattern_b, counterexample, accepted_by', [
+    ('a{2,4}', 'a{2,5}', 'aaaaa', 'b'),
+    ('\\d+', '[0-9]+', '٠', 'a'),
+    ('ab|ba', 'ab', 'ba', 'a'),
+])
+def test_compare_reports_the_counterexample(pattern_a, pattern_b, counterexample, accepted_by):
+    result, error = RegexValidator().compare_patterns(pattern_a, pattern_b)
+    assert error is None and not result['equivalent']
+    assert result['counterexample'] == counterexample and result['accepted_by'] == accepted_by
+
+@pytest.mark.parametrize('pattern_a, pattern_b, message', [
+    ('(a)\\1', 'aa', 'Patrón actual'), ('a', '(?=a)a', 'Patrón alternativo'), ('(', 'a', 'Patrón actual'),
+])
+def test_compare_reports_unsupported_patterns(pattern_a, pattern_b, message):
+    result, error = RegexValidator().compare_patterns(pattern_a, pattern_b)
+    assert result is None and error.startswith(message)
@@ -0,0 +1,53 @@
+import re
+import random
+
+import pytest
+
+from regex_engine import SpanList, diff_spans
+
+PATTERNS = ['\\d+', '\\d{2}', '\\w+', '[a-c]+', 'a\\w', '\\b\\w{3}\\b', '\\s+\\d', 'ab|b', '1', '[^ ]{2,4}']
+
+def span_list(pattern, text):
+    spans = SpanList()
+    for match in re.finditer(pattern, text):
+        spans.append(*match.span())
+    return spans
+
+def overlaps(a, b):
+    return a[0] == b[0] or a[0] < b[1] and b[0] < a[1]
+
+def brute_force(old, new):
+    """Modelo cuadrático de la misma clasificación"""
+    old, new = list(old), list(new)
+    old_set, new_set = set(old), set(new)
+    return {
+        'unchanged': [span for span in new if span in old_set],
+        'removed': [a for a in old if a not in new_set and not any(overlaps(a, b) for b in new)],
+        'added': [b for b in new if b not in old_set and not any(overlaps(a, b) for a in old)],
+        'shifted': [b for b in new if b not in old_set and any(overlaps(a, b) for a in old)],
+    }
+
+@pytest.mark.parametrize('seed', range(10))
+def test_diff_spans_matches_brute_force(seed):
+    rng = random.Random(seed)
+    for _ in range(200):
+        text = ''.join(rng.choice('abc 12') for _ in range(rng.randint(0, 60)))
+        old = span_list(rng.choice(PATTERNS), text)
+        new = span_list(rng.choice(PATTERNS), text)
+        result = diff_spans(old, new)
+        expected = brute_force(old, new)
+        for kind, spans in expected.items():
+            assert list(result[kind]) == spans, (kind, text)
+        # `changes` trae eliminadas, agregadas y desplazadas en orden, con su tipo
+        labelled = sorted([(span, 0) for span in expected['removed']] + [(span, 1) for span in expected['added']]
+                          + [(span, 2) for span in expected['shifted']])
+        assert sorted(zip(result['changes'], result['kinds'])) == labelled
+
+def test_long_identical_runs_use_growing_blocks():
+    text = 'a1 ' * 5000
+    old = span_list('\\d', text)
+    new = span_list('\\d', text.replace('a1 a1', 'a1 a2', 1).replace('1', '9', 1))
+    result = diff_spans(old, new)
+    assert len(result['unchanged']) == len(old) and not result['changes']
+    shifted = diff_spans(span_list('\\d', text), span_list('a\\d', text))
+    assert len(shifted['shifted']) == len(old) and not shifted['unchanged']
@@ -0,0 +1,102 @@
+import re
+import csv
+import gzip
+import json
+
+import pytest
+
+from regex_engine import MatchExporter, MmapTextSource, RegexValidator, SpanList, StringTextSource
+
+TEXT = 'id=12 user=ana\nid=7 user=luis\nsin datos\nid=345 user=ñ\udcff\nfin'
+PATTERN = 'id=(?P<id>\\d+) user=(\\w*)'
+
+def exporter(pattern, text, source=None, context=MatchExporter.CONTEXT_CHARS):
+    compiled = re.compile(pattern)
+    spans = SpanList()
+    for match in compiled.finditer(text):
+        spans.append(*match.span())
+    return MatchExporter(compiled, source or StringTextSource(text), spans, context)
+
+def expected_records(pattern, text, context):
+    compiled = re.compile(pattern)
+    for i, match in enumerate(compiled.finditer(text), 1):
+        line_start = text.rfind('\n', 0, match.start()) + 1
+        # Ventana: la línea de la coincidencia, o hasta el salto de la última línea si cruza varias
+        line_end = text.find('\n', match.start())
+        line_end = len(text) if line_end < 0 else line_end
+        if match.end() > line_end:
+            line_end = text.find('\n', match.end() - 1)
+            line_end = len(text) if line_end < 0 else line_end + 1
+        yield {
+            'index': i, 'start': match.start(), 'end': match.end(),
+            'line': text.count('\n', 0, match.start()) + 1, 'column': match.start() - line_start + 1,
+            'match': match.group(), 'groups': match.groups(),
+            'before': text[max(line_start, match.start() - context):match.start()],
+            'after': text[match.end():min(line_end, match.end() + context)],
+        }
+
+@pytest.mark.parametrize('pattern', [PATTERN, '\\d+', 'datos\\nid', '(\\w)(?:=(\\d))?', '$'])
+@pytest.mark.parametrize('context', [3, 40])
+def test_records_match_finditer(pattern, context):
+    records = list(exporter(pattern, TEXT, context=context).records())
+    assert records == list(expected_records(pattern, TEXT, context))
+
+def test_csv_has_one_column_per_group(tmp_path):
+    path = tmp_path / 'salida.csv'
+    assert exporter(PATTERN, TEXT).write(str(path), 'csv') == 3
+    with open(path, encoding='utf-8', errors='surrogateescape', newline='') as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ['index', 'start', 'end', 'line', 'column', 'match', 'group_1', 'group_2', 'before', 'after']
+    assert rows[1][:8] == ['1', '0', '14', '1', '1', 'id=12 user=ana', '12', 'ana']
+    assert rows[3][5:8] == ['id=345 user=ñ', '345', 'ñ']
+
+def test_jsonl_names_groups(tmp_path):
+    path = tmp_path / 'salida.jsonl'
+    assert exporter(PATTERN, TEXT).write(str(path), 'jsonl') == 3
+    records = [json.loads(line) for line in path.read_text(encoding='utf-8', errors='surrogateescape').splitlines()]
+    assert [record['named'] for record in records] == [{'id': '12'}, {'id': '7'}, {'id': '345'}]
+    assert records[1]['groups'] == ['7', 'luis'] and records[1]['line'] == 2
+
+def test_spans_file_roundtrip(tmp_path, monkeypatch):
+    # Páginas chicas para que la escritura y la lectura crucen varias
+    monkeypatch.setattr(SpanList, 'PAGE_SIZE', 4)
+    text = TEXT * 5
+    path = tmp_path / 'datos.txt'
+    path.write_bytes(text.encode('utf-8', 'surrogateescape'))
+    source = MmapTextSource(str(path))
+    export = exporter('\\d', text, source)
+    assert export.write(str(tmp_path / 'salida.spans'), 'spans') == len(export.spans)
+    header, spans = MatchExporter.read_spans(str(tmp_path / 'salida.spans'))
+    assert list(spans) == list(export.spans)
+    assert header['pattern'] == '\\d' and header['count'] == len(spans)
+    assert header['source_length'] == source.length and header['source_digest'] == source.digest()
+    source.close()
+
+def test_spans_file_errors(tmp_path):
+    with pytest.raises(ValueError):
+        exporter('\\d', TEXT).write(str(tmp_path / 'salida.xml'), 'xml')
+    path = tmp_path / 'otro.spans'
+    path.write_bytes(b'no son spans')
+    with pytest.raises(ValueError):
+        MatchExporter.read_spans(str(path))
+
+@pytest.mark.parametrize('pattern, mode, limit', [(PATTERN, 'full', None), ('datos\\nid', 'full', None),
+                                                  ('\\d', 'limit', 4), ('(\\w)(?:=(\\d))?', 'full', None)])
+@pytest.mark.parametrize('chunk_size', [5, 1 << 20])
+def test_export_after_a_gzip_scan(tmp_path, monkeypatch, pattern, mode, limit, chunk_size):
+    # Con bloques chicos el contexto cae en segmentos vecinos
+    monkeypatch.setattr(MatchExporter, 'CHUNK_SIZE', chunk_size)
+    text = TEXT * 3
+    path = tmp_path / 'datos.txt.gz'
+    path.write_bytes(gzip.compress(text.encode('utf-8', 'surrogateescape')))
+    scan, error = RegexValidator().scan_file(pattern, str(path), mode, limit)
+    assert error is None and len(scan['spans'])
+    # Sin fuente mapeable se relee el archivo comprimido para los registros
+    streamed = MatchExporter(re.compile(pattern), None, scan['spans'], source_path=str(path))
+    in_memory = exporter(pattern, text)
+    assert list(streamed.records()) == list(in_memory.records())[:len(scan['spans'])]
+    assert streamed.write(str(tmp_path / 'salida.jsonl'), 'jsonl') == len(scan['spans'])
+    streamed.write(str(tmp_path / 'salida.spans'), 'spans')
+    header, spans = MatchExporter.read_spans(str(tmp_path / 'salida.spans'))
+    assert list(spans) == list(scan['spans'])
+    assert (header['source_length'], header['source_digest']) == (len(text), StringTextSource(text).digest())
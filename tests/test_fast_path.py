@@ -0,0 +1,90 @@
+import re
+import random
+
+import pytest
+
+import regex_engine
+from regex_engine import RegexValidator, _class_run_pages
+
+CLASSES = ['a', 'b', '\\d', '\\w', '\\s', '\\W', '.', '[a-c]', '[^ab]', '[\\dx]', '[a-zé]', '\xe9', '[^\\n]']
+QUANTIFIERS = ['', '+', '{2}', '{1,3}', '{2,}', '+?', '{2,3}?', '{3,}?', '++', '{1,2}+', '*', '?']
+FLAGS = [0, re.IGNORECASE, re.DOTALL, re.ASCII, re.IGNORECASE | re.ASCII, re.IGNORECASE | re.DOTALL]
+ALPHABET = 'aAbBcx19 \t\n_éÉ-ÿ'
+
+def fast_spans(compiled, text, page_chars=None):
+    pages = _class_run_pages(compiled, text, page_chars)
+    if pages is None:
+        return None
+    return [span for starts, ends in pages for span in zip(starts.tolist(), ends.tolist())]
+
+def random_case(rng):
+    pattern = rng.choice(CLASSES) + rng.choice(QUANTIFIERS)
+    text = ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 120)))
+    if rng.random() < 0.1:
+        # Fuera de latin-1: la vía vectorizada debe rendirse
+        text += '€'
+    return pattern, rng.choice(FLAGS), text
+
+@pytest.fixture
+def small_texts(monkeypatch):
+    # Con el umbral en cero los textos cortos también pasan por la vía vectorizada
+    monkeypatch.setattr(regex_engine, 'FAST_PATH_MIN_CHARS', 0)
+
+@pytest.mark.parametrize('seed', range(20))
+def test_fast_path_matches_finditer(small_texts, seed):
+    rng = random.Random(seed)
+    validator = RegexValidator()
+    for _ in range(200):
+        pattern, flags, text = random_case(rng)
+        expected = [match.span() for match in re.finditer(pattern, text, flags)]
+        # Tramos chicos: los cortes caen a menudo junto a rachas largas
+        for page_chars in (None, 5):
+            fast = fast_spans(re.compile(pattern, flags), text, page_chars)
+            assert fast is None or fast == expected, (pattern, flags, text, page_chars)
+        for mode, limit in (('full', None), ('limit', 3), ('count', None), ('exists', None)):
+            result, error = validator.scan(pattern, text, mode, limit, flags)
+            assert error is None
+            assert result['match_count'] == (len(expected) if mode in ('full', 'count')
+                                             else min(len(expected), limit or 1))
+            if result['spans'] is not None:
+                assert list(result['spans']) == expected[:len(result['spans'])]
+                assert result['matches'] == [text[start:end] for start, end in result['spans']]
+
+def test_fast_path_is_used(small_texts):
+    assert fast_spans(re.compile('\\d+'), 'abc 123 4') == [(4, 7), (8, 9)]
+
+def test_text_outside_latin1_continues_with_re(small_texts):
+    text = 'ab 12 ' * 20 + '€ 345' + ' 6' * 20
+    expected = [match.span() for match in re.finditer('\\d{2}', text)]
+    assert fast_spans(re.compile('\\d{2}'), text, 7) == expected
+
+@pytest.mark.parametrize('mode, limit', [('exists', None), ('limit', 2), ('full', None)])
+def test_early_exit_modes_skip_fast_path(small_texts, monkeypatch, mode, limit):
+    used = []
+    def tracking(compiled, text, page_chars=None):
+        used.append(mode)
+        return _class_run_pages(compiled, text, page_chars)
+    monkeypatch.setattr(regex_engine, '_class_run_pages', tracking)
+    result, error = RegexValidator().scan('[a-z]+', 'a b ' * 1000, mode, limit)
+    assert error is None and result['match_count'] == {'exists': 1, 'limit': 2, 'full': 2000}[mode]
+    assert used == ([mode] if mode == 'full' else [])
+
+def test_fast_path_respects_the_memory_budget(small_texts, monkeypatch):
+    monkeypatch.setattr(regex_engine.SpanList, 'memory_budget', 160)
+    result, error = RegexValidator().scan('\\d', '1a' * 100)
+    assert error is None and result['spans'].spilled and result['matches'] is None
+    assert list(result['spans']) == [(n, n + 1) for n in range(0, 200, 2)]
+
+def test_without_numpy_falls_back_to_re(small_texts, monkeypatch):
+    monkeypatch.setattr(regex_engine, '_load_numpy', lambda: None)
+    rng = random.Random(99)
+    validator = RegexValidator()
+    for _ in range(300):
+        pattern, flags, text = random_case(rng)
+        assert _class_run_pages(re.compile(pattern, flags), text) is None
+        result, error = validator.scan(pattern, text, flags=flags)
+        assert error is None
+        assert list(result['spans']) == [match.span() for match in re.finditer(pattern, text, flags)]
+
+def test_short_texts_skip_fast_path():
+    assert _class_run_pages(re.compile('\\d+'), '123') is None
@@ -0,0 +1,55 @@
+import os
+import re
+
+import pytest
+
+from regex_engine import LogFollower
+
+def follow(path, pattern, writes):
+    """Escribe cada bloque, lee con el seguidor y devuelve (texto visto, spans)"""
+    path.write_bytes(b'')
+    follower = LogFollower(str(path), re.compile(pattern))
+    seen = []
+    spans = []
+    for data in writes:
+        with open(path, 'ab') as f:
+            f.write(data)
+        update = follower.poll()
+        if update is not None:
+            assert update['base'] == sum(map(len, seen))
+            seen.append(update['text'])
+            spans.extend(update['spans'])
+    return ''.join(seen), spans
+
+@pytest.mark.parametrize('pattern', ['\\d+', '\\d\\n\\d', '(?m)^b.*$', 'a\\nb\\nc', '\\n+'])
+def test_follow_matches_finditer_on_complete_lines(tmp_path, pattern):
+    writes = [b'a1\nb', b'22\n3', b'\nb4 a\n', b'b\nc 5', b'\n\n\nb\n']
+    text, spans = follow(tmp_path / 'log.txt', pattern, writes)
+    assert b''.join(writes).decode().startswith(text)
+    # Una coincidencia que llega al final de lo leído espera a más datos
+    assert spans == [match.span() for match in re.finditer(pattern, text) if match.end() < len(text)]
+
+def test_match_across_the_partial_line_is_kept(tmp_path):
+    text, spans = follow(tmp_path / 'log.txt', 'x\\ny', [b'1 x\n', b'y', b' 2\n', b'x\nz\n'])
+    # Las últimas líneas quedan retenidas por si una coincidencia sigue en ellas
+    assert text == '1 x\ny 2\n'
+    assert spans == [(2, 5)]
+
+def test_non_utf8_bytes_keep_offsets(tmp_path):
+    data = b'caf\xe9 42\n\xff\xfe 7\n'
+    text, spans = follow(tmp_path / 'log.txt', '\\d+', [data])
+    assert text.encode('utf-8', 'surrogateescape') == data
+    assert [text[start:end] for start, end in spans] == ['42', '7']
+
+def test_rotation_restarts_from_the_beginning(tmp_path):
+    path = tmp_path / 'log.txt'
+    path.write_bytes(b'1 2 3\n')
+    follower = LogFollower(str(path), re.compile('\\d'))
+    assert follower.poll()['spans'].starts.tolist() == [0, 2, 4]
+    os.replace(_write(tmp_path / 'nuevo.txt', b'9\n'), path)
+    update = follower.poll()
+    assert update['rotated'] and update['base'] == 0 and list(update['spans']) == [(0, 1)]
+
+def _write(path, data):
+    path.write_bytes(data)
+    return path
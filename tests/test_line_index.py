@@ -0,0 +1,71 @@
+import random
+
+import pytest
+
+from regex_engine import LineIndex, MmapTextSource, StringTextSource
+
+ALPHABET = ['a', 'b', ' ', '\n', '\r\n', '\r', 'é', '\udcff', '\ud83d', '€', '😀']
+
+def random_text(rng, size):
+    return ''.join(rng.choice(ALPHABET) for _ in range(size))
+
+def expected_position(text, offset):
+    return text.count('\n', 0, offset), offset - (text.rfind('\n', 0, offset) + 1)
+
+def split(text, rng):
+    cuts = sorted(rng.randint(0, len(text)) for _ in range(rng.randint(0, 5)))
+    return [text[start:end] for start, end in zip([0] + cuts, cuts + [len(text)])]
+
+@pytest.mark.parametrize('seed', range(10))
+def test_extend_matches_indexing_the_whole_text(seed):
+    rng = random.Random(seed)
+    for _ in range(50):
+        text = random_text(rng, rng.randint(0, 80))
+        pieces = split(text, rng)
+        index = LineIndex(pieces[0])
+        for piece in pieces[1:]:
+            # Los cortes pueden caer entre \r y \n
+            index.extend(piece)
+        assert index.length == len(text)
+        assert index.line_starts == LineIndex(text).line_starts
+        assert index.line_count() == text.count('\n') + 1
+        for offset in range(len(text) + 1):
+            assert index.position(offset) == expected_position(text, offset), (text, offset)
+        lines = text.split('\n')
+        assert [text[slice(*index.line_span(line))] for line in range(index.line_count())] == lines
+
+def test_crlf_keeps_the_carriage_return_in_the_line():
+    index = LineIndex('ab\r\ncd\r\n')
+    assert index.line_starts.tolist() == [0, 4, 8]
+    assert index.position(2) == (0, 2) and index.position(4) == (1, 0)
+    assert index.line_span(0) == (0, 3)
+
+def test_from_starts_reuses_the_array():
+    original = LineIndex('a\nbb\n')
+    index = LineIndex.from_starts(original.line_starts, original.length)
+    assert index.line_starts is original.line_starts and index.position(3) == (1, 1)
+
+def test_string_source_appends_across_chunks():
+    source = StringTextSource('uno\r\ndos')
+    source.append(' \udcff\r')
+    source.append('\ntres\n')
+    text = 'uno\r\ndos \udcff\r\ntres\n'
+    assert source.length == len(text)
+    assert [source.line_text(line) for line in range(source.line_count())] == text.split('\n')
+    assert source.position(text.index('tres')) == (2, 0)
+    assert source.slice(0, source.length) == text
+
+def test_mmap_source_positions_match_the_decoded_text(tmp_path):
+    rng = random.Random(5)
+    text = random_text(rng, 400).replace('\ud83d', '').replace('\udcff', '')
+    # Bytes inválidos en UTF-8 se leen como sustitutos
+    data = text.encode('utf-8') + b'\xff fin\r\n'
+    text += '\udcff fin\r\n'
+    path = tmp_path / 'datos.txt'
+    path.write_bytes(data)
+    source = MmapTextSource(str(path))
+    assert source.length == len(text) and source.line_count() == text.count('\n') + 1
+    for offset in range(0, len(text) + 1, 7):
+        assert source.position(offset) == expected_position(text, offset)
+    assert [source.line_text(line) for line in range(source.line_count())] == text.split('\n')
+    source.close()
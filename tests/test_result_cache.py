@@ -0,0 +1,71 @@
+import hashlib
+
+import pytest
+
+import regex_engine
+from regex_engine import MatchResultCache, SpanList, TrigramIndex
+
+def result(span_count):
+    spans = SpanList()
+    for n in range(span_count):
+        spans.append(n, n + 1)
+    return {'spans': spans, 'matches': None}
+
+def test_evicts_least_recently_used_by_bytes():
+    # Cada resultado de 4 spans ocupa 64 bytes: caben tres
+    cache = MatchResultCache(max_bytes=200)
+    for name in 'abc':
+        cache.put(name, result(4))
+    assert cache.total_bytes == 192
+    assert cache.get('a') is not None
+    cache.put('d', result(4))
+    assert cache.get('b') is None and cache.get('a') is not None
+    assert cache.stats()['entries'] == 3 and cache.stats()['bytes'] == 192
+    # Orden de uso: c, d, a; uno grande desaloja a los dos menos usados
+    cache.put('e', result(8))
+    assert [key for key in 'acde' if cache.get(key) is not None] == ['a', 'e']
+    assert cache.total_bytes == 192
+
+def test_result_larger_than_the_cache_is_skipped():
+    cache = MatchResultCache(max_bytes=100)
+    cache.put('a', result(2))
+    cache.put('grande', result(10))
+    assert cache.get('grande') is None and cache.get('a') is not None
+
+def test_replacing_a_key_updates_the_size():
+    cache = MatchResultCache(max_bytes=1000)
+    cache.put('a', result(10))
+    cache.put('a', result(2))
+    assert cache.total_bytes == 32 and cache.stats()['entries'] == 1
+
+def test_estimate_counts_matches_and_groups():
+    assert MatchResultCache.estimate_bytes({'spans': None, 'matches': ['ab', ('a', 'bc')]}) == \
+           (49 + 2) + (56 + 49 + 1 + 49 + 2)
+
+def test_stats_track_hits():
+    cache = MatchResultCache()
+    cache.put('a', result(1))
+    cache.get('a')
+    cache.get('b')
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'hit_rate': 0.5, 'entries': 1, 'bytes': 16}
+
+@pytest.mark.parametrize('changed', [
+    ('\\d', 0, 'a1b2', ('full', None)),
+    ('\\d+', 2, 'a1b2', ('full', None)),
+    ('\\d+', 0, 'a1b3', ('full', None)),
+    ('\\d+', 0, 'a1b2 ', ('full', None)),
+    ('\\d+', 0, 'a1b2', ('limit', 1)),
+    ('\\d+', 0, 'a1b2', ('count', None)),
+])
+def test_key_depends_on_every_input(changed):
+    base = MatchResultCache.make_key('\\d+', 0, 'a1b2', ('full', None))
+    assert MatchResultCache.make_key('\\d+', 0, 'a1b2', ['full', None]) == base
+    assert MatchResultCache.make_key(*changed) != base
+
+def test_text_is_hashed_in_chunks(monkeypatch):
+    # Con bloques de 4 caracteres el hash debe ser el del texto completo
+    monkeypatch.setattr(regex_engine, 'STREAM_CHUNK_SIZE', 4)
+    text = 'línea \udcff con sustitutos\n' * 3
+    expected = hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16)
+    assert MatchResultCache.make_key('a', 0, text)[3] == expected.digest()
+    assert TrigramIndex.text_digest(text) == expected.hexdigest()
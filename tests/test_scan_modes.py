@@ -0,0 +1,35 @@
+import re
+
+import pytest
+
+from regex_engine import RegexValidator
+
+TEXT = 'a1 b22 c333 d4444 e5'
+
+@pytest.mark.parametrize('mode, limit, count, complete', [
+    ('full', None, 5, True),
+    ('limit', 2, 2, False),
+    ('limit', 5, 5, True),
+    ('limit', None, 5, True),
+    ('count', None, 5, True),
+    ('exists', None, 1, False),
+])
+@pytest.mark.parametrize('pattern', ['\\d+', '(\\d)\\d*'])
+def test_scan_modes(pattern, mode, limit, count, complete):
+    result, error = RegexValidator().scan(pattern, TEXT, mode, limit)
+    assert error is None
+    assert result['match_count'] == count and result['complete'] == complete
+    if mode != 'count':
+        assert list(result['spans']) == [match.span() for match in re.finditer(pattern, TEXT)][:count]
+
+@pytest.mark.parametrize('mode, limit, count', [('limit', None, 5), ('limit', 3, 3), ('exists', None, 1)])
+def test_scan_file_modes(tmp_path, mode, limit, count):
+    path = tmp_path / 'texto.txt'
+    path.write_text(TEXT.replace(' ', '\n'), encoding='utf-8')
+    result, error = RegexValidator().scan_file('\\d+', str(path), mode, limit)
+    assert error is None and result['match_count'] == count
+    assert list(result['line_numbers']) == list(range(count))
+
+def test_unknown_mode():
+    result, error = RegexValidator().scan('a', 'a', 'todo')
+    assert result is None and error
@@ -0,0 +1,67 @@
+import json
+import asyncio
+
+import pytest
+
+from regex_service import RegexService
+
+class FakeWriter:
+    """Escritor en memoria que guarda los mensajes JSON enviados"""
+
+    def __init__(self):
+        self.messages = []
+
+    def write(self, data):
+        self.messages.append(json.loads(data))
+
+    async def drain(self):
+        pass
+
+def request(service, payload):
+    async def run():
+        service.job_slots = asyncio.Semaphore(service.max_jobs)
+        writer = FakeWriter()
+        await service.handle_request(json.dumps(payload).encode('utf-8'), writer)
+        return writer.messages
+    return asyncio.run(run())
+
+@pytest.fixture
+def service():
+    service = RegexService(max_jobs=2, batch_size=2)
+    yield service
+    service.executor.shutdown()
+
+def test_text_job_streams_batches(service):
+    messages = request(service, {'id': 7, 'pattern': '\\d+', 'text': 'a1 b22 c333'})
+    assert [message['type'] for message in messages] == ['spans', 'spans', 'done']
+    assert [span for message in messages[:-1] for span in message['spans']] == [[1, 2], [4, 6], [8, 11]]
+    assert messages[-1]['count'] == 3 and messages[-1]['id'] == 7
+
+def test_file_job(service, tmp_path):
+    path = tmp_path / 'log.txt'
+    path.write_text('x 12\ny 345\n', encoding='utf-8')
+    messages = request(service, {'pattern': '\\d+', 'path': str(path)})
+    assert messages[-1] == {**messages[-1], 'type': 'done', 'count': 2}
+
+@pytest.mark.parametrize('payload', [
+    {'pattern': 'a', 'text': 123},
+    {'pattern': 'a', 'path': ['a.txt']},
+    {'pattern': 'a', 'path': 5},
+    {'pattern': '(', 'text': 'a'},
+    {'pattern': 'a', 'text': 'a', 'flags': ['NOPE']},
+])
+def test_invalid_requests_get_an_error(service, payload):
+    messages = request(service, {'id': 1, **payload})
+    assert len(messages) == 1 and messages[0]['type'] == 'error' and messages[0]['id'] == 1
+
+def test_missing_file_gets_an_error(service, tmp_path):
+    messages = request(service, {'pattern': 'a', 'path': str(tmp_path / 'no-existe.txt')})
+    assert messages[-1]['type'] == 'error'
+
+def test_producer_failure_gets_an_error(service, monkeypatch):
+    def failing_spans(compiled, text, path):
+        yield 0, 1
+        raise TypeError("falla del productor")
+    monkeypatch.setattr(service, 'iter_spans', failing_spans)
+    messages = request(service, {'pattern': 'a', 'text': 'a'})
+    assert messages[-1]['type'] == 'error' and 'productor' in messages[-1]['message']
@@ -0,0 +1,117 @@
+import os
+import re
+from array import array
+
+import pytest
+
+from regex_engine import LineIndex, MappedArray, MmapTextSource, SessionSnapshot, SpanList, StringTextSource
+
+STATE = {'pattern': '\\d+', 'flags': 0, 'mode': 'full', 'limit': None, 'complete': True}
+TEXT = 'línea 1 con 22\nsegunda 333\n\udcff 4444\núltima'
+
+def spans_of(text):
+    spans = SpanList()
+    for match in re.finditer('\\d+', text):
+        spans.append(*match.span())
+    return spans
+
+def test_text_session_roundtrip(tmp_path):
+    path = str(tmp_path / 'sesion.rxs')
+    written = SessionSnapshot.save(path, StringTextSource(TEXT), spans_of(TEXT), STATE)
+    assert written == os.path.getsize(path) and written % 8 == 0
+    snapshot = SessionSnapshot.load(path)
+    assert not snapshot.stale
+    assert snapshot.header['pattern'] == '\\d+' and snapshot.header['count'] == 4
+    assert snapshot.source.slice(0, snapshot.source.length) == TEXT
+    assert list(snapshot.source.line_index.line_starts) == list(LineIndex(TEXT).line_starts)
+    assert list(snapshot.spans) == list(spans_of(TEXT))
+    # Los spans se leen del archivo mapeado, pero siguen creciendo (modo seguimiento)
+    assert isinstance(snapshot.spans.starts, MappedArray)
+    snapshot.spans.append(100, 101)
+    assert snapshot.spans[len(snapshot.spans) - 1] == (100, 101)
+
+@pytest.fixture
+def analyzed_file(tmp_path):
+    path = tmp_path / 'datos.txt'
+    path.write_bytes(TEXT.encode('utf-8', 'surrogateescape'))
+    source = MmapTextSource(str(path))
+    session = str(tmp_path / 'archivo.rxs')
+    SessionSnapshot.save(session, source, spans_of(source.slice(0, source.length)), STATE)
+    source.close()
+    return path, session
+
+def test_trusted_mtime_skips_the_digest(analyzed_file, monkeypatch):
+    _path, session = analyzed_file
+    def no_digest(self):
+        raise AssertionError("no debe releer el archivo")
+    monkeypatch.setattr(MmapTextSource, 'digest', no_digest)
+    snapshot = SessionSnapshot.load(session, trust_mtime=True)
+    assert not snapshot.stale and len(snapshot.spans) == 4
+    assert snapshot.source.line_text(2) == '\udcff 4444'
+    snapshot.source.close()
+
+def test_touched_file_with_same_content_is_kept(analyzed_file):
+    path, session = analyzed_file
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    snapshot = SessionSnapshot.load(session)
+    assert not snapshot.stale
+    snapshot.source.close()
+
+def test_changed_file_is_stale(analyzed_file):
+    path, session = analyzed_file
+    stat = os.stat(path)
+    data = path.read_bytes()
+    path.write_bytes(data.replace(b'22', b'XX'))
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert SessionSnapshot.load(session).stale
+    path.write_bytes(data + b'\nmas')
+    assert SessionSnapshot.load(session).stale
+
+def test_rewrite_keeping_the_mtime_is_stale(analyzed_file):
+    path, session = analyzed_file
+    stat = os.stat(path)
+    path.write_bytes(path.read_bytes().replace(b'22', b'XX'))
+    # Como `cp -p` o `touch -r`: mismo tamaño y misma fecha, distinto contenido
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert SessionSnapshot.load(session).stale
+    snapshot = SessionSnapshot.load(session, trust_mtime=True)
+    assert not snapshot.stale
+    snapshot.source.close()
+
+def test_not_a_session(tmp_path):
+    path = tmp_path / 'otro.bin'
+    path.write_bytes(b'no es una sesion')
+    with pytest.raises(ValueError):
+        SessionSnapshot.load(str(path))
+
+def mapped(values):
+    return MappedArray(memoryview(array('q', values)).cast('B').cast('q'))
+
+def test_mapped_array_grows_and_pops_past_the_mapping():
+    values = list(range(0, 50, 5))
+    stored = mapped(values)
+    assert stored.tail is None and list(stored) == values
+    stored.append(100)
+    stored.extend([105, 110])
+    values += [100, 105, 110]
+    assert len(stored) == len(values) and list(stored) == values
+    assert stored[-1] == 110 and stored[9] == 45 and stored[10] == 100
+    assert stored[8:12] == array('q', values[8:12]) and stored[::4] == array('q', values[::4])
+    with pytest.raises(IndexError):
+        stored[len(values)]
+    # Primero se quita lo agregado y después se acorta la vista, sin tocar el mapeo
+    assert [stored.pop() for _ in range(5)] == values[:-6:-1]
+    assert len(stored.tail) == 0 and list(stored) == values[:-5]
+    stored.append(7)
+    assert list(stored) == values[:-5] + [7]
+
+def test_session_spans_grow_and_pop(tmp_path):
+    path = str(tmp_path / 'sesion.rxs')
+    SessionSnapshot.save(path, StringTextSource(TEXT), spans_of(TEXT), STATE)
+    spans = SessionSnapshot.load(path).spans
+    expected = list(spans_of(TEXT))
+    spans.extend(array('q', [60, 70]), array('q', [61, 72]))
+    assert list(spans) == expected + [(60, 61), (70, 72)]
+    assert [spans.pop() for _ in range(4)] == [(70, 72), (60, 61), expected[3], expected[2]]
+    assert list(spans) == expected[:2]
@@ -0,0 +1,52 @@
+import re
+
+import pytest
+from multiprocessing import shared_memory
+
+from regex_engine import (LineIndex, RegexValidator, SharedText, SpanList, get_process_pool, read_shared_result,
+                          _read_shared_text, _scan_to_shared_memory)
+
+TEXT = 'año 12\nné 345\n\udcff 6\n' * 50
+
+def test_shared_text_roundtrip_in_chunks():
+    with SharedText(TEXT, chunk_chars=7) as shared:
+        assert _read_shared_text(shared.ref) == TEXT
+
+@pytest.mark.parametrize('mode, limit', [('full', None), ('limit', 5), ('count', None)])
+def test_pool_scan_returns_spans_and_line_index(mode, limit):
+    with SharedText(TEXT) as shared:
+        future = get_process_pool().submit(_scan_to_shared_memory, '\\d+', 0, shared.ref, mode, limit, True)
+        name, span_count, count, complete, line_count = future.result()
+    spans, line_starts = read_shared_result(name, span_count, line_count)
+    expected = [match.span() for match in re.finditer('\\d+', TEXT)]
+    assert count == (5 if mode == 'limit' else len(expected))
+    assert spans is None if mode == 'count' else list(spans) == expected[:count]
+    assert line_starts == LineIndex(TEXT).line_starts
+    # El padre liberó el segmento al leerlo
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
+
+def test_nothing_to_copy():
+    assert _scan_to_shared_memory('x', 0, 'abc', 'count') == (None, None, 0, True, 0)
+    assert read_shared_result(None, None) == (None, None)
+
+def test_budget_reaches_both_processes(monkeypatch):
+    # El hijo recibe el presupuesto y el padre copia los spans por páginas a una lista que se vuelca
+    monkeypatch.setattr(SpanList, 'PAGE_SIZE', 16)
+    with SharedText(TEXT) as shared:
+        future = get_process_pool().submit(_scan_to_shared_memory, '\\d', 0, shared.ref, 'full', None, False, 160)
+        name, span_count, _count, _complete, _lines = future.result()
+    spans, line_starts = read_shared_result(name, span_count, 0, 160)
+    assert spans.spilled and line_starts is None
+    assert list(spans) == [match.span() for match in re.finditer('\\d', TEXT)]
+
+def test_child_scan_uses_the_budget(monkeypatch):
+    budgets = []
+    original = RegexValidator.scan
+    def tracking(self, *args, **kwargs):
+        budgets.append(kwargs.get('memory_budget'))
+        return original(self, *args, **kwargs)
+    monkeypatch.setattr(RegexValidator, 'scan', tracking)
+    name, span_count, _count, _complete, _lines = _scan_to_shared_memory('\\d', 0, TEXT, memory_budget=160)
+    read_shared_result(name, span_count)
+    assert budgets == [160]
@@ -0,0 +1,82 @@
+import random
+from array import array
+
+import pytest
+
+from regex_engine import SpanList, SpillArray
+
+@pytest.fixture
+def small_batches(monkeypatch):
+    # Lotes chicos para que las pruebas crucen varios vaciados al archivo
+    monkeypatch.setattr(SpillArray, 'BATCH_SIZE', 8)
+
+def test_spill_array_reads_like_a_list(small_batches):
+    values = [7 * n - 50 for n in range(100)]
+    spilled = SpillArray(values[:30])
+    for value in values[30:60]:
+        spilled.append(value)
+    spilled.extend(values[60:])
+    assert spilled.count > 0 and len(spilled) == len(values)
+    assert list(spilled) == values
+    assert spilled[0] == values[0] and spilled[-1] == values[-1] and spilled[-3] == values[-3]
+    assert spilled[10:90] == array('q', values[10:90])
+    assert spilled[5:99:7] == array('q', values[5:99:7])
+    assert spilled[95:200] == array('q', values[95:])
+    with pytest.raises(IndexError):
+        spilled[-101]
+
+@pytest.mark.parametrize('seed', range(5))
+def test_spill_array_pop_and_append_interleaved(small_batches, seed):
+    rng = random.Random(seed)
+    spilled = SpillArray()
+    model = []
+    for _ in range(2000):
+        if model and rng.random() < 0.4:
+            assert spilled.pop() == model.pop()
+        elif rng.random() < 0.2:
+            values = [rng.randint(-10**12, 10**12) for _ in range(rng.randint(0, 20))]
+            spilled.extend(values)
+            model.extend(values)
+        else:
+            value = rng.randint(-10**12, 10**12)
+            spilled.append(value)
+            model.append(value)
+        assert len(spilled) == len(model)
+    # La lectura por mapeo ve lo escrito tras los pop, aunque el archivo no se haya truncado
+    assert list(spilled) == model
+    assert spilled[:] == array('q', model)
+
+def test_pop_everything_from_disk(small_batches):
+    spilled = SpillArray(range(40))
+    spilled.flush()
+    assert [spilled.pop() for _ in range(40)] == list(range(39, -1, -1))
+    assert len(spilled) == 0 and list(spilled) == []
+    spilled.extend(range(100, 120))
+    assert list(spilled) == list(range(100, 120))
+
+def test_span_list_spills_past_the_budget(small_batches):
+    # 16 bytes por span: un presupuesto de 160 bytes admite 10 spans en memoria
+    spans = SpanList(memory_budget=160)
+    expected = []
+    for n in range(10):
+        spans.append(2 * n, 2 * n + 1)
+        expected.append((2 * n, 2 * n + 1))
+    assert not spans.spilled and spans.memory_bytes() == 160
+    spans.append(20, 21)
+    expected.append((20, 21))
+    assert spans.spilled
+    starts = array('q', range(22, 200, 2))
+    spans.extend(starts, array('q', (start + 1 for start in starts)))
+    expected.extend((start, start + 1) for start in starts)
+    assert len(spans) == len(expected) and list(spans) == expected
+    # Lo ya volcado no cuenta como memoria
+    assert spans.memory_bytes() < 16 * len(expected)
+    assert spans[len(spans) - 1] == expected[-1] and spans[3] == expected[3]
+    assert [(pos, list(zip(page_starts, page_ends))) for pos, page_starts, page_ends in spans.pages(40)] == \
+           [(pos, expected[pos:pos + 40]) for pos in range(0, len(expected), 40)]
+    assert [spans.pop() for _ in range(5)] == expected[:-6:-1]
+    assert list(spans) == expected[:-5]
+
+def test_span_list_created_over_the_budget_spills():
+    spans = SpanList(array('q', range(10)), array('q', range(1, 11)), memory_budget=64)
+    assert spans.spilled and list(spans) == [(n, n + 1) for n in range(10)]
@@ -0,0 +1,53 @@
+import re
+import random
+
+import pytest
+
+from regex_engine import iter_stream_matches, substitute_stream
+
+PATTERNS = ['\\d{2,3}', '\\d+', '\\b\\w{3}\\b', 'ab|b', '[a-c]{2}(?=\\d)', '(?m)^\\w+$', '\\s*', 'x?',
+            '\\d\\n\\d', '(?s)a.{0,4}b', '(?<=a)\\d{2}']
+ALPHABET = 'ab c12x\n'
+
+def chunked(text, rng, largest=9):
+    pos = 0
+    while pos < len(text):
+        size = rng.randint(1, largest)
+        yield text[pos:pos + size]
+        pos += size
+
+def streamed_spans(compiled, chunks, max_line):
+    return [(base + start, base + end)
+            for base, _segment, found in iter_stream_matches(compiled, chunks, max_line)
+            for start, end, _match in found]
+
+@pytest.mark.parametrize('pattern', PATTERNS)
+@pytest.mark.parametrize('max_line', [4, 7, 1000])
+def test_stream_matches_finditer(pattern, max_line):
+    rng = random.Random(f'{pattern}/{max_line}')
+    compiled = re.compile(pattern)
+    for _ in range(150):
+        # Pocos saltos de línea: las líneas superan `max_line` y se cortan a mitad
+        text = ''.join(rng.choice(ALPHABET[:-1] if rng.random() < 0.9 else ALPHABET)
+                       for _ in range(rng.randint(0, 80)))
+        expected = [match.span() for match in compiled.finditer(text)]
+        assert streamed_spans(compiled, chunked(text, rng), max_line) == expected, (pattern, text)
+
+def test_forced_cut_keeps_digit_runs():
+    compiled = re.compile('\\d{2,3}')
+    text = '7' + '1234567 ' * 50
+    chunks = [text[pos:pos + 5] for pos in range(0, len(text), 5)]
+    expected = [match.span() for match in compiled.finditer(text)]
+    assert streamed_spans(compiled, chunks, max_line=6) == expected
+
+@pytest.mark.parametrize('pattern, template', [('\\d{2,3}', '<\\g<0>>'), ('(\\w)(\\d)', '\\2\\1'),
+                                               ('\\s*', '_'), ('c1', '')])
+def test_substitute_stream_matches_sub_on_long_lines(pattern, template):
+    rng = random.Random(7)
+    compiled = re.compile(pattern)
+    for _ in range(100):
+        text = ''.join(rng.choice(ALPHABET[:-1]) for _ in range(rng.randint(0, 60)))
+        output = []
+        count = substitute_stream(compiled, template, chunked(text, rng), output.append, max_line=5)
+        assert ''.join(output) == compiled.sub(template, text), (pattern, text)
+        assert count == len(compiled.findall(text))
@@ -0,0 +1,70 @@
+import re
+import json
+
+import pytest
+
+from regex_engine import PATTERN_CACHE_SIZE, PatternSuite, RegexValidator, _build_dfa_cached, _compile_cached, _run_suite_case
+
+def write_suite(tmp_path, cases):
+    path = tmp_path / 'suite.json'
+    path.write_text(json.dumps(cases), encoding='utf-8')
+    return str(path)
+
+def case(pattern, positive=(), negative=(), flags=0, mode='search'):
+    return {'name': pattern, 'pattern': pattern, 'flags': flags, 'mode': mode,
+            'positive': list(positive), 'negative': list(negative)}
+
+@pytest.mark.parametrize('entry', [
+    {'pattern': 'a', 'positive': ['a', 1]},
+    {'pattern': 'a', 'negative': [None]},
+    {'pattern': 'a', 'positive': 'a'},
+    {'pattern': 'a', 'flags': 2.5},
+    {'pattern': 'a', 'flags': ['NOPE']},
+    {'pattern': 'a', 'mode': 'match'},
+    {'positive': ['a']},
+])
+def test_load_rejects_malformed_cases(tmp_path, entry):
+    with pytest.raises(ValueError):
+        PatternSuite.load(write_suite(tmp_path, [entry]))
+
+def test_load_reads_cases(tmp_path):
+    suite = PatternSuite.load(write_suite(tmp_path, {'patterns': [
+        {'name': 'fecha', 'pattern': '\\d{4}', 'flags': ['IGNORECASE'], 'mode': 'fullmatch',
+         'positive': ['2024'], 'negative': ['24']},
+    ]}))
+    assert suite.cases == [{'name': 'fecha', 'pattern': '\\d{4}', 'flags': re.IGNORECASE, 'mode': 'fullmatch',
+                            'positive': ['2024'], 'negative': ['24']}]
+
+@pytest.mark.parametrize('bad', [case('a', flags=re.LOCALE), case('(', ['a']), case('a', ['a', 5])])
+def test_bad_case_reports_error(bad):
+    result = _run_suite_case(bad, timeout=1.0)
+    assert result['status'] == 'error' and result['error']
+
+def test_run_reports_each_status():
+    suite = PatternSuite([
+        case('\\d+', ['a1'], ['abc']),
+        case('\\d+', ['abc']),
+        case('a', ['a'], flags=re.LOCALE),
+        case('a', [b'a']),
+        case('x{2}', ['xx'], ['x'], mode='fullmatch'),
+    ])
+    report = suite.run(processes=2, timeout=5.0)
+    assert [result['status'] for result in report['cases']] == ['ok', 'fail', 'error', 'error', 'ok']
+    assert report['passed'] == 2 and report['samples'] == 5
+    assert report['failed'][0]['failures'] == [{'sample': 'abc', 'expected': True, 'matched': False}]
+
+@pytest.mark.parametrize('flags', [None, 0])
+def test_warm_up_fills_the_compile_cache(flags):
+    validator = RegexValidator()
+    pattern = 'calentado-%s-\\d+' % flags
+    suite = PatternSuite([case(pattern, flags=re.IGNORECASE)])
+    report = suite.warm_up(validator, pause=0, flags=flags)
+    assert report['warmed'] == 1 and not report['failed']
+    hits = _compile_cached.cache_info().hits
+    # La clave que usará el análisis: la interfaz compila siempre sin banderas
+    validator.compile(pattern, re.IGNORECASE if flags is None else 0)
+    assert _compile_cached.cache_info().hits == hits + 1
+
+def test_dfa_cache_holds_the_warmed_library():
+    # El precalentamiento construye los DFA: su caché debe alcanzar para toda la biblioteca
+    assert _build_dfa_cached.cache_info().maxsize == PATTERN_CACHE_SIZE == _compile_cached.cache_info().maxsize
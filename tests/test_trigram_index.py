@@ -0,0 +1,32 @@
+import re
+
+import pytest
+
+from regex_engine import RegexValidator, TrigramIndex
+
+# Letras no ASCII que con IGNORECASE coinciden con letras ASCII: ſ (s), K (signo Kelvin), İ e ı (i)
+TEXT = ("línea sin nada interesante\n" * 200
+        + "MAſK en una línea\n"
+        + "relleno\n" * 300
+        + "taKE con signo Kelvin\n"
+        + "relleno\n" * 300
+        + "LİNEA con I turca\n"
+        + "mask en minúsculas\n")
+
+@pytest.fixture(scope='module')
+def index():
+    return TrigramIndex.build(TEXT, block_lines=16)
+
+@pytest.mark.parametrize('pattern', [
+    'mask', '(?i)mask', '(?i)MASK', '(?i)ask', '(?i)take', '(?i)línea', '(?i)linea',
+    '(?i)task|mask', '(?i)(?:ma)+sk', '(?ai)mask', '(?ai)take', 'MAſK', '(?i)maſk',
+])
+def test_indexed_scan_matches_finditer(index, pattern):
+    result, error = RegexValidator().scan(pattern, TEXT, index=index)
+    assert error is None
+    assert list(result['spans']) == [match.span() for match in re.finditer(pattern, TEXT)]
+
+def test_ascii_flag_keeps_filter(index):
+    # Con re.ASCII el plegado es puramente ASCII y el filtro de trigramas sigue activo
+    blocks = index.candidate_blocks(re.compile('(?ai)mask'))
+    assert blocks is not None and len(blocks) < index.block_count()